@@ -1,12 +1,32 @@
-from .models import Cone, CarPose, Path2D
-from .path_planning import PathPlanning
-from .tester import PathTester
-from .scenarios import get_scenario_names, make_scenario
+from typing import TYPE_CHECKING
+
+# Names are imported from their submodule on first access (PEP 562), so that e.g.
+# ``from src import PathPlanning`` does not load the tester and its plotting and
+# multiprocessing dependencies.
+_EXPORTS = {
+    "Cone": "models",
+    "CarPose": "models",
+    "ConeArray": "models",
+    "Path2D": "models",
+    "PathArray": "models",
+    "PathPlanning": "path_planning",
+    "PathTester": "tester",
+    "get_scenario_names": "scenarios",
+    "make_scenario": "scenarios",
+}
+
+if TYPE_CHECKING:
+    from .models import Cone, CarPose, ConeArray, Path2D, PathArray
+    from .path_planning import PathPlanning
+    from .tester import PathTester
+    from .scenarios import get_scenario_names, make_scenario
 
 __all__ = [
     "Cone",
     "CarPose",
+    "ConeArray",
     "Path2D",
+    "PathArray",
     "PathPlanning",
     "PathTester",
     "get_scenario_names",
@@ -14,3 +34,16 @@ __all__ = [
 ]
 
 
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
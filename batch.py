@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterable, List, Sequence, Tuple
+
+from src.models import CarPose, Cone, Frame, PathArray
+from src.path_planning import PathPlanning
+
+
+def pack_frame(car_pose: CarPose, cones: Sequence[Cone]) -> bytes:
+    """Serialise a frame as raw float64: pose (x, y, yaw) followed by (x, y, color) per cone."""
+    values = array("d", (car_pose.x, car_pose.y, car_pose.yaw))
+    for c in cones:
+        values.extend((c.x, c.y, c.color))
+    return values.tobytes()
+
+
+def unpack_frame(data: bytes) -> Tuple[CarPose, List[Cone]]:
+    values = array("d")
+    values.frombytes(data)
+    cones = [Cone(values[i], values[i + 1], int(values[i + 2])) for i in range(3, len(values), 3)]
+    return CarPose(values[0], values[1], values[2]), cones
+
+
+PATH_COLUMNS = ("x", "y", "s", "heading", "curvature")
+
+
+def _pack_path(path: PathArray) -> bytes:
+    """Serialise every column of a path back to back as raw float64."""
+    return b"".join(getattr(path, name).tobytes() for name in PATH_COLUMNS)
+
+
+def _unpack_path(data: bytes) -> PathArray:
+    values = array("d")
+    values.frombytes(data)
+    n = len(values) // len(PATH_COLUMNS)
+    return PathArray(*(values[k * n : (k + 1) * n] for k in range(len(PATH_COLUMNS))))
+
+
+def _plan_packed(data: bytes, **planner_kwargs) -> bytes:
+    car_pose, cones = unpack_frame(data)
+    return _pack_path(PathPlanning(car_pose, cones, **planner_kwargs).generatePath())
+
+
+def plan_batch(frames: Iterable[Frame], workers: int = 1, chunksize: int = 64, **planner_kwargs) -> List[PathArray]:
+    """Plan a path for every (car_pose, cones) frame, returned in input order.
+
+    ``planner_kwargs`` go to every ``PathPlanning``. With ``workers > 1`` the frames are
+    fanned out over a process pool in chunks of ``chunksize``. Frames travel to the workers
+    as packed float64 buffers and paths come back the same way, all five columns included,
+    so no ``Cone`` objects are pickled and nothing is recomputed. A single worker plans the
+    frames in this process, without packing.
+    """
+    if workers <= 1:
+        return [PathPlanning(car_pose, cones, **planner_kwargs).generatePath() for car_pose, cones in frames]
+
+    packed = [pack_frame(car_pose, cones) for car_pose, cones in frames]
+    plan = partial(_plan_packed, **planner_kwargs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [_unpack_path(data) for data in pool.map(plan, packed, chunksize=chunksize)]
@@ -0,0 +1,492 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Sequence
+
+# Ensure project root is on sys.path when running as a script: e.g., `python src/bench.py`
+_CURRENT_DIR = os.path.dirname(__file__)
+_PROJECT_ROOT = os.path.abspath(os.path.join(_CURRENT_DIR, os.pardir))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+from src.batch import plan_batch
+from src.instrumentation import Instrumentation
+from src.models import CarPose, Cone, Frame, Path2D
+from src.path_planning import PathPlanning
+from src.sampling import SAMPLERS
+from src.scenarios import TRACK_KINDS, generate_track, get_scenario_names, make_scenario
+from src.service import DEADLINE, PlanningService
+from src.timing import percentiles, time_planner
+
+
+TRACK_SIZES = (10, 30, 100, 300, 1000, 3000, 10000)
+
+
+def scenario_frames(count: int) -> List[Frame]:
+    """Return ``count`` frames cycling through every scenario."""
+    names = get_scenario_names()
+    frames = []
+    for i in range(count):
+        cones, car_pose = make_scenario(names[i % len(names)])
+        frames.append((car_pose, cones))
+    return frames
+
+
+def stage_breakdown(car_pose: CarPose, cones: Sequence[Cone], repeat: int, **planner_kwargs) -> Dict:
+    """Mean milliseconds per planner stage and the counters over ``repeat`` instrumented calls."""
+    inst = Instrumentation()
+    for _ in range(repeat):
+        pose = CarPose(car_pose.x, car_pose.y, car_pose.yaw)
+        PathPlanning(pose, cones, instrumentation=inst, **planner_kwargs).generatePath()
+    summary = inst.summary()
+    return {
+        "stages_ms": {name: stage["mean_ms"] for name, stage in summary["stages"].items()},
+        "counters": {name: n / repeat for name, n in summary["counters"].items()},
+    }
+
+
+def measure_allocations(car_pose: CarPose, cones: Sequence[Cone], **planner_kwargs) -> Dict[str, float]:
+    """Peak traced memory of one ``generatePath`` call and the blocks it left allocated."""
+    planner = PathPlanning(CarPose(car_pose.x, car_pose.y, car_pose.yaw), cones, **planner_kwargs)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        planner.generatePath()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    return {
+        "peak_kib": peak / 1024,
+        "net_blocks": sum(s.count_diff for s in stats),
+    }
+
+
+def _run_case(name: str, car_pose: CarPose, cones: Sequence[Cone], repeat: int, **planner_kwargs) -> Dict:
+    samples = time_planner(car_pose, cones, repeat, **planner_kwargs)
+    stats = {k: v * 1e3 for k, v in percentiles(samples).items()}
+    return {
+        "name": name,
+        "cones": len(cones),
+        "repeat": repeat,
+        "latency_ms": stats,
+        "memory": measure_allocations(car_pose, cones, **planner_kwargs),
+        **stage_breakdown(car_pose, cones, min(repeat, 10), **planner_kwargs),
+    }
+
+
+def scaling_exponent(sizes: Sequence[int], latencies: Sequence[float]) -> Optional[float]:
+    """Least-squares slope of log(latency) over log(size), i.e. k in latency ~ size**k."""
+    points = [(math.log(n), math.log(t)) for n, t in zip(sizes, latencies) if n > 0 and t > 0]
+    if len(points) < 2:
+        return None
+    mx = sum(x for x, _ in points) / len(points)
+    my = sum(y for _, y in points) / len(points)
+    sxx = sum((x - mx) ** 2 for x, _ in points)
+    if sxx == 0:
+        return None
+    return sum((x - mx) * (y - my) for x, y in points) / sxx
+
+
+def bench_suite(
+    repeat: int = 50,
+    sizes: Sequence[int] = TRACK_SIZES,
+    track_kind: str = "mixed",
+    seed: int = 0,
+    **planner_kwargs,
+) -> Dict:
+    """Time the planner on every scenario and on generated tracks of increasing size.
+
+    A track of n cones is timed ``max(3, min(repeat, 2000 // n))`` times, so the largest
+    tracks dominate the run time: with the default sizes, about half a minute, most of it
+    on the 10000-cone track.
+    """
+    scenarios = []
+    for name in get_scenario_names():
+        cones, car_pose = make_scenario(name)
+        scenarios.append(_run_case(name, car_pose, cones, repeat, **planner_kwargs))
+
+    tracks = []
+    for n in sizes:
+        cones, car_pose = generate_track(n, kind=track_kind, seed=seed)
+        track_repeat = max(3, min(repeat, 2000 // max(n, 1)))
+        tracks.append(_run_case(f"track-{n}", car_pose, cones, track_repeat, **planner_kwargs))
+
+    return {
+        "meta": _metadata({"track_kind": track_kind, "seed": seed, **planner_kwargs}),
+        "scenarios": scenarios,
+        "tracks": tracks,
+        "scaling_exponent": scaling_exponent(
+            [t["cones"] for t in tracks], [t["latency_ms"]["p50"] for t in tracks]
+        ),
+    }
+
+
+ENGINE_SIZES = (10, 30, 100, 300, 1000)
+
+
+def bench_engines(
+    repeat: int = 20,
+    sizes: Sequence[int] = ENGINE_SIZES,
+    track_kind: str = "mixed",
+    seed: int = 0,
+    **planner_kwargs,
+) -> Dict[str, Dict]:
+    """:func:`bench_suite` once per ``PathPlanning.ENGINES`` entry, keyed by engine."""
+    return {
+        engine: bench_suite(repeat, sizes, track_kind, seed, engine=engine, **planner_kwargs)
+        for engine in PathPlanning.ENGINES
+    }
+
+
+def _print_engines(results: Dict[str, Dict]) -> None:
+    engines = list(results)
+    print(f"{'case':>12} {'cones':>6}" + "".join(f" {e + ' p50 ms':>16}" for e in engines))
+    first = results[engines[0]]
+    for kind in ("scenarios", "tracks"):
+        for i, case in enumerate(first[kind]):
+            row = "".join(f" {results[e][kind][i]['latency_ms']['p50']:>16.3f}" for e in engines)
+            print(f"{case['name']:>12} {case['cones']:>6}{row}")
+    for engine in engines:
+        exponent = results[engine]["scaling_exponent"]
+        if exponent is not None:
+            print(f"{engine}: latency ~ cones^{exponent:.2f}")
+
+
+BACKEND_SIZES = (10, 30, 100, 300, 1000)
+BACKEND_TOLERANCE = 1e-6  # meters the NumPy backend's path points may deviate from the Python ones
+
+
+def path_deviation(a: Path2D, b: Path2D) -> float:
+    """Largest distance between corresponding points of two paths, inf if their lengths differ."""
+    if len(a) != len(b):
+        return math.inf
+    return max((math.hypot(p[0] - q[0], p[1] - q[1]) for p, q in zip(a, b)), default=0.0)
+
+
+def bench_backends(
+    repeat: int = 10,
+    sizes: Sequence[int] = BACKEND_SIZES,
+    track_kind: str = "mixed",
+    seed: int = 0,
+    samplers: Sequence[str] = SAMPLERS,
+) -> List[Dict]:
+    """Plan every scenario and generated track with both backends and every sampler.
+
+    Each row holds the p50 latency of either backend, their point counts and the
+    :func:`path_deviation` of the NumPy path from the Python one.
+    """
+    cases = [(name, *make_scenario(name)) for name in get_scenario_names()]
+    for n in sizes:
+        cones, car_pose = generate_track(n, kind=track_kind, seed=seed)
+        cases.append((f"{track_kind}-{n}", cones, car_pose))
+    rows = []
+    for sampler in samplers:
+        for name, cones, car_pose in cases:
+            row = {"name": name, "cones": len(cones), "sampler": sampler}
+            paths = {}
+            for backend in PathPlanning.BACKENDS:
+                samples = time_planner(car_pose, cones, repeat, backend=backend, sampler=sampler)
+                pose = CarPose(car_pose.x, car_pose.y, car_pose.yaw)
+                paths[backend] = PathPlanning(pose, cones, backend=backend, sampler=sampler).generatePath()
+                row[f"{backend}_ms"] = percentiles(samples)["p50"] * 1e3
+                row[f"{backend}_points"] = len(paths[backend])
+            row["deviation"] = path_deviation(paths["python"], paths["numpy"])
+            rows.append(row)
+    return rows
+
+
+def _metadata(planner_kwargs: Dict) -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=_CURRENT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "planner": planner_kwargs,
+    }
+
+
+def bench_batch(
+    frames: Sequence[Frame],
+    workers: Sequence[int] = (1, 2, 4, 8),
+    chunksize: int = 64,
+) -> List[Dict[str, float]]:
+    """Time ``plan_batch`` over ``frames`` for every worker count."""
+    results = []
+    for n in workers:
+        start = time.perf_counter()
+        plan_batch(frames, workers=n, chunksize=chunksize)
+        seconds = time.perf_counter() - start
+        results.append(
+            {"workers": n, "frames": len(frames), "seconds": seconds, "frames_per_s": len(frames) / seconds}
+        )
+    return results
+
+
+def bench_service(
+    frames: Sequence[Frame],
+    rate: float,
+    deadline: float = DEADLINE,
+    **planner_kwargs,
+) -> Dict:
+    """Feed ``frames`` to a ``PlanningService`` at ``rate`` frames per second from an in-process producer.
+
+    The producer submits on schedule without waiting for results, like a perception
+    callback would. Returns the service counters, the latency of the published results
+    and how many of them were fallbacks.
+    """
+
+    async def produce():
+        period = 1.0 / rate
+        async with PlanningService(deadline=deadline, **planner_kwargs) as service:
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            waiters = []
+            for i, (car_pose, cones) in enumerate(frames):
+                await asyncio.sleep(max(0.0, start + i * period - loop.time()))
+                waiters.append(service.submit(car_pose, cones))
+            results = await asyncio.gather(*waiters)
+            return service.stats(), results, loop.time() - start
+
+    stats, results, seconds = asyncio.run(produce())
+    published = {r.frame: r for r in results}.values()
+    return {
+        "rate": rate,
+        "deadline_ms": deadline * 1e3,
+        "seconds": seconds,
+        **stats._asdict(),
+        "fallbacks": sum(1 for r in published if r.fallback),
+        "latency_ms": percentiles([r.latency_ms for r in published]),
+    }
+
+
+# what a short-lived worker imports, timed in fresh interpreters by bench_startup
+STARTUP_IMPORTS = (
+    "import src",
+    "from src import PathPlanning",
+    "from src import PathPlanning, PathTester",
+)
+HEAVY_MODULES = ("matplotlib", "numpy", "PIL", "multiprocessing", "concurrent.futures")
+STARTUP_LIMIT_MS = 100.0  # cold import of PathPlanning, generous for slow CI machines
+
+_STARTUP_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{statement}
+import_ms = (time.perf_counter() - start) * 1e3
+print(json.dumps({{"import_ms": import_ms, "modules": sorted(sys.modules)}}))
+"""
+
+
+def bench_startup(statements: Sequence[str] = STARTUP_IMPORTS, repeat: int = 10) -> List[Dict]:
+    """Cold-start cost of each import statement, every sample in a fresh interpreter.
+
+    ``import_ms`` is the time spent in the statement itself, ``process_ms`` the whole
+    interpreter run around it. ``heavy`` lists the :data:`HEAVY_MODULES` it loaded.
+    """
+    results = []
+    for statement in statements:
+        code = _STARTUP_PROBE.format(root=_PROJECT_ROOT, statement=statement)
+        import_ms = []
+        process_ms = []
+        modules: List[str] = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+            process_ms.append((time.perf_counter() - start) * 1e3)
+            probe = json.loads(out)
+            import_ms.append(probe["import_ms"])
+            modules = probe["modules"]
+        loaded = set(modules)
+        results.append(
+            {
+                "statement": statement,
+                "import_ms": percentiles(import_ms),
+                "process_ms": percentiles(process_ms),
+                "modules": len(modules),
+                "heavy": [m for m in HEAVY_MODULES if m in loaded],
+            }
+        )
+    return results
+
+
+def _print_cases(title: str, cases: Sequence[Dict]) -> None:
+    print(title)
+    print(f"{'case':>12} {'cones':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak KiB':>9} {'blocks':>7}")
+    for case in cases:
+        lat = case["latency_ms"]
+        mem = case["memory"]
+        print(
+            f"{case['name']:>12} {case['cones']:>6} {lat['p50']:>9.3f} {lat['p95']:>9.3f} {lat['p99']:>9.3f}"
+            f" {mem['peak_kib']:>9.1f} {mem['net_blocks']:>7}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the path planner.")
+    sub = parser.add_subparsers(dest="command")
+
+    suite = sub.add_parser("suite", help="Latency, allocations and scaling over scenarios and generated tracks")
+    suite.add_argument("--repeat", type=int, default=50, help="Timed calls per scenario")
+    suite.add_argument("--sizes", type=int, nargs="+", default=list(TRACK_SIZES), help="Generated track sizes")
+    suite.add_argument("--track", type=str, default="mixed", choices=TRACK_KINDS, help="Generated track kind")
+    suite.add_argument("--seed", type=int, default=0, help="Seed of the generated tracks")
+    suite.add_argument("--backend", type=str, default="python", choices=PathPlanning.BACKENDS)
+    suite.add_argument("--engine", type=str, default="chain", choices=PathPlanning.ENGINES, help="Planner engine")
+    suite.add_argument("--sampler", type=str, default="steps", choices=SAMPLERS, help="Path sampler")
+    suite.add_argument("--max-range", type=float, default=None, help="Cull cones beyond this range (meters)")
+    suite.add_argument("--fov", type=float, default=None, help="Cull cones outside this field of view (radians)")
+    suite.add_argument("--json", type=str, default=None, help="Write machine-readable results to this file")
+
+    engines = sub.add_parser("engines", help="Latency and scaling of every planner engine side by side")
+    engines.add_argument("--repeat", type=int, default=20, help="Timed calls per scenario")
+    engines.add_argument("--sizes", type=int, nargs="+", default=list(ENGINE_SIZES), help="Generated track sizes")
+    engines.add_argument("--track", type=str, default="mixed", choices=TRACK_KINDS, help="Generated track kind")
+    engines.add_argument("--seed", type=int, default=0, help="Seed of the generated tracks")
+    engines.add_argument("--max-range", type=float, default=None, help="Cull cones beyond this range (meters)")
+    engines.add_argument("--json", type=str, default=None, help="Write machine-readable results to this file")
+
+    batch = sub.add_parser("batch", help="Throughput of plan_batch at several worker counts")
+    batch.add_argument("--frames", type=int, default=2000, help="Number of frames for the batch benchmark")
+    batch.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Worker counts to time")
+    batch.add_argument("--chunksize", type=int, default=64, help="Frames per worker task")
+
+    service = sub.add_parser("service", help="Frame drops, deadline misses and latency of the asyncio planning service")
+    service.add_argument("--frames", type=int, default=500, help="Number of frames to submit")
+    service.add_argument("--rate", type=float, nargs="+", default=[100.0, 1000.0, 10000.0], help="Frames per second")
+    service.add_argument("--deadline", type=float, default=DEADLINE * 1e3, help="Per-frame deadline (ms)")
+    service.add_argument("--sizes", type=int, nargs="+", default=[], help="Plan generated tracks of these sizes")
+    service.add_argument("--track", type=str, default="mixed", choices=TRACK_KINDS, help="Generated track kind")
+
+    backends = sub.add_parser("backends", help="Check that the NumPy backend plans the same paths as the Python one")
+    backends.add_argument("--repeat", type=int, default=10, help="Timed calls per case and backend")
+    backends.add_argument("--sizes", type=int, nargs="+", default=list(BACKEND_SIZES), help="Generated track sizes")
+    backends.add_argument("--track", type=str, default="mixed", choices=TRACK_KINDS, help="Generated track kind")
+    backends.add_argument("--seed", type=int, default=0, help="Seed of the generated tracks")
+    backends.add_argument("--sampler", type=str, nargs="+", default=list(SAMPLERS), choices=SAMPLERS)
+    backends.add_argument(
+        "--tolerance", type=float, default=BACKEND_TOLERANCE, help="Fail above this point deviation (meters)"
+    )
+
+    startup = sub.add_parser("startup", help="Cold import time of the package in fresh interpreters")
+    startup.add_argument("--repeat", type=int, default=10, help="Fresh interpreters per import statement")
+    startup.add_argument(
+        "--max-ms", type=float, default=STARTUP_LIMIT_MS, help="Fail above this p50 for importing PathPlanning"
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "startup":
+        results = bench_startup(repeat=args.repeat)
+        print(f"package startup, {args.repeat} fresh interpreters per statement")
+        print(f"{'statement':>40} {'p50 ms':>9} {'max ms':>9} {'process':>9} {'modules':>8}  heavy")
+        for row in results:
+            print(
+                f"{row['statement']:>40} {row['import_ms']['p50']:>9.1f} {row['import_ms']['max']:>9.1f}"
+                f" {row['process_ms']['p50']:>9.1f} {row['modules']:>8}  {', '.join(row['heavy']) or '-'}"
+            )
+        planner = next(row for row in results if row["statement"] == "from src import PathPlanning")
+        problems = []
+        if planner["heavy"]:
+            problems.append(f"importing PathPlanning loads {', '.join(planner['heavy'])}")
+        if planner["import_ms"]["p50"] > args.max_ms:
+            problems.append(f"importing PathPlanning takes {planner['import_ms']['p50']:.1f} ms > {args.max_ms:.1f} ms")
+        for problem in problems:
+            print(f"FAIL: {problem}")
+        if problems:
+            sys.exit(1)
+        return
+
+    if args.command == "backends":
+        rows = bench_backends(args.repeat, args.sizes, args.track, args.seed, args.sampler)
+        print(
+            f"{'case':>12} {'cones':>6} {'sampler':>7} {'python ms':>10} {'numpy ms':>10}"
+            f" {'points':>9} {'deviation':>10}"
+        )
+        failed = 0
+        for row in rows:
+            mismatch = row["deviation"] > args.tolerance
+            failed += mismatch
+            points = f"{row['python_points']}/{row['numpy_points']}"
+            print(
+                f"{row['name']:>12} {row['cones']:>6} {row['sampler']:>7} {row['python_ms']:>10.3f}"
+                f" {row['numpy_ms']:>10.3f} {points:>9} {row['deviation']:>10.2e}{'  FAIL' if mismatch else ''}"
+            )
+        print(f"{len(rows) - failed}/{len(rows)} cases within {args.tolerance:g} m")
+        if failed:
+            sys.exit(1)
+        return
+
+    if args.command == "service":
+        frames = scenario_frames(args.frames)
+        if args.sizes:
+            tracks = [generate_track(n, kind=args.track, seed=i) for i, n in enumerate(args.sizes)]
+            frames = [(car_pose, cones) for cones, car_pose in tracks]
+            frames = [frames[i % len(frames)] for i in range(args.frames)]
+        print(f"planning service, {len(frames)} frames, deadline {args.deadline:.1f} ms")
+        print(
+            f"{'rate/s':>8} {'planned':>8} {'dropped':>8} {'missed':>7} {'max depth':>9}"
+            f" {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"
+        )
+        for rate in args.rate:
+            row = bench_service(frames, rate, args.deadline / 1e3)
+            lat = row["latency_ms"]
+            print(
+                f"{rate:>8.0f} {row['planned']:>8} {row['dropped']:>8} {row['deadline_misses']:>7}"
+                f" {row['max_queue_depth']:>9} {lat['p50']:>9.3f} {lat['p95']:>9.3f} {lat['max']:>9.3f}"
+            )
+        return
+
+    if args.command == "batch":
+        frames = scenario_frames(args.frames)
+        print(f"batch planning, {len(frames)} frames ({os.cpu_count()} CPUs)")
+        print(f"{'workers':>8} {'seconds':>9} {'frames/s':>10}")
+        for row in bench_batch(frames, args.workers, args.chunksize):
+            print(f"{row['workers']:>8} {row['seconds']:>9.3f} {row['frames_per_s']:>10.1f}")
+        return
+
+    if args.command == "engines":
+        culling = {"max_range": args.max_range} if args.max_range is not None else {}
+        results = bench_engines(args.repeat, args.sizes, args.track, args.seed, **culling)
+        _print_engines(results)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"results written to {args.json}")
+        return
+
+    if args.command is None:
+        args = suite.parse_args([])
+    culling = {k: v for k, v in (("max_range", args.max_range), ("fov", args.fov)) if v is not None}
+    planner = {"backend": args.backend, "sampler": args.sampler, "engine": args.engine, **culling}
+    results = bench_suite(args.repeat, args.sizes, args.track, args.seed, **planner)
+    _print_cases("scenarios", results["scenarios"])
+    _print_cases("generated tracks", results["tracks"])
+    exponent = results["scaling_exponent"]
+    if exponent is not None:
+        print(f"scaling: latency ~ cones^{exponent:.2f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import math
+from collections import Counter, OrderedDict
+from typing import Hashable, NamedTuple, Sequence, Tuple, Union
+
+from src.models import CarPose, Cone, ConeArray, PathArray
+from src.path_planning import PathPlanning
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+def cone_fingerprint(cones: Union[Sequence[Cone], ConeArray]) -> Hashable:
+    """Hashable identity of a cone set.
+
+    A list of (frozen, hashable) ``Cone`` objects becomes a frozenset of (cone, count)
+    pairs, so the order the cones arrive in does not matter but duplicates still do. A
+    ``ConeArray`` is fingerprinted by its raw columns.
+    """
+    if isinstance(cones, ConeArray):
+        return (cones.x.tobytes(), cones.y.tobytes(), cones.color.tobytes())
+    return frozenset(Counter(cones).items())
+
+
+def yaw_cell(yaw: float, tolerance: float) -> int:
+    """Index of the ``tolerance``-wide heading cell of ``yaw``, the same for yaw + 2 * pi.
+
+    The full turn is split into a whole number of cells of about ``tolerance`` radians, so
+    that headings of pi and -pi, which are the same, share a cell.
+    """
+    cells = max(1, round(2 * math.pi / tolerance))
+    yaw = math.atan2(math.sin(yaw), math.cos(yaw))
+    return math.floor(yaw / (2 * math.pi) * cells + 0.5) % cells
+
+
+STATEFUL_OPTIONS = ("tracker", "memory")  # planner options whose paths depend on earlier frames
+
+
+class PlanningCache:
+    """LRU cache of planned paths keyed on the quantized car pose and the cone set.
+
+    Poses are snapped to a grid of ``position_tolerance`` meters and ``yaw_tolerance``
+    radians (see :func:`yaw_cell`), so calls from (almost) the same pose with the same
+    cones, as in replays or while the car is stationary, return the stored path instead
+    of replanning. The path of the first pose that landed in a grid cell is returned for
+    the whole cell. At most ``maxsize`` paths are kept; the least recently used one is
+    evicted first. The returned ``PathArray`` objects are shared between hits and must not
+    be modified.
+
+    Extra keyword arguments are passed to every ``PathPlanning`` (backend, matcher, ...).
+    The :data:`STATEFUL_OPTIONS` are rejected: a path planned with them depends on the
+    frames before it, not only on the key.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        position_tolerance: float = 0.01,
+        yaw_tolerance: float = 0.001,
+        **planner_kwargs,
+    ):
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1, got {maxsize}")
+        if position_tolerance <= 0 or yaw_tolerance <= 0:
+            raise ValueError("position_tolerance and yaw_tolerance must be positive")
+        for name in STATEFUL_OPTIONS:
+            if planner_kwargs.get(name) is not None:
+                raise ValueError(f"Cannot cache planners with a {name}, their paths depend on earlier frames")
+        self.maxsize = maxsize
+        self.position_tolerance = position_tolerance
+        self.yaw_tolerance = yaw_tolerance
+        self.planner_kwargs = planner_kwargs
+        self._paths: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, car_pose: CarPose, cones: Union[Sequence[Cone], ConeArray]) -> Tuple:
+        pose = (
+            round(car_pose.x / self.position_tolerance),
+            round(car_pose.y / self.position_tolerance),
+            yaw_cell(car_pose.yaw, self.yaw_tolerance),
+        )
+        return pose, cone_fingerprint(cones)
+
+    def plan(self, car_pose: CarPose, cones: Union[Sequence[Cone], ConeArray]) -> PathArray:
+        """Return the cached path for this pose cell and cone set, planning it on a miss."""
+        key = self.key(car_pose, cones)
+        path = self._paths.get(key)
+        if path is not None:
+            self._paths.move_to_end(key)
+            self.hits += 1
+            return path
+
+        self.misses += 1
+        pose = CarPose(car_pose.x, car_pose.y, car_pose.yaw)
+        path = PathPlanning(pose, cones, **self.planner_kwargs).generatePath()
+        self._paths[key] = path
+        if len(self._paths) > self.maxsize:
+            self._paths.popitem(last=False)
+            self.evictions += 1
+        return path
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.evictions, len(self._paths), self.maxsize)
+
+    def clear(self) -> None:
+        """Drop every cached path and reset the statistics."""
+        self._paths.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._paths)
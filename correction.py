@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import math
+import time
+from typing import List, NamedTuple, Optional, Sequence
+
+from src.models import CarPose, Cone
+from src.spatial_index import SCAN_LIMIT, GridIndex, chain_sort
+
+
+OFFSET = 0.75  # meters between a violating cone and the point inserted next to it
+MAX_PASSES = 20  # safety limit to avoid endless corrections
+EXTENSION_HORIZON = 30.0  # meters, how far the chain is extended straight ahead
+
+
+class CorrectionResult(NamedTuple):
+    """Corrected main points plus how much work it took to get there."""
+
+    points: List[CarPose]
+    passes: int
+    insertions: int
+    interrupted: bool = False  # stopped at the deadline with violations possibly left
+
+
+def extension_point(points: Sequence[CarPose], horizon: float = EXTENSION_HORIZON) -> Optional[CarPose]:
+    """Return a new CarPose extending the chain along its last yaw up to ``horizon`` meters."""
+    total_distance = 0.0
+    for i in range(len(points) - 1):
+        total_distance += math.hypot(points[i + 1].x - points[i].x, points[i + 1].y - points[i].y)
+
+    remaining_distance = horizon - total_distance
+    if remaining_distance <= 0:
+        return None
+
+    last_point = points[-1]
+    new_x = last_point.x + remaining_distance * math.cos(last_point.yaw)
+    new_y = last_point.y + remaining_distance * math.sin(last_point.yaw)
+    return CarPose(new_x, new_y, last_point.yaw)
+
+
+def reorder(points: List[CarPose], cx: float, cy: float) -> List[CarPose]:
+    """Chain-sort ``points`` from (cx, cy) and point every yaw at the next point.
+
+    The last point gets the yaw the last point of the input had.
+    """
+    final_yaw = points[-1].yaw
+    points = chain_sort(points, cx, cy)
+    for j in range(len(points) - 1):
+        points[j].yaw = math.atan2(points[j + 1].y - points[j].y, points[j + 1].x - points[j].x)
+    points[-1].yaw = final_yaw
+    return points
+
+
+def correct_sides(
+    points: List[CarPose],
+    blue: Sequence[Cone],
+    yellow: Sequence[Cone],
+    cx: float,
+    cy: float,
+    offset: float = OFFSET,
+    max_passes: int = MAX_PASSES,
+    deadline: Optional[float] = None,
+    clearance: float = 0.0,
+) -> CorrectionResult:
+    """Insert points so blue cones end up left and yellow cones right of the chain.
+
+    ``points`` must already be ordered (see :func:`reorder`). The cones are indexed once;
+    every pass then sweeps all segments, including the straight extension, collects the
+    violating cones in one go and inserts all fixes in a single rebuild of the chain. A
+    cone is fixed at most once per pass, on the first segment it violates. Each pass
+    computes the segments' direction vectors and bounding boxes once for both colours.
+
+    With a ``deadline`` (a ``time.perf_counter()`` value) no new pass starts once it has
+    passed; the result is then marked ``interrupted``.
+
+    With a positive ``clearance`` a cone on the right side but closer than that to a
+    segment is fixed the same way as one on the wrong side.
+    """
+    # cone coordinates are read once; large cone sets also get a grid so each segment only
+    # looks at the cones in its bounding box, small ones are scanned directly
+    sides = []
+    for cones, sign in ((blue, -1.0), (yellow, 1.0)):
+        if cones:
+            index = GridIndex(cones) if len(cones) > SCAN_LIMIT else None
+            sides.append((index, cones, [c.x for c in cones], [c.y for c in cones], sign))
+    atan2 = math.atan2
+    cos = math.cos
+    sin = math.sin
+    quarter = math.pi / 2
+    clear2 = clearance * clearance
+    insertions = 0
+    passes = 0
+    while passes < max_passes:
+        if deadline is not None and time.perf_counter() >= deadline:
+            return CorrectionResult(points, passes, insertions, True)
+        passes += 1
+        ext = extension_point(points)
+        chain = points + [ext] if ext else points
+
+        # direction vector and bounding box of every segment, shared by both colours
+        segments = []
+        for i in range(len(chain) - 1):
+            x1 = chain[i].x
+            y1 = chain[i].y
+            x2 = chain[i + 1].x
+            y2 = chain[i + 1].y
+            segments.append((x1, y1, x2 - x1, y2 - y1, min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)))
+
+        fixes: List[List[tuple]] = [[] for _ in segments]
+        found = 0
+        for index, cones, cxs, cys, sign in sides:
+            fixed = set()
+            everything = range(len(cones))
+            for i, (x1, y1, vx, vy, xmin, ymin, xmax, ymax) in enumerate(segments):
+                seg_len2 = vx * vx + vy * vy
+                if clearance > 0:
+                    xmin, ymin, xmax, ymax = xmin - clearance, ymin - clearance, xmax + clearance, ymax + clearance
+                candidates = everything if index is None else index.query_box(xmin, ymin, xmax, ymax)
+                for j in candidates:
+                    cone_x = cxs[j]
+                    cone_y = cys[j]
+                    if not (xmin <= cone_x <= xmax and ymin <= cone_y <= ymax) or j in fixed:
+                        continue
+                    bx = cone_x - x1
+                    by = cone_y - y1
+                    along = (bx * vx + by * vy) / seg_len2 if seg_len2 else 0.0
+                    # cross product: blue must be strictly left (> 0), yellow strictly right (< 0)
+                    cross = vx * by - vy * bx
+                    if sign * cross < 0:
+                        # on its side: only a cone within clearance of the segment needs a fix
+                        if clearance <= 0 or cross * cross >= clear2 * seg_len2:
+                            continue
+                        t = min(max(along, 0.0), 1.0)
+                        if math.hypot(bx - t * vx, by - t * vy) >= clearance:
+                            continue
+                    fixed.add(j)
+                    # new point at the vertex of the rectangle, towards the track centre
+                    angle = atan2(by, bx) + sign * quarter
+                    new_x = cone_x + offset * cos(angle)
+                    new_y = cone_y + offset * sin(angle)
+                    fixes[i].append((along, new_x, new_y))
+                    found += 1
+
+        if not found:
+            break
+        insertions += found
+
+        rebuilt: List[CarPose] = []
+        for i in range(len(chain) - 1):
+            p1 = chain[i]
+            p2 = chain[i + 1]
+            rebuilt.append(p1)
+            for _, new_x, new_y in sorted(fixes[i]):
+                p1.yaw = math.atan2(new_y - p1.y, new_x - p1.x)
+                p1 = CarPose(new_x, new_y, math.atan2(p2.y - new_y, p2.x - new_x))
+                rebuilt.append(p1)
+        if not ext:
+            rebuilt.append(chain[-1])
+        points = reorder(rebuilt, cx, cy)
+
+    return CorrectionResult(points, passes, insertions)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import math
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Union
+
+from src.models import CarPose, Cone, ConeArray
+from src.spatial_index import GridIndex
+
+
+MAX_RANGE = 30.0  # meters, the horizon the chain is extended to (see src.correction)
+FOV = math.pi  # radians, the +-90 degrees the planner treats as "in front"
+
+
+class CullResult(NamedTuple):
+    """Cones inside the corridor, in input order, and how many were dropped."""
+
+    cones: Union[List[Cone], ConeArray]
+    culled: int
+
+
+def _cos_half(fov: float) -> float:
+    if not 0 < fov <= 2 * math.pi:
+        raise ValueError(f"fov must be in (0, 2*pi], got {fov}")
+    return -1.0 if fov >= 2 * math.pi else math.cos(fov / 2)
+
+
+def in_front(dx, dy, hx, hy):
+    """The planner's "in front" test for a car-to-cone vector (dx, dy) and heading (hx, hy).
+
+    A cone is in front when the vector has a positive dot product with the unit heading
+    vector, i.e. it lies within +-90 degrees of the heading. A cone exactly at the car
+    position counts as in front while the heading's x component is positive, as the
+    original ``atan2``-based test did (``atan2(0, 0)`` is 0). Works on floats and on
+    NumPy arrays alike.
+    """
+    return (dx * hx + dy * hy > 0) | ((dx == 0) & (dy == 0) & (hx > 0))
+
+
+def corridor_indices(
+    xs: Sequence[float],
+    ys: Sequence[float],
+    car_pose: CarPose,
+    max_range: float = MAX_RANGE,
+    fov: float = FOV,
+    candidates: Optional[Iterable[int]] = None,
+) -> List[int]:
+    """Indices of the points within ``max_range`` of the car and inside its field of view.
+
+    Each point is moved into the car frame with one dot product against the heading, so
+    the test needs no trigonometry per point. ``candidates`` restricts the scan, e.g. to
+    the result of a spatial index range query.
+    """
+    if max_range <= 0:
+        raise ValueError(f"max_range must be positive, got {max_range}")
+    cos_half = _cos_half(fov)
+    hx = math.cos(car_pose.yaw)
+    hy = math.sin(car_pose.yaw)
+    cx = car_pose.x
+    cy = car_pose.y
+    r2 = max_range * max_range
+    keep = []
+    for i in candidates if candidates is not None else range(len(xs)):
+        dx = xs[i] - cx
+        dy = ys[i] - cy
+        d2 = dx * dx + dy * dy
+        if d2 > r2:
+            continue
+        forward = dx * hx + dy * hy
+        if forward >= cos_half * math.sqrt(d2):
+            keep.append(i)
+    return keep
+
+
+def _corridor_mask(cones: ConeArray, car_pose: CarPose, max_range: float, fov: float):
+    """Boolean NumPy mask of the corridor test for a whole ``ConeArray`` at once."""
+    import numpy as np
+
+    if max_range <= 0:
+        raise ValueError(f"max_range must be positive, got {max_range}")
+    cos_half = _cos_half(fov)
+    xs, ys, _ = cones.to_numpy()
+    c = math.cos(car_pose.yaw)
+    s = math.sin(car_pose.yaw)
+    dx = xs - car_pose.x
+    dy = ys - car_pose.y
+    forward = dx * c + dy * s
+    lateral = dy * c - dx * s
+    dist = np.hypot(forward, lateral)
+    return (dist <= max_range) & (forward >= cos_half * dist)
+
+
+def cull_cones(
+    cones: Union[Sequence[Cone], ConeArray],
+    car_pose: CarPose,
+    max_range: float = MAX_RANGE,
+    fov: float = FOV,
+    index: Optional[GridIndex] = None,
+) -> CullResult:
+    """Drop the cones outside the range and field-of-view corridor ahead of the car.
+
+    A ``ConeArray`` is transformed into the car frame in one NumPy step. For a list of
+    cones, ``index`` may be a ``GridIndex`` built over the same cones (in the same order),
+    in which case only the cones returned by its range query are tested.
+    """
+    if isinstance(cones, ConeArray):
+        if not len(cones):
+            return CullResult(cones, 0)
+        mask = _corridor_mask(cones, car_pose, max_range, fov)
+        xs, ys, colors = cones.to_numpy()
+        kept = ConeArray(xs[mask], ys[mask], colors[mask])
+        return CullResult(kept, len(cones) - len(kept))
+
+    candidates = None
+    if index is not None:
+        candidates = index.query_radius(car_pose.x, car_pose.y, max_range)
+    xs = [c.x for c in cones]
+    ys = [c.y for c in cones]
+    kept = [cones[i] for i in corridor_indices(xs, ys, car_pose, max_range, fov, candidates)]
+    return CullResult(kept, len(cones) - len(kept))
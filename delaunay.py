@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.models import CarPose, Cone
+
+
+HORIZON = 30.0  # meters of midline searched ahead of the car
+BEAM_WIDTH = 8  # partial midlines kept per search step
+MAX_TURN = math.pi / 2  # sharpest heading change allowed between midline segments
+TURN_WEIGHT = 1.0  # meters of progress one radian**2 of turning costs
+MIN_WIDTH = 0.5  # meters, narrower blue-yellow edges are not track crossings
+MAX_WIDTH = 8.0  # meters, wider blue-yellow edges are not track crossings
+
+# Rounding bounds of the geometric predicates, relative to the magnitude of their terms
+# (a safe margin over Shewchuk's), and how flat a triangle may be before its circumcircle
+# is too inaccurate to test against and the in-circle determinant is evaluated instead.
+ORIENT_ERROR = 1e-15
+INCIRCLE_ERROR = 1e-14
+SLIVER = 1e-3
+CIRCLE_MARGIN = 1e-6  # relative distance from a circumcircle below which it is not trusted
+
+Triangle = Tuple[int, int, int]
+
+
+def _integers(*values: float) -> List[int]:
+    """The values scaled by one common power of two to exact integers."""
+    ratios = [v.as_integer_ratio() for v in values]
+    scale = max(d for _, d in ratios)
+    return [n * (scale // d) for n, d in ratios]
+
+
+def _orient(ax: float, ay: float, bx: float, by: float, cx: float, cy: float) -> float:
+    """Twice the signed area of (a, b, c); positive when counter-clockwise.
+
+    The sign is exact: when rounding could flip it, only the sign is returned, computed in
+    integers.
+    """
+    left = (bx - ax) * (cy - ay)
+    right = (by - ay) * (cx - ax)
+    det = left - right
+    if abs(det) > ORIENT_ERROR * (abs(left) + abs(right)) or left == right == 0:
+        return det
+    ax, ay, bx, by, cx, cy = _integers(ax, ay, bx, by, cx, cy)
+    det = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+    return float((det > 0) - (det < 0))
+
+
+def _incircle(ax: float, ay: float, bx: float, by: float, cx: float, cy: float, px: float, py: float) -> float:
+    """Positive when p lies inside the circle through the counter-clockwise (a, b, c).
+
+    Like :func:`_orient`, exact in sign.
+    """
+    adx, ady, bdx, bdy, cdx, cdy = ax - px, ay - py, bx - px, by - py, cx - px, cy - py
+    alift = adx * adx + ady * ady
+    blift = bdx * bdx + bdy * bdy
+    clift = cdx * cdx + cdy * cdy
+    det = alift * (bdx * cdy - cdx * bdy) + blift * (cdx * ady - adx * cdy) + clift * (adx * bdy - bdx * ady)
+    permanent = (
+        alift * (abs(bdx * cdy) + abs(cdx * bdy))
+        + blift * (abs(cdx * ady) + abs(adx * cdy))
+        + clift * (abs(adx * bdy) + abs(bdx * ady))
+    )
+    if abs(det) > INCIRCLE_ERROR * permanent:
+        return det
+    ax, ay, bx, by, cx, cy, px, py = _integers(ax, ay, bx, by, cx, cy, px, py)
+    adx, ady, bdx, bdy, cdx, cdy = ax - px, ay - py, bx - px, by - py, cx - px, cy - py
+    det = (
+        (adx * adx + ady * ady) * (bdx * cdy - cdx * bdy)
+        + (bdx * bdx + bdy * bdy) * (cdx * ady - adx * cdy)
+        + (cdx * cdx + cdy * cdy) * (adx * bdy - bdx * ady)
+    )
+    return float((det > 0) - (det < 0))
+
+
+def _circumcircle(xs, ys, a: int, b: int, c: int) -> Tuple[float, float, float]:
+    """Centre and squared radius, with an infinite radius for (nearly) collinear points."""
+    ax, ay, bx, by, cx, cy = xs[a], ys[a], xs[b], ys[b], xs[c], ys[c]
+    d = 2 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+    longest = max((bx - ax) ** 2 + (by - ay) ** 2, (cx - bx) ** 2 + (cy - by) ** 2, (ax - cx) ** 2 + (ay - cy) ** 2)
+    if abs(d) <= SLIVER * longest:
+        return 0.0, 0.0, math.inf
+    a2 = ax * ax + ay * ay
+    b2 = bx * bx + by * by
+    c2 = cx * cx + cy * cy
+    ux = (a2 * (by - cy) + b2 * (cy - ay) + c2 * (ay - by)) / d
+    uy = (a2 * (cx - bx) + b2 * (ax - cx) + c2 * (bx - ax)) / d
+    return ux, uy, (ax - ux) ** 2 + (ay - uy) ** 2
+
+
+def triangulate(xs: Sequence[float], ys: Sequence[float], cell_size: float = 2.0) -> List[Triangle]:
+    """Delaunay triangulation of the points (xs, ys) as counter-clockwise index triples.
+
+    Bowyer-Watson insertion, with the outside of the convex hull covered by ghost
+    triangles that join each hull edge to a vertex at infinity. A point falls in a ghost's
+    circumcircle when it lies strictly outside that hull edge or on the edge itself, so
+    unlike a finite super-triangle no triangle along the hull is ever lost. Points are
+    inserted in a snake order over ``cell_size`` columns so each one is located by a short
+    walk from the previous insertion, and the cavity is grown from there across
+    neighbouring triangles, which keeps the whole build close to O(n log n) for cone
+    tracks. Duplicate points are triangulated once (the lowest index); collinear points
+    give no triangles.
+    """
+    n = len(xs)
+    if n < 3:
+        return []
+    xs = list(xs)
+    ys = list(ys)
+    ghost = n  # the vertex at infinity, always stored last in its triangles
+
+    order = sorted(
+        range(n),
+        key=lambda i: (int(xs[i] // cell_size), ys[i] if int(xs[i] // cell_size) % 2 == 0 else -ys[i]),
+    )
+    # the first triangle needs three points that are not collinear
+    a = order[0]
+    b = next((i for i in order if (xs[i], ys[i]) != (xs[a], ys[a])), None)
+    if b is None:
+        return []
+    c = next((i for i in order if _orient(xs[a], ys[a], xs[b], ys[b], xs[i], ys[i]) != 0), None)
+    if c is None:
+        return []
+    if _orient(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c]) < 0:
+        b, c = c, b
+
+    tris: Dict[int, Tuple[int, int, int, float, float, float]] = {}
+    edges: Dict[Tuple[int, int], int] = {}
+    next_id = 0
+
+    def add(a: int, b: int, c: int) -> int:
+        nonlocal next_id
+        if a == ghost:
+            a, b, c = b, c, a
+        elif b == ghost:
+            a, b, c = c, a, b
+        tid = next_id
+        next_id += 1
+        tris[tid] = (a, b, c) + (_circumcircle(xs, ys, a, b, c) if c != ghost else (0.0, 0.0, 0.0))
+        edges[(a, b)] = tid
+        edges[(b, c)] = tid
+        edges[(c, a)] = tid
+        return tid
+
+    def inside(tid: int, px: float, py: float) -> bool:
+        a, b, c, ux, uy, r2 = tris[tid]
+        if c != ghost:
+            off = (px - ux) ** 2 + (py - uy) ** 2 - r2
+            if abs(off) > CIRCLE_MARGIN * r2:
+                return off < 0
+            return _incircle(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c], px, py) > 0
+        # the outside of hull edge a -> b lies to its left
+        side = _orient(xs[a], ys[a], xs[b], ys[b], px, py)
+        if side:
+            return side > 0
+        return (px - xs[a]) * (xs[b] - xs[a]) + (py - ys[a]) * (ys[b] - ys[a]) > 0 and (px - xs[b]) * (
+            xs[a] - xs[b]
+        ) + (py - ys[b]) * (ys[a] - ys[b]) > 0
+
+    def locate(start: int, px: float, py: float) -> int:
+        tid = start if start in tris else next(iter(tris))
+        for _ in range(len(tris) + 3):
+            a, b, c = tris[tid][:3]
+            if c == ghost:
+                if inside(tid, px, py):
+                    return tid
+                tid = edges[(b, a)]
+                continue
+            for u, v in ((a, b), (b, c), (c, a)):
+                if _orient(xs[u], ys[u], xs[v], ys[v], px, py) < 0:
+                    tid = edges[(v, u)]
+                    break
+            else:
+                return tid
+        return tid
+
+    last = add(a, b, c)
+    add(b, a, ghost)
+    add(c, b, ghost)
+    add(a, c, ghost)
+    seen = {(xs[a], ys[a]), (xs[b], ys[b]), (xs[c], ys[c])}
+    for p in order:
+        px, py = xs[p], ys[p]
+        if (px, py) in seen:
+            continue
+        seen.add((px, py))
+
+        start = locate(last, px, py)
+        if not inside(start, px, py):
+            # the walk ended on a degenerate configuration, fall back to a scan
+            start = next(tid for tid in tris if inside(tid, px, py))
+        bad = {start}
+        stack = [start]
+        while stack:
+            a, b, c = tris[stack.pop()][:3]
+            for u, v in ((a, b), (b, c), (c, a)):
+                other = edges.get((v, u))
+                if other is None or other in bad:
+                    continue
+                if inside(other, px, py):
+                    bad.add(other)
+                    stack.append(other)
+
+        boundary = []
+        for tid in bad:
+            a, b, c = tris[tid][:3]
+            for u, v in ((a, b), (b, c), (c, a)):
+                if edges.get((v, u)) not in bad:
+                    boundary.append((u, v))
+        for tid in bad:
+            a, b, c = tris.pop(tid)[:3]
+            for u, v in ((a, b), (b, c), (c, a)):
+                if edges.get((u, v)) == tid:
+                    del edges[(u, v)]
+        for u, v in boundary:
+            last = add(u, v, p)
+
+    return [(a, b, c) for a, b, c, *_ in tris.values() if c != ghost]
+
+
+def crossing_graph(cones: Sequence[Cone], triangles: Sequence[Triangle]):
+    """Midpoints of the blue-yellow triangle edges and which of them share a triangle.
+
+    Returns (nodes, neighbours): ``nodes`` maps an edge (i, j), i < j, to its midpoint and
+    ``neighbours`` maps it to the set of crossing edges of its adjacent triangles.
+    """
+    nodes: Dict[Tuple[int, int], Tuple[float, float]] = {}
+    neighbours: Dict[Tuple[int, int], set] = {}
+    for tri in triangles:
+        crossing = []
+        for u, v in ((tri[0], tri[1]), (tri[1], tri[2]), (tri[2], tri[0])):
+            cu, cv = cones[u], cones[v]
+            if cu.color == cv.color:
+                continue
+            width = math.hypot(cu.x - cv.x, cu.y - cv.y)
+            if not MIN_WIDTH <= width <= MAX_WIDTH:
+                continue
+            key = (u, v) if u < v else (v, u)
+            nodes[key] = ((cu.x + cv.x) / 2, (cu.y + cv.y) / 2)
+            crossing.append(key)
+        for key in crossing:
+            neighbours.setdefault(key, set()).update(k for k in crossing if k != key)
+    return nodes, neighbours
+
+
+def midline(
+    cones: Sequence[Cone],
+    car_pose: CarPose,
+    horizon: float = HORIZON,
+    beam_width: int = BEAM_WIDTH,
+) -> Optional[List[Tuple[float, float]]]:
+    """Waypoints of the best midline ahead of the car, or None without blue-yellow edges.
+
+    The cones are triangulated once and the midpoints of the blue-yellow edges become
+    candidate waypoints, linked when their edges share a triangle. A beam search from the
+    car then extends candidate midlines up to ``horizon`` meters, scoring progress minus
+    ``TURN_WEIGHT`` per squared radian of turning and rejecting turns over ``MAX_TURN``.
+    """
+    triangles = triangulate([c.x for c in cones], [c.y for c in cones])
+    nodes, neighbours = crossing_graph(cones, triangles)
+    if not nodes:
+        return None
+
+    cx, cy, yaw = car_pose.x, car_pose.y, car_pose.yaw
+
+    def extend(score, length, heading, x, y, key):
+        nx, ny = nodes[key]
+        seg = math.hypot(nx - x, ny - y)
+        if seg == 0:
+            return None
+        new_heading = math.atan2(ny - y, nx - x)
+        turn = abs(math.atan2(math.sin(new_heading - heading), math.cos(new_heading - heading)))
+        if turn > MAX_TURN:
+            return None
+        return score + seg - TURN_WEIGHT * turn * turn, length + seg, new_heading
+
+    # (score, length, heading, path of node keys)
+    beam = []
+    for key in nodes:
+        step = extend(0.0, 0.0, yaw, cx, cy, key)
+        if step is not None and step[1] <= horizon / 2:
+            beam.append((step[0], step[1], step[2], (key,)))
+    if not beam:
+        return None
+    # start from the crossings the car reaches first and straightest
+    beam.sort(key=lambda b: 2 * b[1] - b[0])
+    beam = beam[:beam_width]
+
+    best = max(beam, key=lambda b: b[0])
+    while beam:
+        grown = []
+        for score, length, heading, path in beam:
+            if length >= horizon:
+                continue
+            x, y = nodes[path[-1]]
+            for key in neighbours.get(path[-1], ()):
+                if key in path:
+                    continue
+                step = extend(score, length, heading, x, y, key)
+                if step is not None:
+                    grown.append((step[0], step[1], step[2], path + (key,)))
+        grown.sort(key=lambda b: -b[0])
+        beam = grown[:beam_width]
+        if beam and beam[0][0] > best[0]:
+            best = beam[0]
+
+    return [nodes[key] for key in best[3]]
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+STAGES = ("cull", "prediction", "midline", "filter", "sort", "match", "midpoints", "correction", "sampling")
+
+TraceSink = Callable[[str, Dict[str, Any]], None]
+
+
+class _StageTimer:
+    __slots__ = ("_owner", "_name", "_start")
+
+    def __init__(self, owner: Instrumentation, name: str):
+        self._owner = owner
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc) -> bool:
+        self._owner.record(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Instrumentation:
+    """Per-stage timers, counters and an optional trace sink for the planner.
+
+    Pass an instance to ``PathPlanning`` (or ``StreamingPlanner``) and it accumulates the
+    wall-clock time of every stage in :data:`STAGES` over all calls, plus counters such as
+    ``correction_passes`` and ``points_inserted``. When ``sink`` is set it is called as
+    ``sink(event, fields)`` for every finished stage and for the planner's trace events
+    (``cones``, ``main_points`` and ``path``).
+    """
+
+    enabled = True
+
+    def __init__(self, sink: Optional[TraceSink] = None):
+        self.sink = sink
+        self.timings: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+
+    def stage(self, name: str) -> _StageTimer:
+        """Context manager timing one run of stage ``name``."""
+        return _StageTimer(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.sink is not None:
+            self.sink("stage", {"name": name, "seconds": seconds})
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def trace(self, event: str, **fields: Any) -> None:
+        if self.sink is not None:
+            self.sink(event, fields)
+
+    def reset(self) -> None:
+        self.timings.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+    def summary(self) -> Dict[str, Any]:
+        """Total and mean milliseconds per stage, in pipeline order, plus the counters."""
+        order = [s for s in STAGES if s in self.timings] + [s for s in self.timings if s not in STAGES]
+        return {
+            "stages": {
+                name: {
+                    "calls": self.calls[name],
+                    "total_ms": self.timings[name] * 1e3,
+                    "mean_ms": self.timings[name] * 1e3 / self.calls[name],
+                }
+                for name in order
+            },
+            "counters": dict(self.counters),
+        }
+
+
+class NullInstrumentation(Instrumentation):
+    """Instrumentation that records nothing; the default of every planner."""
+
+    enabled = False
+
+    def stage(self, name: str) -> _NullStage:
+        return _NULL_STAGE
+
+    def record(self, name: str, seconds: float) -> None:
+        pass
+
+    def count(self, name: str, n: int = 1) -> None:
+        pass
+
+    def trace(self, event: str, **fields: Any) -> None:
+        pass
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from src.spatial_index import SCAN_LIMIT, GridIndex
+
+
+MATCHERS = ("greedy", "banded", "hungarian")
+
+
+class ConeMatching(NamedTuple):
+    """Pairing of blue (left) and yellow (right) cones, expressed as indices.
+
+    ``blue[k]`` is paired with ``yellow[k]``; the remaining lists hold the unpaired cones
+    in their input order.
+    """
+
+    blue: List[int]
+    yellow: List[int]
+    remaining_blue: List[int]
+    remaining_yellow: List[int]
+
+
+def _coords(points) -> Tuple[List[float], List[float]]:
+    """Return parallel x/y lists for ``Cone``-like objects or an (N, 2+) array."""
+    if hasattr(points, "shape"):
+        return points[:, 0].tolist(), points[:, 1].tolist()
+    return [p.x for p in points], [p.y for p in points]
+
+
+def _remaining(n: int, taken: Sequence[int]) -> List[int]:
+    taken_set = set(taken)
+    return [i for i in range(n) if i not in taken_set]
+
+
+def match_greedy(blue, yellow) -> ConeMatching:
+    """Pair every blue cone with its nearest yellow cone, keeping the closest blue per yellow.
+
+    This is the planner's original matching: pairs come out in the order in which their
+    yellow cone was first claimed.
+    """
+    bx, by = _coords(blue)
+    yx, yy = _coords(yellow)
+    index = GridIndex.from_coords(yx, yy)
+    best: Dict[int, Tuple[int, float]] = {}
+    for i in range(len(bx)):
+        j = index.nearest(bx[i], by[i])
+        d = math.hypot(bx[i] - yx[j], by[i] - yy[j])
+        if j not in best or d < best[j][1]:
+            best[j] = (i, d)
+    matched_blue = [i for i, _ in best.values()]
+    matched_yellow = list(best)
+    return ConeMatching(
+        matched_blue, matched_yellow, _remaining(len(bx), matched_blue), _remaining(len(yx), matched_yellow)
+    )
+
+
+class MatchCache:
+    """Nearest yellow cone of every blue cone, carried over to the next frame's greedy matching.
+
+    :meth:`match` returns exactly what ``match_greedy`` would. A blue cone's nearest yellow
+    cone is kept when it is still there, it had no tie, and no newly added yellow cone is
+    as close; removing other yellow cones cannot change it. Everything else, and any frame
+    with at most ``SCAN_LIMIT`` yellow cones, is queried afresh. Cones must be hashable, like ``Cone``.
+    """
+
+    def __init__(self):
+        self._nearest: Dict = {}  # blue cone -> (yellow cone, distance) of the last frame, without ties
+        self._yellow: frozenset = frozenset()
+        self.reused = 0  # blue cones of the last match whose nearest yellow cone was carried over
+
+    def reset(self) -> None:
+        self._nearest = {}
+        self._yellow = frozenset()
+        self.reused = 0
+
+    def match(self, blue: Sequence, yellow: Sequence) -> ConeMatching:
+        """Same as ``match_cones(blue, yellow, "greedy")``."""
+        self.reused = 0
+        position = {c: j for j, c in enumerate(yellow)}
+        # a handful of yellow cones is scanned faster than the previous frame can be checked
+        if len(yellow) <= SCAN_LIMIT or not blue or len(position) != len(yellow):
+            self.reset()
+            return match_cones(blue, yellow, "greedy")
+        added = [c for c in yellow if c not in self._yellow]
+        hypot = math.hypot
+        index = None
+        nearest: Dict = {}
+        best: Dict[int, Tuple[int, float]] = {}
+        for i, b in enumerate(blue):
+            entry = self._nearest.get(b)
+            if entry is not None and entry[0] in position and all(
+                hypot(a.x - b.x, a.y - b.y) > entry[1] for a in added
+            ):
+                self.reused += 1
+                nearest[b] = entry
+            else:
+                if index is None:
+                    index = GridIndex(yellow)
+                j = index.nearest(b.x, b.y)
+                entry = (yellow[j], hypot(b.x - yellow[j].x, b.y - yellow[j].y))
+                # a tie is broken by position, which can change with the next frame's order
+                if len(index.query_radius(b.x, b.y, entry[1])) == 1:
+                    nearest[b] = entry
+            j = position[entry[0]]
+            d = entry[1]
+            if j not in best or d < best[j][1]:
+                best[j] = (i, d)
+        self._nearest = nearest
+        self._yellow = frozenset(position)
+        matched_blue = [i for i, _ in best.values()]
+        matched_yellow = list(best)
+        return ConeMatching(
+            matched_blue, matched_yellow, _remaining(len(blue), matched_blue), _remaining(len(yellow), matched_yellow)
+        )
+
+
+def match_banded(blue, yellow, band: int = 3, gap_cost: float = 3.0) -> ConeMatching:
+    """Align both chain-sorted boundaries with a monotone, banded assignment.
+
+    Blue cone ``i`` may only pair with yellow cones near position ``i * len(yellow) /
+    len(blue)``, within ``band`` plus that ratio rounded up, so the cost is O(N * band) for
+    boundaries of similar length. Leaving a cone unpaired costs ``gap_cost`` meters; pairs
+    are returned in chain order.
+    """
+    bx, by = _coords(blue)
+    yx, yy = _coords(yellow)
+    n, m = len(bx), len(yx)
+    ratio = m / n
+    width = band + int(math.ceil(ratio))
+
+    def columns(i: int) -> range:
+        centre = int(round(i * ratio))
+        return range(max(0, centre - width), min(m, centre + width) + 1)
+
+    # rows[i][j] = (cost, move) with move 0 = pair, 1 = skip blue, 2 = skip yellow
+    rows: List[Dict[int, Tuple[float, int]]] = [{j: (j * gap_cost, 2) for j in columns(0)}]
+    for i in range(1, n + 1):
+        prev = rows[-1]
+        row: Dict[int, Tuple[float, int]] = {}
+        for j in columns(i):
+            best = (math.inf, 1)
+            if j in prev:
+                best = (prev[j][0] + gap_cost, 1)
+            if j > 0:
+                if j - 1 in prev:
+                    cost = prev[j - 1][0] + math.hypot(bx[i - 1] - yx[j - 1], by[i - 1] - yy[j - 1])
+                    if cost < best[0]:
+                        best = (cost, 0)
+                if j - 1 in row:
+                    cost = row[j - 1][0] + gap_cost
+                    if cost < best[0]:
+                        best = (cost, 2)
+            elif i * gap_cost < best[0]:
+                best = (i * gap_cost, 1)
+            row[j] = best
+        rows.append(row)
+
+    matched_blue: List[int] = []
+    matched_yellow: List[int] = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        move = rows[i][j][1]
+        if move == 0:
+            matched_blue.append(i - 1)
+            matched_yellow.append(j - 1)
+            i, j = i - 1, j - 1
+        elif move == 1:
+            i -= 1
+        else:
+            j -= 1
+    matched_blue.reverse()
+    matched_yellow.reverse()
+    return ConeMatching(matched_blue, matched_yellow, _remaining(n, matched_blue), _remaining(m, matched_yellow))
+
+
+def hungarian(cost) -> List[Tuple[int, int]]:
+    """Solve the rectangular assignment problem on a cost matrix (requires NumPy).
+
+    Shortest augmenting path with potentials, one row at a time; the column updates of
+    each step run as array operations. Rows start on their cheapest column, so only the
+    rows competing for one are searched: with cones that is a few per frame. Returns
+    (row, column) pairs sorted by row.
+    """
+    import numpy as np
+
+    cost = np.asarray(cost, dtype=float)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=np.intp)  # owner[j] = 1-based row assigned to column j
+    way = np.zeros(m + 1, dtype=np.intp)
+    # with u = row minimum and v = 0 every row may take its cheapest column outright; only
+    # rows that lose their column to an earlier row need the augmenting search below
+    nearest = cost.argmin(axis=1)
+    u[1:] = cost[np.arange(n), nearest]
+    claimed, first = np.unique(nearest, return_index=True)
+    owner[claimed + 1] = first + 1
+    assigned = np.zeros(n + 1, dtype=bool)
+    assigned[first + 1] = True
+    for i in np.flatnonzero(~assigned[1:]) + 1:
+        owner[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            used_cols = np.flatnonzero(used)
+            u[owner[used_cols]] += delta
+            v[used_cols] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+
+    pairs = [(int(owner[j]) - 1, j - 1) for j in range(1, m + 1) if owner[j]]
+    if transposed:
+        pairs = [(c, r) for r, c in pairs]
+    return sorted(pairs)
+
+
+def match_hungarian(blue, yellow) -> ConeMatching:
+    """Globally optimal pairing minimising the summed blue-yellow distance (requires NumPy)."""
+    import numpy as np
+
+    bx, by = _coords(blue)
+    yx, yy = _coords(yellow)
+    cost = np.hypot(np.subtract.outer(bx, yx), np.subtract.outer(by, yy))
+    pairs = hungarian(cost)
+    matched_blue = [i for i, _ in pairs]
+    matched_yellow = [j for _, j in pairs]
+    return ConeMatching(
+        matched_blue, matched_yellow, _remaining(len(bx), matched_blue), _remaining(len(yx), matched_yellow)
+    )
+
+
+def match_cones(blue, yellow, method: str = "greedy") -> ConeMatching:
+    """Pair chain-sorted blue and yellow cones with the selected ``method``.
+
+    ``blue``/``yellow`` are ``Cone``-like objects or (N, 2) arrays. If either side is empty
+    nothing can be paired and every cone is reported as both matched and remaining, which
+    is what the planner's one-sided branches expect. When the banded assignment finds no
+    pair worth making, the greedy matching is used so the planner always gets a midpoint.
+    """
+    if method not in MATCHERS:
+        valid = ", ".join(MATCHERS)
+        raise ValueError(f"Unknown matcher '{method}'. Valid options: {valid}")
+    nb, ny = len(blue), len(yellow)
+    if not nb or not ny:
+        return ConeMatching(list(range(nb)), list(range(ny)), list(range(nb)), list(range(ny)))
+    if method == "banded":
+        matching = match_banded(blue, yellow)
+        if matching.blue:
+            return matching
+    if method == "hungarian":
+        return match_hungarian(blue, yellow)
+    return match_greedy(blue, yellow)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from src.matching import MatchCache
+from src.spatial_index import ChainCache
+
+
+class PlanMemory:
+    """What one frame's planning leaves for the next: sorted boundaries and greedy pairings.
+
+    Share one instance between the ``PathPlanning`` objects of consecutive frames (see
+    ``src.streaming``). Each boundary's chain sort then reuses the previous chain up to the
+    first step that may have changed, and the greedy matching reuses every blue cone's
+    nearest yellow cone that is provably still the nearest. Paths are identical to
+    planning without memory.
+    """
+
+    def __init__(self):
+        self.blue = ChainCache()
+        self.yellow = ChainCache()
+        self.pairs = MatchCache()
+
+    def reset(self) -> None:
+        self.blue.reset()
+        self.yellow.reset()
+        self.pairs.reset()
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import math
+from array import array
+from bisect import bisect_right
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Iterable, Iterator, List, Sequence, Tuple
 
 
 @dataclass(frozen=True)
@@ -28,3 +31,239 @@ class CarPose:
 
 # Public type alias for a path: list of 2D points in world frame
 Path2D = List[Tuple[float, float]]
+
+# One planning input: the car pose and the cones seen from it
+Frame = Tuple[CarPose, Sequence[Cone]]
+
+
+class ConeArray:
+    """Struct-of-arrays cone store: contiguous float64 x/y and uint8 color.
+
+    The columns are memoryviews, so any contiguous buffer of the right type (``array``,
+    NumPy arrays, ``bytes``) is wrapped without copying; other inputs are converted once.
+    Colour-filtered subsets from ``by_color`` are built once and cached. Iterating or
+    indexing yields ``Cone`` objects, and ``to_cones``/``from_cones`` round-trip losslessly.
+    """
+
+    __slots__ = ("x", "y", "color", "_by_color")
+
+    def __init__(self, x, y, color):
+        self.x = _column(x, "d")
+        self.y = _column(y, "d")
+        self.color = _column(color, "B")
+        if not len(self.x) == len(self.y) == len(self.color):
+            raise ValueError(
+                f"x, y and color must have the same length, got {len(self.x)}, {len(self.y)}, {len(self.color)}"
+            )
+        self._by_color = {}
+
+    @classmethod
+    def from_cones(cls, cones: Iterable[Cone]) -> ConeArray:
+        cones = list(cones)
+        return cls(
+            array("d", [c.x for c in cones]),
+            array("d", [c.y for c in cones]),
+            array("B", [c.color for c in cones]),
+        )
+
+    def to_cones(self) -> List[Cone]:
+        return [Cone(x, y, c) for x, y, c in zip(self.x, self.y, self.color)]
+
+    def to_numpy(self):
+        """Return (x, y, color) NumPy arrays sharing this store's memory."""
+        import numpy as np
+
+        return (
+            np.frombuffer(self.x, dtype=np.float64),
+            np.frombuffer(self.y, dtype=np.float64),
+            np.frombuffer(self.color, dtype=np.uint8),
+        )
+
+    def by_color(self, color: int) -> ConeArray:
+        """The cones of one colour (0 = yellow, 1 = blue), in their original order."""
+        subset = self._by_color.get(color)
+        if subset is None:
+            keep = [i for i, c in enumerate(self.color) if c == color]
+            subset = ConeArray(
+                array("d", [self.x[i] for i in keep]),
+                array("d", [self.y[i] for i in keep]),
+                array("B", [color]) * len(keep),
+            )
+            self._by_color[color] = subset
+        return subset
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __getitem__(self, i: int) -> Cone:
+        return Cone(self.x[i], self.y[i], self.color[i])
+
+    def __iter__(self) -> Iterator[Cone]:
+        return map(Cone, self.x, self.y, self.color)
+
+    def __repr__(self) -> str:
+        return f"ConeArray({len(self)} cones)"
+
+
+def _column(data, fmt: str) -> memoryview:
+    """Wrap ``data`` as a flat memoryview of ``fmt``, copying only if the layout differs."""
+    try:
+        view = memoryview(data)
+    except TypeError:
+        return memoryview(array(fmt, data))
+    if view.format == fmt and view.ndim == 1 and view.c_contiguous:
+        return view
+    return memoryview(array(fmt, view.tolist()))
+
+
+class PathArray:
+    """Array-backed path of (x, y) points with arc length, heading and curvature.
+
+    Columns are float64 memoryviews like ``ConeArray``'s. ``s[i]`` is the distance along
+    the path from the first point, ``heading[i]`` the direction from point i to point i + 1
+    (the last point and repeated points keep the previous one) and ``curvature[i]`` the
+    heading change per meter around point i. Iterating or indexing still yields (x, y) tuples, so a
+    ``PathArray`` can be used wherever a ``Path2D`` list is expected.
+    """
+
+    __slots__ = ("x", "y", "s", "heading", "curvature")
+
+    def __init__(self, x, y, s=None, heading=None, curvature=None):
+        self.x = _column(x, "d")
+        self.y = _column(y, "d")
+        if len(self.x) != len(self.y):
+            raise ValueError(f"x and y must have the same length, got {len(self.x)}, {len(self.y)}")
+        n = len(self.x)
+        self.s = _column(s, "d") if s is not None else memoryview(self._arc_length())
+        self.heading = _column(heading, "d") if heading is not None else memoryview(self._headings())
+        self.curvature = _column(curvature, "d") if curvature is not None else memoryview(self._curvatures())
+        if not len(self.s) == len(self.heading) == len(self.curvature) == n:
+            raise ValueError("s, heading and curvature must have one value per point")
+
+    @classmethod
+    def from_points(cls, points: Iterable[Tuple[float, float]]) -> PathArray:
+        xs = array("d")
+        ys = array("d")
+        for x, y in points:
+            xs.append(x)
+            ys.append(y)
+        return cls(xs, ys)
+
+    def _arc_length(self) -> array:
+        x, y = self.x, self.y
+        s = array("d", bytes(8 * len(x)))
+        total = 0.0
+        for i in range(1, len(x)):
+            total += math.hypot(x[i] - x[i - 1], y[i] - y[i - 1])
+            s[i] = total
+        return s
+
+    def _headings(self) -> array:
+        x, y = self.x, self.y
+        n = len(x)
+        heading = array("d", bytes(8 * n))
+        # a repeated point has no direction of its own: it keeps the previous heading, and
+        # repeats at the start take the first real one, so no turn shows up in the curvature
+        known = False
+        for i in range(n - 1):
+            dx = x[i + 1] - x[i]
+            dy = y[i + 1] - y[i]
+            if dx or dy:
+                heading[i] = math.atan2(dy, dx)
+                if not known:
+                    for k in range(i):
+                        heading[k] = heading[i]
+                    known = True
+            elif known:
+                heading[i] = heading[i - 1]
+        if n > 1:
+            heading[n - 1] = heading[n - 2]
+        return heading
+
+    def _curvatures(self) -> array:
+        n = len(self.x)
+        heading, s = self.heading, self.s
+        curvature = array("d", bytes(8 * n))
+        for i in range(1, n - 1):
+            ds = (s[i + 1] - s[i - 1]) / 2
+            if ds > 0:
+                turn = heading[i] - heading[i - 1]
+                curvature[i] = math.atan2(math.sin(turn), math.cos(turn)) / ds
+        if n > 2:
+            curvature[0] = curvature[1]
+            curvature[n - 1] = curvature[n - 2]
+        return curvature
+
+    @property
+    def length(self) -> float:
+        return self.s[-1] if len(self.s) else 0.0
+
+    def index_at(self, s: float) -> int:
+        """Index of the segment containing arc length ``s`` (clamped to the path), O(log n)."""
+        return max(0, min(bisect_right(self.s, s) - 1, len(self.s) - 2))
+
+    def point_at(self, s: float) -> Tuple[float, float]:
+        """Point at arc length ``s`` by linear interpolation, clamped to the path ends."""
+        if not len(self.x):
+            raise ValueError("an empty path has no points")
+        if len(self.x) == 1:
+            return self.x[0], self.y[0]
+        i = self.index_at(s)
+        seg = self.s[i + 1] - self.s[i]
+        t = min(max((s - self.s[i]) / seg, 0.0), 1.0) if seg > 0 else 0.0
+        return self.x[i] + t * (self.x[i + 1] - self.x[i]), self.y[i] + t * (self.y[i + 1] - self.y[i])
+
+    def heading_at(self, s: float) -> float:
+        if not len(self.heading):
+            raise ValueError("an empty path has no heading")
+        return self.heading[self.index_at(s)] if len(self.heading) > 1 else self.heading[0]
+
+    def resample(self, step: float) -> PathArray:
+        """Points every ``step`` meters from the start, plus the end point, in one pass."""
+        if step <= 0:
+            raise ValueError(f"step must be positive, got {step}")
+        if len(self.x) < 2:
+            return PathArray(self.x, self.y)
+        x, y, s = self.x, self.y, self.s
+        length = self.length
+        count = int(length / step) + 1
+        xs = array("d", bytes(8 * count))
+        ys = array("d", bytes(8 * count))
+        i = 0
+        for k in range(count):
+            target = k * step
+            while i < len(s) - 2 and s[i + 1] < target:
+                i += 1
+            seg = s[i + 1] - s[i]
+            t = (target - s[i]) / seg if seg > 0 else 0.0
+            xs[k] = x[i] + t * (x[i + 1] - x[i])
+            ys[k] = y[i] + t * (y[i + 1] - y[i])
+        if length - (count - 1) * step > 1e-9:
+            xs.append(x[-1])
+            ys.append(y[-1])
+        return PathArray(xs, ys)
+
+    def to_list(self) -> Path2D:
+        return list(zip(self.x, self.y))
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(zip(self.x[i], self.y[i]))
+        return self.x[i], self.y[i]
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        return zip(self.x, self.y)
+
+    def __eq__(self, other) -> bool:
+        try:
+            return self.to_list() == [tuple(p) for p in other]
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"PathArray({len(self)} points, {self.length:.2f} m)"
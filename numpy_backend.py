@@ -0,0 +1,480 @@
+from __future__ import annotations
+
+import math
+from typing import List, Optional
+
+import numpy as np
+
+from src.correction import EXTENSION_HORIZON, MAX_PASSES, OFFSET
+from src.culling import in_front
+from src.instrumentation import NULL_INSTRUMENTATION, Instrumentation
+from src.matching import match_cones
+from src.models import ConeArray, PathArray
+from src.sampling import MAX_DIST, STEP
+from src.smoothing import spline_arrays
+
+
+DENSE_LIMIT = 128  # up to this many points a chain walk or nearest search compares all pairs
+NEIGHBOUR_RADIUS = 3.0  # typical point spacings searched on the grid around each point
+SPACING_SAMPLES = 64  # points whose nearest neighbour estimates the typical spacing
+
+
+def _sort_by_chain_front(points: np.ndarray, cx: float, cy: float, heading: float, front: bool) -> np.ndarray:
+    """Return the indices of ``points`` ordered as a nearest-neighbour chain from (cx, cy).
+
+    When ``front`` is set, only the points in front of the car (see
+    ``src.culling.in_front``) are chained, falling back to all points if none are.
+    """
+    n = len(points)
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+
+    xs = points[:, 0]
+    ys = points[:, 1]
+    candidates = np.arange(n)
+    if front:
+        ahead = in_front(xs - cx, ys - cy, math.cos(heading), math.sin(heading))
+        if ahead.any():
+            candidates = candidates[ahead]
+
+    return candidates[_chain_order(xs[candidates], ys[candidates], cx, cy)]
+
+
+def _spacing(xs: np.ndarray, ys: np.ndarray) -> float:
+    """Median nearest-neighbour distance of an evenly strided sample of the points."""
+    n = len(xs)
+    picked = np.arange(0, n, max(n // SPACING_SAMPLES, 1))
+    d = np.hypot(xs[picked, None] - xs[None, :], ys[picked, None] - ys[None, :])
+    d[np.arange(len(picked)), picked] = np.inf
+    return float(np.median(d.min(axis=1)))
+
+
+def _close_pairs(points: np.ndarray, targets: np.ndarray, radius: float):
+    """Every (point, target) pair closer than ``radius``, as index and distance arrays.
+
+    The targets are hashed into ``radius``-sized grid cells and each point is only paired
+    with the targets of the 3x3 cells around it, so the work follows the local density
+    instead of points times targets.
+    """
+    origin = np.minimum(points.min(axis=0), targets.min(axis=0))
+    tx, ty = np.floor((targets[:, :2] - origin) / radius).astype(np.int64).T
+    px, py = np.floor((points[:, :2] - origin) / radius).astype(np.int64).T
+    rows = int(max(ty.max(), py.max())) + 3
+    # one padding cell on every side, so neighbouring keys never wrap into another column
+    target_key = (tx + 1) * rows + (ty + 1)
+    point_key = (px + 1) * rows + (py + 1)
+    by_key = np.argsort(target_key, kind="stable")
+    sorted_key = target_key[by_key]
+    n = len(points)
+    first, second = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            key = point_key + (dx * rows + dy)
+            start = np.searchsorted(sorted_key, key, side="left")
+            width = np.searchsorted(sorted_key, key, side="right") - start
+            first.append(np.repeat(np.arange(n), width))
+            second.append(by_key[np.arange(int(width.sum())) - np.repeat(np.cumsum(width) - width - start, width)])
+    i = np.concatenate(first)
+    j = np.concatenate(second)
+    d = np.hypot(points[i, 0] - targets[j, 0], points[i, 1] - targets[j, 1])
+    close = d < radius
+    return i[close], j[close], d[close]
+
+
+def _neighbours(xy: np.ndarray, radius: float):
+    """For every point, the other points closer than ``radius``, nearest first (ties by index).
+
+    Returns the concatenated lists and the offset of every point's list.
+    """
+    i, j, d = _close_pairs(xy, xy, radius)
+    other = i != j
+    i, j, d = i[other], j[other], d[other]
+    order = np.lexsort((j, d, i))
+    return j[order].tolist(), np.searchsorted(i[order], np.arange(len(xy) + 1)).tolist()
+
+
+def _chain_order(xs: np.ndarray, ys: np.ndarray, cx: float, cy: float) -> np.ndarray:
+    """Indices of the points in the order ``src.spatial_index.chain_sort`` would visit them.
+
+    Up to ``DENSE_LIMIT`` points every step compares all of them. Otherwise, since the
+    walk itself is sequential, its neighbour lists are prepared in one batch: the nearest
+    unvisited point is the first unvisited entry of the current point's list, exact since
+    the list holds every point closer than its radius. Only for the first step, and when
+    the whole list has been visited, are the unvisited points searched directly.
+    """
+    n = len(xs)
+    if n <= DENSE_LIMIT:
+        visited = np.zeros(n, dtype=bool)
+        order = np.empty(n, dtype=np.intp)
+        for k in range(n):
+            d = np.hypot(xs - cx, ys - cy)
+            d[visited] = np.inf
+            nxt = int(np.argmin(d))
+            visited[nxt] = True
+            order[k] = nxt
+            cx, cy = xs[nxt], ys[nxt]
+        return order
+    spacing = _spacing(xs, ys)
+    if spacing > 0:
+        nbrs, offsets = _neighbours(np.column_stack((xs, ys)), NEIGHBOUR_RADIUS * spacing)
+    else:
+        nbrs, offsets = [], [0] * (n + 1)
+    xl = xs.tolist()
+    yl = ys.tolist()
+    visited = bytearray(n)
+    unvisited = np.arange(n)
+    order = []
+    x, y = cx, cy
+    current = -1
+    for _ in range(n):
+        nxt = -1
+        if current >= 0:
+            for j in nbrs[offsets[current] : offsets[current + 1]]:
+                if not visited[j]:
+                    nxt = j
+                    break
+        if nxt < 0:
+            unvisited = unvisited[np.frombuffer(visited, dtype=bool)[unvisited] == 0]
+            nxt = int(unvisited[np.argmin(np.hypot(xs[unvisited] - x, ys[unvisited] - y))])
+        visited[nxt] = 1
+        order.append(nxt)
+        current = nxt
+        x, y = xl[nxt], yl[nxt]
+    return np.asarray(order, dtype=np.intp)
+
+
+def _match_cones(blue: np.ndarray, yellow: np.ndarray):
+    """Vectorised counterpart of the greedy nearest-yellow matching.
+
+    Returns (matched_blue, matched_yellow, remaining_blue, remaining_yellow) as index arrays
+    into ``blue`` and ``yellow``.
+    """
+    nb, ny = len(blue), len(yellow)
+    if nb == 0 or ny == 0:
+        all_b = np.arange(nb)
+        all_y = np.arange(ny)
+        return all_b, all_y, all_b, all_y
+
+    nearest, nearest_d = _nearest(blue, yellow)
+
+    # keep the closest blue for every claimed yellow (first blue wins ties), ordered by the
+    # first blue that claimed each yellow
+    claimed, first_claim = np.unique(nearest, return_index=True)
+    order = np.lexsort((np.arange(nb), nearest_d, nearest))
+    best_blue = order[np.searchsorted(nearest[order], claimed)]
+    by_claim = np.argsort(first_claim, kind="stable")
+    matched_blue = best_blue[by_claim]
+    matched_yellow = claimed[by_claim]
+
+    blue_mask = np.ones(nb, dtype=bool)
+    blue_mask[matched_blue] = False
+    yellow_mask = np.ones(ny, dtype=bool)
+    yellow_mask[matched_yellow] = False
+    return matched_blue, matched_yellow, np.flatnonzero(blue_mask), np.flatnonzero(yellow_mask)
+
+
+def _nearest_all(points: np.ndarray, targets: np.ndarray):
+    """:func:`_nearest` comparing every point against every target."""
+    d = np.hypot(points[:, None, 0] - targets[None, :, 0], points[:, None, 1] - targets[None, :, 1])
+    nearest = np.argmin(d, axis=1)
+    return nearest, d[np.arange(len(points)), nearest]
+
+
+def _nearest(points: np.ndarray, targets: np.ndarray):
+    """Index of and distance to the nearest target of every point, ties to the lowest index.
+
+    Small inputs are compared all against all. Otherwise the pairs closer than a few
+    target spacings are found on a grid, and only the points left without one are compared
+    against every target.
+    """
+    if len(points) * len(targets) <= DENSE_LIMIT * DENSE_LIMIT:
+        return _nearest_all(points, targets)
+    spacing = _spacing(targets[:, 0], targets[:, 1])
+    if not 0 < spacing < math.inf:
+        return _nearest_all(points, targets)
+    i, j, d = _close_pairs(points, targets, NEIGHBOUR_RADIUS * spacing)
+    order = np.lexsort((j, d, i))
+    found, first = np.unique(i[order], return_index=True)
+    nearest = np.full(len(points), -1, dtype=np.intp)
+    nearest_d = np.empty(len(points))
+    nearest[found] = j[order][first]
+    nearest_d[found] = d[order][first]
+    lost = np.flatnonzero(nearest < 0)
+    if len(lost):
+        nearest[lost], nearest_d[lost] = _nearest_all(points[lost], targets)
+    return nearest, nearest_d
+
+
+def _chain_yaws(pts: np.ndarray, final_yaw: float) -> np.ndarray:
+    """Yaw of each point towards its successor, the last one set to ``final_yaw``."""
+    yaws = np.empty(len(pts))
+    yaws[:-1] = np.arctan2(np.diff(pts[:, 1]), np.diff(pts[:, 0]))
+    yaws[-1] = final_yaw
+    return yaws
+
+
+def _extension_point(pts: np.ndarray):
+    """Return the (x, y, yaw) row extending the chain straight ahead to ``EXTENSION_HORIZON``."""
+    total_distance = float(np.hypot(np.diff(pts[:, 0]), np.diff(pts[:, 1])).sum())
+    remaining_distance = EXTENSION_HORIZON - total_distance
+    if remaining_distance <= 0:
+        return None
+    x, y, yaw = pts[-1]
+    return [x + remaining_distance * math.cos(yaw), y + remaining_distance * math.sin(yaw), yaw]
+
+
+def _budget() -> int:
+    return int(MAX_DIST / STEP + 1e-9)
+
+
+def _sample_straight(x: float, y: float, yaw: float) -> np.ndarray:
+    k = np.arange(1, _budget() + 1)
+    return np.column_stack((x + k * (math.cos(yaw) * STEP), y + k * (math.sin(yaw) * STEP)))
+
+
+def _reorder(pts: np.ndarray, cx: float, cy: float) -> np.ndarray:
+    """Chain-sort (x, y, yaw) rows from (cx, cy) and point every yaw at the next row."""
+    final_yaw = pts[-1, 2]
+    pts = pts[_chain_order(pts[:, 0], pts[:, 1], cx, cy)]
+    pts[:, 2] = _chain_yaws(pts, final_yaw)
+    return pts
+
+
+def _side_fixes(chain: np.ndarray, cones: np.ndarray, by_x: np.ndarray, sign: float):
+    """Find every cone on the wrong side of the chain.
+
+    ``sign`` is -1 for blue (must be left) and +1 for yellow (must be right), ``by_x`` the
+    cone indices sorted by x. Each segment is only tested against the cones in its x range,
+    found by binary search, so the work follows the cones near the chain instead of
+    segments times cones. Each cone is fixed on the first segment it violates. Returns
+    (segment, along, x, y) arrays.
+    """
+    p1 = chain[:-1, :2]
+    p2 = chain[1:, :2]
+    lo = np.minimum(p1, p2)
+    hi = np.maximum(p1, p2)
+    sorted_x = cones[by_x, 0]
+    start = np.searchsorted(sorted_x, lo[:, 0], side="left")
+    stop = np.searchsorted(sorted_x, hi[:, 0], side="right")
+    width = np.maximum(stop - start, 0)
+    # one (segment, cone) pair per cone in a segment's x range
+    seg = np.repeat(np.arange(len(p1)), width)
+    cone = by_x[np.arange(int(width.sum())) - np.repeat(np.cumsum(width) - width - start, width)]
+
+    cy = cones[cone, 1]
+    v = p2 - p1
+    bx = cones[cone, 0] - p1[seg, 0]
+    by = cy - p1[seg, 1]
+    cross = v[seg, 0] * by - v[seg, 1] * bx
+    wrong = (lo[seg, 1] <= cy) & (cy <= hi[seg, 1]) & (sign * cross >= 0)
+    seg, cone, bx, by = seg[wrong], cone[wrong], bx[wrong], by[wrong]
+    # the first violated segment of every cone, cones in ascending order
+    order = np.lexsort((seg, cone))
+    first = order[np.unique(cone[order], return_index=True)[1]]
+    seg, cone_idx, bx, by = seg[first], cone[first], bx[first], by[first]
+
+    angle = np.arctan2(by, bx) + sign * math.pi / 2
+    new_x = cones[cone_idx, 0] + OFFSET * np.cos(angle)
+    new_y = cones[cone_idx, 1] + OFFSET * np.sin(angle)
+    vx = v[seg, 0]
+    vy = v[seg, 1]
+    seg_len2 = vx * vx + vy * vy
+    along = np.divide(bx * vx + by * vy, seg_len2, out=np.zeros(len(seg)), where=seg_len2 != 0)
+    return seg, along, new_x, new_y
+
+
+def _correct_sides(pts: np.ndarray, blue: np.ndarray, yellow: np.ndarray, cx: float, cy: float):
+    """Batched counterpart of ``src.correction.correct_sides`` on (x, y, yaw) rows.
+
+    Returns the corrected rows, the number of passes and the number of inserted points.
+    """
+    # the cones are sorted by x once, every pass then looks up each segment's x range
+    sides = [(cones, np.argsort(cones[:, 0], kind="stable"), sign) for cones, sign in ((blue, -1.0), (yellow, 1.0))]
+    sides = [side for side in sides if len(side[0])]
+    insertions = 0
+    passes = 0
+    while passes < MAX_PASSES:
+        passes += 1
+        ext = _extension_point(pts)
+        chain = np.vstack((pts, ext)) if ext is not None else pts
+
+        found = [_side_fixes(chain, cones, by_x, sign) for cones, by_x, sign in sides]
+        seg, along, new_x, new_y = (np.concatenate(parts) for parts in zip(*found))
+        if not len(seg):
+            break
+        insertions += len(seg)
+
+        order = np.lexsort((new_y, new_x, along, seg))
+        seg, new_x, new_y = seg[order], new_x[order], new_y[order]
+        # the inserted points follow their segment's start point, the end point follows them
+        rows = np.column_stack((new_x, new_y, np.zeros(len(seg))))
+        rebuilt = np.insert(chain, seg + 1, rows, axis=0)
+        if ext is not None:
+            rebuilt = rebuilt[:-1]
+            last_seg = seg == len(chain) - 2
+            if last_seg.any():
+                lx, ly = new_x[last_seg][-1], new_y[last_seg][-1]
+                rebuilt[-1, 2] = math.atan2(ext[1] - ly, ext[0] - lx)
+        pts = _reorder(rebuilt, cx, cy)
+
+    return pts, passes, insertions
+
+
+def _split_colors(cones):
+    """Return (yellow, blue) (K, 2) coordinate arrays from an (N, 3) array or a ``ConeArray``."""
+    if isinstance(cones, ConeArray):
+        xs, ys, colors = cones.to_numpy()
+        xy = np.column_stack((xs, ys))
+    else:
+        cones = np.asarray(cones, dtype=float).reshape(-1, 3)
+        xy = cones[:, :2]
+        colors = cones[:, 2]
+    return xy[colors == 0], xy[colors == 1]
+
+
+def generate_path_array(
+    cones,
+    pose: np.ndarray,
+    matcher: str = "greedy",
+    instrumentation: Optional[Instrumentation] = None,
+    sampler: str = "steps",
+) -> np.ndarray:
+    """Plan a path with batched NumPy operations.
+
+    ``cones`` is an (N, 3) array of (x, y, color) rows or a ``ConeArray``, ``pose`` the
+    (x, y, yaw) of the car. ``matcher`` is one of ``src.matching.MATCHERS``. Returns an
+    (M, 2) array of path points that matches ``PathPlanning.generatePath``. Stages are
+    timed on ``instrumentation`` the same way the Python backend does. ``sampler`` is one
+    of ``src.sampling.SAMPLERS``.
+    """
+    columns = _plan(cones, pose, matcher, instrumentation or NULL_INSTRUMENTATION, sampler)
+    return np.column_stack(columns[:2])
+
+
+def _plan(cones, pose, matcher: str, inst: Instrumentation, sampler: str) -> tuple:
+    """The planner pipeline; returns (x, y) path columns, or (x, y, s, heading, curvature)."""
+    cx, cy, heading = (float(v) for v in pose)
+
+    with inst.stage("filter"):
+        yellow, blue = _split_colors(cones)
+    with inst.stage("sort"):
+        syellow = yellow[_sort_by_chain_front(yellow, cx, cy, heading, True)]
+        sblue = blue[_sort_by_chain_front(blue, cx, cy, heading, True)]
+    inst.trace("cones", yellow=len(syellow), blue=len(sblue))
+
+    if len(syellow) == 0 and len(sblue) == 0:
+        with inst.stage("sampling"):
+            return tuple(_sample_straight(cx, cy, heading).T)
+
+    with inst.stage("match"):
+        if matcher == "greedy":
+            mb, my, rb, ry = _match_cones(sblue, syellow)
+        else:
+            mb, my, rb, ry = (np.asarray(idx, dtype=np.intp) for idx in match_cones(sblue, syellow, matcher))
+
+    with inst.stage("midpoints"):
+        pts = _main_points(sblue, syellow, mb, my, rb, ry, cx, cy)
+
+    with inst.stage("correction"):
+        pts, passes, insertions = _correct_sides(pts, sblue, syellow, cx, cy)
+    inst.count("correction_passes", passes)
+    inst.count("points_inserted", insertions)
+    if inst.enabled:
+        inst.trace("main_points", points=[tuple(p) for p in pts.tolist()])
+
+    with inst.stage("sampling"):
+        if sampler == "spline":
+            return spline_arrays(pts, sblue, syellow, STEP, MAX_DIST)
+        return tuple((_sample_arc(pts) if sampler == "arc" else _sample_chain(pts)).T)
+
+
+def _main_points(sblue, syellow, mb, my, rb, ry, cx: float, cy: float) -> np.ndarray:
+    """Midpoints of the matched pairs plus offsets of one-sided leftovers, reordered (K, 3)."""
+    points: List[list] = [[cx, cy, None]]
+
+    if len(mb) and len(my):
+        mids = (sblue[mb] + syellow[my]) / 2
+        chain = np.vstack(([cx, cy], mids))
+        yaws = np.arctan2(np.diff(chain[:, 1]), np.diff(chain[:, 0]))
+        points[0][2] = float(yaws[0])
+        # each midpoint points to its successor, the last keeps its incoming direction
+        out_yaws = np.append(yaws[1:], yaws[-1])
+        points.extend([x, y, yaw] for (x, y), yaw in zip(mids.tolist(), out_yaws.tolist()))
+        if len(ry) == 0 and len(rb) == 0:
+            last_b = sblue[mb[-1]]
+            last_y = syellow[my[-1]]
+            points[-1][2] = math.atan2(last_y[1] - last_b[1], last_y[0] - last_b[0]) + math.pi / 2
+
+    # if only one side has unmatched cones, offset them towards the track centre
+    side = None
+    if len(ry) and not len(rb):
+        side, sign = syellow[ry], 1.0
+    elif len(rb) and not len(ry):
+        side, sign = sblue[rb], -1.0
+    if side is not None:
+        for i, (sx, sy) in enumerate(side.tolist()):
+            angle = math.atan2(sy - points[i][1], sx - points[i][0]) + sign * math.pi / 2
+            mid_x = sx + OFFSET * math.cos(angle)
+            mid_y = sy + OFFSET * math.sin(angle)
+            yaw = math.atan2(mid_y - points[i][1], mid_x - points[i][0])
+            points[-1][2] = yaw
+            points.append([mid_x, mid_y, yaw])
+
+    return _reorder(np.asarray(points, dtype=float), cx, cy)
+
+
+def _sample_arc(pts: np.ndarray) -> np.ndarray:
+    """Points every ``STEP`` meters of arc length along the polyline through ``pts``.
+
+    Vectorised counterpart of ``src.sampling.sample_arc``: the polyline continues along
+    the last row's yaw and is interpolated at all target arc lengths with one ``np.interp``.
+    """
+    n = int(MAX_DIST / STEP + 1e-9)
+    cum = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(pts[:, 0]), np.diff(pts[:, 1])))))
+    targets = STEP * np.arange(1, n + 1)
+    inside = np.minimum(targets, cum[-1])
+    beyond = targets - inside
+    yaw = pts[-1, 2]
+    out = np.empty((n, 2))
+    out[:, 0] = np.interp(inside, cum, pts[:, 0]) + beyond * math.cos(yaw)
+    out[:, 1] = np.interp(inside, cum, pts[:, 1]) + beyond * math.sin(yaw)
+    return out
+
+
+def _sample_chain(pts: np.ndarray) -> np.ndarray:
+    """Vectorised counterpart of ``src.sampling.sample_steps`` on (x, y, yaw) rows.
+
+    Every path point is ``row + k * STEP * (cos, sin)`` of the row that owns it, so the
+    whole path is laid out with a few ``np.repeat`` calls and then cut at ``MAX_DIST``.
+    """
+    seg = np.hypot(np.diff(pts[:, 1]), np.diff(pts[:, 0]))
+    counts = (seg / STEP).astype(int).tolist()
+    counts.append(_budget() - sum(counts))
+    counts = np.maximum(counts, 0)
+    n = min(int(counts.sum()), _budget())
+
+    owner = np.repeat(np.arange(len(pts)), counts)[:n]
+    first = np.repeat(np.cumsum(counts) - counts, counts)[:n]
+    k = np.arange(n) - first + 1
+    yaw = pts[owner, 2]
+    out = np.column_stack(
+        (pts[owner, 0] + k * (np.cos(yaw) * STEP), pts[owner, 1] + k * (np.sin(yaw) * STEP))
+    )
+    # cut where the length from the first row, joins included, would exceed MAX_DIST
+    length = STEP + np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(out[:, 0]), np.diff(out[:, 1])))))
+    return out[: int(np.searchsorted(length, MAX_DIST + 1e-9, side="right"))]
+
+
+def generate_path(
+    cones,
+    pose: np.ndarray,
+    matcher: str = "greedy",
+    instrumentation: Optional[Instrumentation] = None,
+    sampler: str = "steps",
+) -> PathArray:
+    """Same as :func:`generate_path_array`, wrapped in a :class:`PathArray` without copying x and y."""
+    columns = _plan(cones, pose, matcher, instrumentation or NULL_INSTRUMENTATION, sampler)
+    path = PathArray(*(np.ascontiguousarray(c) for c in columns))
+    if instrumentation is not None:
+        instrumentation.trace("path", points=len(path), length=path.length)
+    return path
@@ -1,9 +1,20 @@
 from __future__ import annotations
 
-from typing import List
-
-from src.models import CarPose, Cone, Path2D
+from typing import Callable, List, Optional, Tuple, Union
+
+from src.correction import CorrectionResult, correct_sides, reorder
+from src.delaunay import midline
+from src.culling import cull_cones
+from src.instrumentation import NULL_INSTRUMENTATION, Instrumentation
+from src.matching import MATCHERS, match_cones as pair_cones
+from src.memory import PlanMemory
+from src.models import CarPose, Cone, ConeArray, PathArray
+from src.prediction import BoundaryTracker
+from src.sampling import SAMPLERS, sample_path, sample_straight
+from src.spatial_index import chain_sort
+from src.validator import MIN_CLEARANCE, PathValidator, ValidationResult
 import math
+import time
 
 class PathPlanning:
     """Student-implemented path planner.
@@ -13,14 +24,163 @@ class PathPlanning:
     generate a sequence of path points that the car should follow.
 
     Implement ONLY the generatePath function.
+
+    backend selects the implementation: "python" (default) runs the reference loops,
+    "numpy" runs the same algorithm with batched array operations (requires NumPy). It
+    pays off from about a hundred cones per frame; below that its fixed array overhead
+    makes it slower than "python" (compare with ``python -m src.bench backends``).
+    matcher selects how blue and yellow cones are paired, see src.matching.
+    instrumentation collects per-stage timings and trace events, see src.instrumentation.
+    max_range and fov, when either is set, drop the cones outside that corridor ahead of
+    the car before planning, see src.culling.
+    sampler selects how path points are laid along the main points: "steps" (default)
+    walks fixed steps from every main point, "arc" spaces them evenly by arc length and
+    "spline" follows a smooth curve through them (requires NumPy), see src.sampling.
+    engine selects the planner: "chain" (default) pairs chain-sorted cones into midpoints
+    and corrects their sides, "delaunay" follows the midpoints of the blue-yellow edges of
+    a triangulation of all cones (see src.delaunay) and falls back to "chain" when there
+    are none. Its side correction also moves the path off cones closer than the
+    validator's MIN_CLEARANCE, which the midline can pass near its first and last crossings.
+    tracker, a BoundaryTracker shared by the planners of consecutive frames, remembers
+    recent cones and the track width, and replaces the one-sided and straight fallbacks
+    with a predicted midline while a side has at most one cone ahead, see src.prediction.
+    time_budget_ms turns generatePath into an anytime planner (python backend, chain engine
+    only): it builds the straight fallback first, then the path through the uncorrected
+    midpoints, then the side-corrected path, and returns the best finished one once the
+    budget has run out. The returned tier must pass the PathValidator's TIER_CHECKS
+    against the visible cones; a tier that fails falls back to the one before it, and if
+    none passes the best one is returned anyway. The budget is checked during the chain
+    sort, between stages and between correction passes, so generatePath can overrun it by
+    one stage or correction pass plus the sampling and validation of the tiers tried (the
+    first validation also imports NumPy). tier tells which one was returned and validation
+    how it fared.
+    memory, a PlanMemory shared by the planners of consecutive frames (python backend
+    only), reuses the previous frame's chain-sorted boundaries and greedy pairings where
+    they provably still hold, without changing the path, see src.memory.
     """
+
+    BACKENDS = ("python", "numpy")
+    ENGINES = ("chain", "delaunay")
+    TIERS = ("straight", "midpoints", "corrected")
+    TIER_CHECKS = ("sides", "clearance")
   
-    def __init__(self, car_pose: CarPose, cones: List[Cone]):
+    def __init__(
+        self,
+        car_pose: CarPose,
+        cones: Union[List[Cone], ConeArray],
+        backend: str = "python",
+        matcher: str = "greedy",
+        instrumentation: Optional[Instrumentation] = None,
+        max_range: Optional[float] = None,
+        fov: Optional[float] = None,
+        sampler: str = "steps",
+        engine: str = "chain",
+        tracker: Optional[BoundaryTracker] = None,
+        time_budget_ms: Optional[float] = None,
+        memory: Optional[PlanMemory] = None,
+    ):
+        if backend not in self.BACKENDS:
+            valid = ", ".join(self.BACKENDS)
+            raise ValueError(f"Unknown backend '{backend}'. Valid options: {valid}")
+        if matcher not in MATCHERS:
+            valid = ", ".join(MATCHERS)
+            raise ValueError(f"Unknown matcher '{matcher}'. Valid options: {valid}")
+        if engine not in self.ENGINES:
+            valid = ", ".join(self.ENGINES)
+            raise ValueError(f"Unknown engine '{engine}'. Valid options: {valid}")
+        if sampler not in SAMPLERS:
+            valid = ", ".join(SAMPLERS)
+            raise ValueError(f"Unknown sampler '{sampler}'. Valid options: {valid}")
+        if time_budget_ms is not None:
+            if time_budget_ms <= 0:
+                raise ValueError(f"time_budget_ms must be positive, got {time_budget_ms}")
+            if backend != "python" or engine != "chain":
+                raise ValueError("time_budget_ms needs backend 'python' and engine 'chain'")
+        if memory is not None and backend != "python":
+            raise ValueError("memory needs backend 'python'")
         self.car_pose = car_pose
         self.cones = cones
-
-    def generatePath(self) -> Path2D:
-        """Return a list of path points (x, y) in world frame.
+        self.backend = backend
+        self.matcher = matcher
+        self.sampler = sampler
+        self.engine = engine
+        # stage timers, counters and trace events, see src.instrumentation
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        # optional range/field-of-view corridor applied before planning, see src.culling
+        self.max_range = max_range
+        self.fov = fov
+        # boundary memory shared across frames, see src.prediction
+        self.tracker = tracker
+        # wall-clock budget of generatePath and the tier it returned, see TIERS
+        self.time_budget_ms = time_budget_ms
+        self.tier: Optional[str] = None
+        self.validation: Optional[ValidationResult] = None
+        # sorted boundaries and pairings of the previous frame, see src.memory
+        self.memory = memory
+        # cones dropped by the corridor, set by generatePath
+        self.culled = 0
+        # passes and insertions of the side correction, set by generatePath
+        self.correction: Optional[CorrectionResult] = None
+
+    def _visible_cones(self) -> Union[List[Cone], ConeArray]:
+        """The cones inside the culling corridor, or all cones when culling is off."""
+        self.culled = 0
+        if self.max_range is None and self.fov is None:
+            return self.cones
+        max_range = self.max_range if self.max_range is not None else math.inf
+        fov = self.fov if self.fov is not None else 2 * math.pi
+        with self.instrumentation.stage("cull"):
+            cones, self.culled = cull_cones(self.cones, self.car_pose, max_range, fov)
+        self.instrumentation.count("cones_culled", self.culled)
+        return cones
+
+    def _predicted_path(self, cones: Union[List[Cone], ConeArray]) -> Optional[PathArray]:
+        """Path along the tracker's predicted midline, or None when perception is not sparse."""
+        inst = self.instrumentation
+        blue = self._cones_of_color(cones, 1)
+        yellow = self._cones_of_color(cones, 0)
+        with inst.stage("prediction"):
+            main_points = self.tracker.update(self.car_pose, blue, yellow)
+        if main_points is None:
+            return None
+        inst.count("predicted_paths")
+        return self._finish(main_points, blue, yellow)
+
+    def _midline_path(self, cones: Union[List[Cone], ConeArray]) -> Optional[PathArray]:
+        """Path along the Delaunay midline, or None when no blue-yellow edge exists."""
+        if isinstance(cones, ConeArray):
+            cones = cones.to_cones()
+        inst = self.instrumentation
+        with inst.stage("midline"):
+            waypoints = midline(cones, self.car_pose)
+        if waypoints is None:
+            return None
+
+        cx, cy = self.car_pose.x, self.car_pose.y
+        chain = [(cx, cy)] + waypoints
+        main_points = [
+            CarPose(a[0], a[1], math.atan2(b[1] - a[1], b[0] - a[0])) for a, b in zip(chain, chain[1:])
+        ]
+        main_points.append(CarPose(chain[-1][0], chain[-1][1], main_points[-1].yaw))
+        blue = [c for c in cones if c.color == 1]
+        yellow = [c for c in cones if c.color == 0]
+        # the chain engine's side correction, mostly for the straight run past the last crossing,
+        # which also keeps the path clear of the cones it runs close to
+        with inst.stage("correction"):
+            self.correction = correct_sides(main_points, blue, yellow, cx, cy, clearance=MIN_CLEARANCE)
+        main_points = self.correction.points
+        inst.count("correction_passes", self.correction.passes)
+        inst.count("points_inserted", self.correction.insertions)
+        return self._finish(main_points, blue, yellow)
+
+    @staticmethod
+    def _cones_of_color(cones: Union[List[Cone], ConeArray], color: int) -> List[Cone]:
+        if isinstance(cones, ConeArray):
+            return cones.by_color(color).to_cones()
+        return [c for c in cones if c.color == color]
+
+    def generatePath(self) -> PathArray:
+        """Return the path points (x, y) in world frame.
 
         Requirements and notes:
         - Cones: color==0 (yellow) are on the RIGHT of the track; color==1 (blue) are on the LEFT.
@@ -33,326 +193,232 @@ class PathPlanning:
         with a step size <= 0.5. Units are meters.
 
         Replace the placeholder implementation below with your algorithm.
+
+        The points come back as a PathArray, which iterates as (x, y) tuples and also carries
+        the arc length, heading and curvature at every point.
         """
+        deadline = None
+        if self.time_budget_ms is not None:
+            deadline = time.perf_counter() + self.time_budget_ms / 1e3
+        self.tier = None
+        self.validation = None
+        cones = self._visible_cones()
+        # with a budget, the tiers finished so far, worst first, each with the function that
+        # samples its path; only the one returned is sampled unless it fails validation
+        tiers: List[Tuple[str, Callable[[], PathArray]]] = [("straight", lambda: self._finish(None, [], []))]
+        if self.tracker is not None:
+            path = self._predicted_path(cones)
+            if path is not None:
+                if deadline is not None:
+                    # the predicted midline is not side-corrected
+                    tiers.append(("midpoints", lambda: path))
+                    return self._best_tier(tiers, cones)
+                return path
+        if self.engine == "delaunay":
+            path = self._midline_path(cones)
+            if path is not None:
+                return path
+
+        if self.backend == "numpy":
+            from src.numpy_backend import generate_path
+
+            if not isinstance(cones, ConeArray):
+                cones = [(c.x, c.y, c.color) for c in cones]
+            pose = (self.car_pose.x, self.car_pose.y, self.car_pose.yaw)
+            return generate_path(
+                cones, pose, matcher=self.matcher, instrumentation=self.instrumentation, sampler=self.sampler
+            )
+
         #enter 1 for real cones and 0 for virtual cones
-        def sort_by_chain_front(cones, cx, cy, heading, type):
+        def sort_by_chain_front(cones, cx, cy, heading, type, chains=None):
             if not cones:
                 return []
 
-            def is_in_front(cone):
-                # vector from car to cone
-                dx = cone.x - cx
-                dy = cone.y - cy
-                # angle between car heading and cone direction
-                angle = math.atan2(dy, dx) - heading
-                # normalize to -pi..pi
-                angle = math.atan2(math.sin(angle), math.cos(angle))
-                # in front means within ±90 degrees
-                return abs(angle) < math.pi / 2
+            # in front means within ±90 degrees of the heading, see src.culling.in_front;
+            # the test is inlined here, a cone at the car counts while fx > 0
+            fx = math.cos(heading)
+            fy = math.sin(heading)
+            at_car = fx > 0
 
             # filter cones to those in front of car
             front_cones = []
             if type == 1: 
-                front_cones = [c for c in cones if is_in_front(c)]
+                front_cones = [
+                    c
+                    for c in cones
+                    if (c.x - cx) * fx + (c.y - cy) * fy > 0 or (at_car and c.x == cx and c.y == cy)
+                ]
 
             # start from nearest cone in front
-            if front_cones:
-                current_x, current_y = cx, cy
-                sorted_cones = []
-                remaining = front_cones[:]
-            else:
-                # if none in front, fall back to all cones
-                current_x, current_y = cx, cy
-                sorted_cones = []
-                remaining = cones[:]
-
-            # chain sort (nearest to current each step)
-            while remaining:
-                next_cone = min(remaining, key=lambda c: math.hypot(c.x - current_x, c.y - current_y))
-                sorted_cones.append(next_cone)
-                remaining.remove(next_cone)
-                current_x, current_y = next_cone.x, next_cone.y
-
-            return sorted_cones
+            # if none in front, fall back to all cones
+            remaining = front_cones if front_cones else cones
 
-        def distance(p1, p2):
-            return math.hypot(p1.x - p2.x, p1.y - p2.y)
+            # chain sort (nearest to current each step); cut short once the budget is spent
+            if chains is not None and deadline is None:
+                ordered = chains.sort(remaining, cx, cy)
+                inst.count("sorted_reused", chains.reused)
+                return ordered
+            return chain_sort(remaining, cx, cy, deadline=deadline)
 
         def match_cones(blue, yellow):
-            if not blue or not yellow:  
-                return blue, yellow, blue, yellow
-
-            pairs = []
-
-            # find nearest yellow for each blue
-            for b in blue:
-                nearest_y = min(yellow, key=lambda y: distance(b, y))
-                d = distance(b, nearest_y)
-                pairs.append((b, nearest_y, d))
-
-            # keep smallest distance for each yellow
-            best_pairs = {}
-            for b, y, d in pairs:
-                if y not in best_pairs or d < best_pairs[y][2]:
-                    best_pairs[y] = (b, y, d)
-
-            # extract unique matched cones
-            matched_blue = [b for b, _, _ in best_pairs.values()]
-            matched_yellow = [y for _, y, _ in best_pairs.values()]
-
-            # find remainder cones (unmatched)
-            remaining_blue = [b for b in blue if b not in matched_blue]
-            remaining_yellow = [y for y in yellow if y not in matched_yellow]
-
-            return matched_blue, matched_yellow, remaining_blue, remaining_yellow
-        
-        def get_extension_point(main_points):
-            """Return a new CarPose at the end of the remaining distance."""
-            total_distance = 0.0
-            max_test = 30  # meters
-            for i in range(len(main_points) - 1):
-                p1 = main_points[i]
-                p2 = main_points[i + 1]
-                total_distance += math.hypot(p2.x - p1.x, p2.y - p1.y)
-
-            remaining_distance = max_test- total_distance
-            if remaining_distance <= 0:
-                return None
-
-            last_point = main_points[-1]
-            new_x = last_point.x + remaining_distance * math.cos(last_point.yaw)
-            new_y = last_point.y + remaining_distance * math.sin(last_point.yaw)
-            return CarPose(new_x, new_y, last_point.yaw) 
+            if self.memory is not None and self.matcher == "greedy":
+                matching = self.memory.pairs.match(blue, yellow)
+                inst.count("pairs_reused", self.memory.pairs.reused)
+            else:
+                matching = pair_cones(blue, yellow, self.matcher)
+            return (
+                [blue[i] for i in matching.blue],
+                [yellow[i] for i in matching.yellow],
+                [blue[i] for i in matching.remaining_blue],
+                [yellow[i] for i in matching.remaining_yellow],
+            )
         
         heading = self.car_pose.yaw
         cx = self.car_pose.x
         cy = self.car_pose.y
+        inst = self.instrumentation
 
-        syellow_cones = sort_by_chain_front(
-            [c for c in self.cones if c.color == 0],
-            cx, cy, heading, 1
-        )
-        sblue_cones = sort_by_chain_front(
-            [c for c in self.cones if c.color == 1],
-            cx, cy, heading, 1
-        )   
+        with inst.stage("filter"):
+            yellow = self._cones_of_color(cones, 0)
+            blue = self._cones_of_color(cones, 1)
 
-        # Debug print - run your scenario and read these numbers
-        print(f"yellow_cones={len(syellow_cones)} blue_cones={len(sblue_cones)}")
+        with inst.stage("sort"):
+            memory = self.memory
+            syellow_cones = sort_by_chain_front(yellow, cx, cy, heading, 1, memory.yellow if memory else None)
+            sblue_cones = sort_by_chain_front(blue, cx, cy, heading, 1, memory.blue if memory else None)
 
-        # Default: produce a short straight-ahead path from the current pose.
-        # delete/replace this with your own algorithm.
-        path: Path2D = []
-        max_dist = 10 #meters
-        step = 0.1 #meters
+        inst.trace("cones", yellow=len(syellow_cones), blue=len(sblue_cones))
 
         #if no cones, go straight
-        if not syellow_cones and not sblue_cones:
-            last_point = (cx, cy)
-            yaw = self.car_pose.yaw
-            steps = int(max_dist / step)
-            total_path_length = 0.0
-            for i in range(steps + 1):
-                dx = math.cos(yaw) * step
-                dy = math.sin(yaw) * step
-                new_point = (last_point[0] + dx, last_point[1] + dy)
-                next_dist = math.hypot(new_point[0] - last_point[0], new_point[1] - last_point[1]) 
-                if total_path_length + next_dist > max_dist:
-                    break
-                total_path_length += next_dist
-                last_point = new_point
-                path.append(new_point)
-        
-            # debug print - run your scenario and read these numbers
-            print(f"total_path_length={total_path_length}")
-            return path
+        if self._expired(deadline) or (not syellow_cones and not sblue_cones):
+            if deadline is not None:
+                return self._best_tier(tiers, cones)
+            return self._finish(None, sblue_cones, syellow_cones)
         
         main_points: list[CarPose] = []
         main_points.append(CarPose(cx, cy, None))
         
         #flitering cones to the same number on each side
-        filtered_blue, filtered_yellow, remaining_blue, remaining_yellow = match_cones(sblue_cones, syellow_cones)
+        with inst.stage("match"):
+            filtered_blue, filtered_yellow, remaining_blue, remaining_yellow = match_cones(sblue_cones, syellow_cones)
         yellow_cones = filtered_yellow
         blue_cones = filtered_blue
         
-        #list of mid points
-        if yellow_cones and blue_cones: 
-            #calculate mid points and yaw directions
-            mid_yo = (yellow_cones[0].y + blue_cones[0].y) / 2
-            mid_xo = (yellow_cones[0].x + blue_cones[0].x) / 2
-            yaw = (math.atan2(mid_yo - main_points[0].y, mid_xo - main_points[0].x))
-            main_points[-1].yaw = yaw
-            main_points.append(CarPose(mid_xo, mid_yo, yaw))
-            for i in range(1, max(len(yellow_cones), len(blue_cones))):
-                mid_y = (yellow_cones[i].y + blue_cones[i].y) / 2
-                mid_x = (yellow_cones[i].x + blue_cones[i].x) / 2
-                yaw = (math.atan2(mid_y - main_points[i].y, mid_x - main_points[i].x)) 
-                main_points.append(CarPose(mid_x, mid_y, yaw))
-                main_points[i].yaw = yaw
-            
-            if not remaining_yellow and not remaining_blue:
-                #get the slop of the normal on the line connecting the last two cones
-                main_points[-1].yaw = (math.atan2(yellow_cones[-1].y - blue_cones[-1].y, yellow_cones[-1].x - blue_cones[-1].x) + math.pi/2)
-        
-        #if only one side cones, move right the blue cones or left the yellow cones
-
-        if remaining_yellow and not remaining_blue:
-            yellow_cones = remaining_yellow
-            for i in range(len(yellow_cones)):
-                offset = 0.75 # meters to the left of yellow cones
-                angle = math.atan2(yellow_cones[i].y - main_points[i].y, yellow_cones[i].x - main_points[i].x) + math.pi / 2
-                mid_x = yellow_cones[i].x + offset * math.cos(angle)
-                mid_y = yellow_cones[i].y + offset * math.sin(angle)
-                yaw = (math.atan2(mid_y- main_points[i].y, mid_x- main_points[i].x))
+        with inst.stage("midpoints"):
+            #list of mid points
+            if yellow_cones and blue_cones: 
+                #calculate mid points and yaw directions
+                mid_yo = (yellow_cones[0].y + blue_cones[0].y) / 2
+                mid_xo = (yellow_cones[0].x + blue_cones[0].x) / 2
+                yaw = (math.atan2(mid_yo - main_points[0].y, mid_xo - main_points[0].x))
                 main_points[-1].yaw = yaw
-                main_points.append(CarPose(mid_x, mid_y, yaw))
-
-        elif remaining_blue and not remaining_yellow:
-            blue_cones = remaining_blue
-            for i in range(len(blue_cones)):
-                offset = 0.75  # meters to the right of blue cones
-                angle = math.atan2(blue_cones[i].y - main_points[i].y, blue_cones[i].x - main_points[i].x) - math.pi / 2
-                mid_x = blue_cones[i].x + offset * math.cos(angle)
-                mid_y = blue_cones[i].y + offset * math.sin(angle)
-                yaw = (math.atan2(mid_y - main_points[i].y, mid_x - main_points[i].x))
-                main_points[-1].yaw = yaw
-                main_points.append(CarPose(mid_x, mid_y, yaw))
-
-        final_yaw = main_points[-1].yaw
-        #sort main points
-        main_points = sort_by_chain_front(
-            main_points,
-            cx, cy, heading, 0
-        )
-        
-        #new yaw directions
-        yaw_dir = []
-        for j in range(1, len(main_points)):
-            yaw = math.atan2(main_points[j].y - main_points[j - 1].y, main_points[j].x - main_points[j - 1].x)
-            yaw_dir.append(yaw)
-        yaw_dir.append(final_yaw)  # last point yaw
-        for j in range(len(main_points)):
-            main_points[j].yaw = yaw_dir[j]
-
-        #add a checking loop
-        #add a checking midpoint if a cone is on the wrong side
-        new_point = get_extension_point(main_points)
-        if new_point:
-            main_points.append(new_point)
-
+                main_points.append(CarPose(mid_xo, mid_yo, yaw))
+                for i in range(1, max(len(yellow_cones), len(blue_cones))):
+                    mid_y = (yellow_cones[i].y + blue_cones[i].y) / 2
+                    mid_x = (yellow_cones[i].x + blue_cones[i].x) / 2
+                    yaw = (math.atan2(mid_y - main_points[i].y, mid_x - main_points[i].x)) 
+                    main_points.append(CarPose(mid_x, mid_y, yaw))
+                    main_points[i].yaw = yaw
+                
+                if not remaining_yellow and not remaining_blue:
+                    #get the slop of the normal on the line connecting the last two cones
+                    main_points[-1].yaw = (math.atan2(yellow_cones[-1].y - blue_cones[-1].y, yellow_cones[-1].x - blue_cones[-1].x) + math.pi/2)
+            
+            #if only one side cones, move right the blue cones or left the yellow cones
+
+            if remaining_yellow and not remaining_blue:
+                yellow_cones = remaining_yellow
+                for i in range(len(yellow_cones)):
+                    offset = 0.75 # meters to the left of yellow cones
+                    angle = math.atan2(yellow_cones[i].y - main_points[i].y, yellow_cones[i].x - main_points[i].x) + math.pi / 2
+                    mid_x = yellow_cones[i].x + offset * math.cos(angle)
+                    mid_y = yellow_cones[i].y + offset * math.sin(angle)
+                    yaw = (math.atan2(mid_y- main_points[i].y, mid_x- main_points[i].x))
+                    main_points[-1].yaw = yaw
+                    main_points.append(CarPose(mid_x, mid_y, yaw))
+
+            elif remaining_blue and not remaining_yellow:
+                blue_cones = remaining_blue
+                for i in range(len(blue_cones)):
+                    offset = 0.75  # meters to the right of blue cones
+                    angle = math.atan2(blue_cones[i].y - main_points[i].y, blue_cones[i].x - main_points[i].x) - math.pi / 2
+                    mid_x = blue_cones[i].x + offset * math.cos(angle)
+                    mid_y = blue_cones[i].y + offset * math.sin(angle)
+                    yaw = (math.atan2(mid_y - main_points[i].y, mid_x - main_points[i].x))
+                    main_points[-1].yaw = yaw
+                    main_points.append(CarPose(mid_x, mid_y, yaw))
+
+            #sort main points and point each yaw at the next one
+            main_points = reorder(main_points, cx, cy)
+
+        if deadline is not None:
+            # the side correction moves these points' yaws, keep a copy
+            midpoints = [CarPose(p.x, p.y, p.yaw) for p in main_points]
+            tiers.append(("midpoints", lambda: self._finish(midpoints, sblue_cones, syellow_cones)))
+            if self._expired(deadline):
+                return self._best_tier(tiers, cones)
 
         #Edit the path so blue cones and yellow cones are on the correct side
-        max_iterations = 20  # safety limit to avoid infinite loops
-        for _ in range(max_iterations):
-            corrected = False
-     
-            for i in range(len(main_points) - 1):
-                p1 = main_points[i]
-                p2 = main_points[i + 1] 
-                offset =0.75  # meters
-                #vector from p1 to p2
-                vx = (p2.x - p1.x)
-                vy = (p2.y - p1.y)
-                #blue cones on the left side
-                if sblue_cones:
-                    for j in range(len(sblue_cones)):
-                        #in the segement between p1 and p2
-                        if min(p1.x, p2.x) <= sblue_cones[j].x <= max(p1.x, p2.x) and min(p1.y, p2.y) <= sblue_cones[j].y <= max(p1.y, p2.y):
-                            #vector from p1 to blue cone
-                            bx = (sblue_cones[j].x - p1.x)
-                            by = (sblue_cones[j].y - p1.y)
-                            #cross product to determine side
-                            cross = vx * by - vy * bx
-                            if cross <= 0:
-                                #new main point at the vertex of the rectangle
-                                angle = math.atan2(by, bx) - math.pi / 2
-                                new_x = sblue_cones[j].x + offset * math.cos(angle)
-                                new_y = sblue_cones[j].y + offset * math.sin(angle)
-                                yaw_i = math.atan2(new_y - p1.y, new_x - p1.x)
-                                yaw_new = math.atan2(p2.y - new_y, p2.x - new_x)
-                                main_points[i].yaw = yaw_i
-                                main_points.insert(i + 1, CarPose(new_x, new_y, yaw_new))
-                                corrected = True
-                #yellow cones on the right side
-                if syellow_cones:
-                    for j in range(len(syellow_cones)):
-                        #in the segement between p1 and p2
-                        if min(p1.x, p2.x) <= syellow_cones[j].x <= max(p1.x, p2.x) and min(p1.y, p2.y) <= syellow_cones[j].y <= max(p1.y, p2.y):
-                            #vector from p1 to yellow cone
-                            yx = (syellow_cones[j].x - p1.x)
-                            yy = (syellow_cones[j].y - p1.y)
-                            #cross product to determine side
-                            cross = vx * yy - vy * yx
-                            if cross >= 0:
-                                #new main point at the vertex of the rectangle
-                                angle = math.atan2(yy, yx) + math.pi / 2
-                                new_x = syellow_cones[j].x + offset * math.cos(angle)
-                                new_y = syellow_cones[j].y + offset * math.sin(angle)
-                                yaw_i = math.atan2(new_y - p1.y, new_x - p1.x)
-                                yaw_new = math.atan2(p2.y - new_y, p2.x - new_x)
-                                main_points[i].yaw = yaw_i
-                                main_points.insert(i + 1, CarPose(new_x, new_y, yaw_new))
-                                corrected = True            
-            main_points.remove(main_points[-1])  # remove last extension point
-
-            if not corrected:
+        with inst.stage("correction"):
+            self.correction = correct_sides(main_points, sblue_cones, syellow_cones, cx, cy, deadline=deadline)
+        main_points = self.correction.points
+        inst.count("correction_passes", self.correction.passes)
+        inst.count("points_inserted", self.correction.insertions)
+        if inst.enabled:
+            inst.trace("main_points", points=[(p.x, p.y, p.yaw) for p in main_points])
+        # a half-corrected chain is not a tier of its own; fall back to the midpoints
+        if self.correction.interrupted:
+            inst.count("budget_expired")
+            return self._best_tier(tiers, cones)
+        if deadline is not None:
+            tiers.append(("corrected", lambda: self._finish(main_points, sblue_cones, syellow_cones)))
+            return self._best_tier(tiers, cones)
+        return self._finish(main_points, sblue_cones, syellow_cones)
+
+    def _finish(self, main_points: Optional[List[CarPose]], blue: List[Cone], yellow: List[Cone]) -> PathArray:
+        """Sample the path along ``main_points``, or straight ahead of the car without them."""
+        with self.instrumentation.stage("sampling"):
+            if main_points is None:
+                result = sample_straight(self.car_pose.x, self.car_pose.y, self.car_pose.yaw)
+            else:
+                # only the spline sampler checks the path against the cones
+                spline = self.sampler == "spline"
+                result = sample_path(
+                    [p.x for p in main_points],
+                    [p.y for p in main_points],
+                    [p.yaw for p in main_points],
+                    self.sampler,
+                    blue=[(c.x, c.y) for c in blue] if spline else (),
+                    yellow=[(c.x, c.y) for c in yellow] if spline else (),
+                )
+        self.instrumentation.trace("path", points=len(result), length=result.length)
+        return result
+
+    def _best_tier(
+        self, tiers: List[Tuple[str, Callable[[], PathArray]]], cones: Union[List[Cone], ConeArray]
+    ) -> PathArray:
+        """Path of the best tier passing ``TIER_CHECKS``, or of the best tier if none does."""
+        validator = PathValidator()
+        chosen = None
+        for tier, sample in reversed(tiers):
+            path = sample()
+            result = validator.validate(path, cones, self.car_pose)
+            if chosen is None:
+                chosen = (tier, path, result)
+            if all(check.ok for check in result.checks if check.name in self.TIER_CHECKS):
+                chosen = (tier, path, result)
                 break
-            
-            #resort main points
-            final_yaw = main_points[-1].yaw
-            #sort main points
-            main_points = sort_by_chain_front(
-                main_points,
-                cx, cy, heading, 0
-            )
-            
-            #new yaw directions
-            yaw_dir = []
-            for j in range(1, len(main_points)):
-                yaw = math.atan2(main_points[j].y - main_points[j - 1].y, main_points[j].x - main_points[j - 1].x)
-                yaw_dir.append(yaw)
-            yaw_dir.append(final_yaw)  # last point yaw
-            for j in range(len(main_points)):
-                main_points[j].yaw = yaw_dir[j]
-            
-            new_point = get_extension_point(main_points)
-            if new_point:
-                main_points.append(new_point)
-    
-        #print main points for debug
-        for i, p in enumerate(main_points):
-            print(f"main_point {i}: x={p.x}, y={p.y}, yaw={p.yaw}")
-        
-        #number of steps to take between each two midpoints
-        num_steps = []
-        for j in range(1, len(main_points)):
-            dist = math.hypot(main_points[j].y - main_points[j - 1].y, main_points[j].x - main_points[j - 1].x)
-            num_steps.append(int(dist / step))
-            print(f"num_steps debug: dist={dist} steps={int(dist / step)} , between point {j - 1} and point {j }")
-        num_steps.append(int((max_dist - sum(num_steps) * step) / step))
-            
-            # debug print - run your scenario and read these numbers
-        print(f"main_points={len(main_points)} edges={len(num_steps)} num_steps={sum(num_steps)} ") 
-        
-        #generate path points
-        total_path_length = 0.0
-        for j in range(len(main_points)):
-            last_point = (main_points[j].x, main_points[j].y)
-            for i in range(num_steps[j]):
-                dx = math.cos(main_points[j].yaw) * step
-                dy = math.sin(main_points[j].yaw) * step 
-                new_point = (last_point[0] + dx, last_point[1] + dy)
-                next_dist = math.hypot(new_point[0] - last_point[0], new_point[1] - last_point[1]) 
-                if total_path_length + next_dist > max_dist:
-                    break
-                total_path_length += next_dist
-                last_point = new_point
-                path.append(new_point)
-        
-        # debug print - run your scenario and read these numbers
-        print(f"total_path_length={total_path_length}")
-
+            self.instrumentation.count("tier_rejected")
+        tier, path, self.validation = chosen
+        self._set_tier(tier)
         return path
 
+    def _set_tier(self, tier: str) -> None:
+        self.tier = tier
+        self.instrumentation.trace("tier", tier=tier)
 
-
+    def _expired(self, deadline: Optional[float]) -> bool:
+        if deadline is None or time.perf_counter() < deadline:
+            return False
+        self.instrumentation.count("budget_expired")
+        return True
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Deque, List, Optional, Sequence, Tuple
+
+from src.culling import in_front
+from src.models import CarPose, Cone
+from src.spatial_index import chain_sort
+
+
+HISTORY = 10  # frames of seen cones remembered per side
+SPARSE_CONES = 1  # a side with at most this many cones ahead of the car is sparse
+WIDTH_SAMPLES = 6  # cones per side, nearest to the car, used to measure the track width
+MIN_WIDTH = 1.0  # meters, narrower blue-yellow gaps are not a track width
+MAX_WIDTH = 8.0  # meters, wider blue-yellow gaps are not a track width
+WIDTH_SMOOTHING = 0.3  # weight of a new width measurement in the running estimate
+MEMORY_RANGE = 15.0  # meters, remembered cones further from the car are not used
+DUPLICATE_DISTANCE = 0.5  # meters, a remembered cone this close to a seen one is the same cone
+
+
+def _ahead(cones: Sequence[Cone], car_pose: CarPose, max_range: float = math.inf) -> List[Cone]:
+    """The cones in front of the car (see ``src.culling.in_front``) and within ``max_range``."""
+    fx, fy = math.cos(car_pose.yaw), math.sin(car_pose.yaw)
+    r2 = max_range * max_range
+    out = []
+    for c in cones:
+        dx = c.x - car_pose.x
+        dy = c.y - car_pose.y
+        if in_front(dx, dy, fx, fy) and dx * dx + dy * dy <= r2:
+            out.append(c)
+    return out
+
+
+class BoundaryTracker:
+    """Short memory of the track boundaries for planning through sparse perception.
+
+    Feed every frame's cones to :meth:`update`. While both sides show more than
+    ``SPARSE_CONES`` cones ahead of the car it only observes: it measures the track width
+    between nearby blue-yellow pairs into a running estimate and remembers the last
+    ``history`` frames of cones. Once a side drops to ``SPARSE_CONES`` or fewer cones, it
+    returns predicted main points instead. The cones seen ahead are topped up with
+    remembered ones still ahead of the car. The side with more cones is then offset
+    inwards by half the estimated width, averaged with the offsets of the other side where
+    both exist. This is a cheap midline that needs no matching and no side correction, and
+    it does not flip between the one-sided and straight fallbacks as cones drop in and out.
+
+    Until a width has been measured, :meth:`update` returns None and the planner runs its
+    usual fallbacks.
+    """
+
+    def __init__(self, history: int = HISTORY, sparse_cones: int = SPARSE_CONES):
+        self.sparse_cones = sparse_cones
+        self.width: Optional[float] = None
+        self._seen: Deque[Tuple[List[Cone], List[Cone]]] = deque(maxlen=history)
+        self.predictions = 0
+
+    def reset(self) -> None:
+        self.width = None
+        self._seen.clear()
+        self.predictions = 0
+
+    def update(self, car_pose: CarPose, blue: Sequence[Cone], yellow: Sequence[Cone]) -> Optional[List[CarPose]]:
+        """Observe one frame's cones; return predicted main points when perception is sparse."""
+        front_blue = _ahead(blue, car_pose)
+        front_yellow = _ahead(yellow, car_pose)
+        sparse = len(front_blue) <= self.sparse_cones or len(front_yellow) <= self.sparse_cones
+        remembered = self._remembered(car_pose)
+        self._seen.append((list(blue), list(yellow)))
+        if not sparse:
+            self._measure_width(car_pose, front_blue, front_yellow)
+            return None
+        if self.width is None:
+            return None
+
+        front_blue = _merge(front_blue, remembered[0])
+        front_yellow = _merge(front_yellow, remembered[1])
+        if not front_blue and not front_yellow:
+            return None
+        self.predictions += 1
+        return self._midline(car_pose, front_blue, front_yellow)
+
+    def _remembered(self, car_pose: CarPose) -> Tuple[List[Cone], List[Cone]]:
+        blue = {c for frame_blue, _ in self._seen for c in frame_blue}
+        yellow = {c for _, frame_yellow in self._seen for c in frame_yellow}
+        return _ahead(blue, car_pose, MEMORY_RANGE), _ahead(yellow, car_pose, MEMORY_RANGE)
+
+    def _measure_width(self, car_pose: CarPose, blue: List[Cone], yellow: List[Cone]) -> None:
+        """Fold the median distance from nearby blue cones to the yellow boundary into ``width``.
+
+        Distances are taken perpendicular to the segments between consecutive yellow cones
+        rather than to the cones themselves, so a blue cone whose opposite yellow cone is
+        missing still measures the width instead of the diagonal to the next one. Blue cones
+        that do not project onto any segment are skipped.
+        """
+        def nearest(cones):
+            return sorted(cones, key=lambda c: (c.x - car_pose.x) ** 2 + (c.y - car_pose.y) ** 2)[:WIDTH_SAMPLES]
+
+        boundary = chain_sort(nearest(yellow), car_pose.x, car_pose.y)
+        segments = list(zip(boundary, boundary[1:]))
+        widths = []
+        for b in nearest(blue):
+            gaps = [d for d in (_perpendicular_distance(b, a, c) for a, c in segments) if d is not None]
+            if gaps and MIN_WIDTH <= min(gaps) <= MAX_WIDTH:
+                widths.append(min(gaps))
+        if not widths:
+            return
+        widths.sort()
+        measured = widths[len(widths) // 2]
+        if self.width is None:
+            self.width = measured
+        else:
+            self.width += WIDTH_SMOOTHING * (measured - self.width)
+
+    def _midline(self, car_pose: CarPose, blue: List[Cone], yellow: List[Cone]) -> List[CarPose]:
+        cx, cy = car_pose.x, car_pose.y
+        # yellow is the right boundary, so the centre is to its left; blue the other way round
+        sides = [(chain_sort(yellow, cx, cy), 1.0), (chain_sort(blue, cx, cy), -1.0)]
+        sides.sort(key=lambda side: -len(side[0]))
+        (ref, ref_sign), (other, other_sign) = sides
+        half = self.width / 2
+
+        def offsets(cones, sign):
+            out = []
+            for i, c in enumerate(cones):
+                if len(cones) == 1:
+                    heading = car_pose.yaw
+                elif i + 1 < len(cones):
+                    heading = math.atan2(cones[i + 1].y - c.y, cones[i + 1].x - c.x)
+                else:
+                    heading = math.atan2(c.y - cones[i - 1].y, c.x - cones[i - 1].x)
+                normal = heading + sign * math.pi / 2
+                out.append((c.x + half * math.cos(normal), c.y + half * math.sin(normal), heading))
+            return out
+
+        centres = offsets(ref, ref_sign)
+        for ox, oy, _ in offsets(other, other_sign):
+            k = min(range(len(centres)), key=lambda j: (centres[j][0] - ox) ** 2 + (centres[j][1] - oy) ** 2)
+            x, y, heading = centres[k]
+            if math.hypot(x - ox, y - oy) <= half:
+                centres[k] = ((x + ox) / 2, (y + oy) / 2, heading)
+
+        points = [CarPose(cx, cy, car_pose.yaw)]
+        for x, y, _ in centres:
+            points.append(CarPose(x, y, None))
+        for a, b in zip(points, points[1:]):
+            a.yaw = math.atan2(b.y - a.y, b.x - a.x)
+        points[-1].yaw = centres[-1][2]
+        return points
+
+
+def _merge(seen: Sequence[Cone], remembered: Sequence[Cone]) -> List[Cone]:
+    """``seen`` plus the remembered cones not within ``DUPLICATE_DISTANCE`` of a cone already kept."""
+    d2 = DUPLICATE_DISTANCE * DUPLICATE_DISTANCE
+    kept = list(seen)
+    for r in remembered:
+        if all((r.x - k.x) ** 2 + (r.y - k.y) ** 2 > d2 for k in kept):
+            kept.append(r)
+    return kept
+
+
+def _perpendicular_distance(p: Cone, a: Cone, b: Cone) -> Optional[float]:
+    """Distance from ``p`` to the segment from ``a`` to ``b``, or None if ``p`` projects outside it."""
+    vx = b.x - a.x
+    vy = b.y - a.y
+    len2 = vx * vx + vy * vy
+    if len2 == 0:
+        return None
+    t = ((p.x - a.x) * vx + (p.y - a.y) * vy) / len2
+    if not 0.0 <= t <= 1.0:
+        return None
+    return abs((p.x - a.x) * vy - (p.y - a.y) * vx) / math.sqrt(len2)
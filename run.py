@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import argparse
+import json
+import math
 import os
 import sys
+from typing import Dict, List, Optional, Sequence
 
 # Ensure project root is on sys.path when running as a script: e.g., `python src/run.py`
 _CURRENT_DIR = os.path.dirname(__file__)
@@ -10,8 +13,77 @@ _PROJECT_ROOT = os.path.abspath(os.path.join(_CURRENT_DIR, os.pardir))
 if _PROJECT_ROOT not in sys.path:
     sys.path.insert(0, _PROJECT_ROOT)
 
+from src.instrumentation import Instrumentation
+from src.models import CarPose, Path2D
+from src.path_planning import PathPlanning
+from src.sampling import MAX_DIST, SAMPLERS, STEP
 from src.scenarios import get_scenario_names, make_scenario
-from src.tester import PathTester
+from src.tester import FIGURE_FORMATS, PathTester, export_scenarios
+from src.timing import percentiles, time_planner
+from src.validator import MIN_LENGTH
+
+
+# Largest gap between consecutive path points, in steps, that each sampler guarantees. The
+# original "steps" sampler restarts every segment one step past its main point, so its joins
+# can be up to two steps apart.
+STEP_LIMITS = {"steps": 2.0, "arc": 1.01, "spline": 1.01}
+
+
+def check_contracts(car_pose: CarPose, path: Path2D, sampler: str = "steps") -> List[str]:
+    """Contract violations of a planned path as messages; empty when the path is fine.
+
+    Every path has at most ``MAX_DIST / STEP`` finite points, starting from the car, no two
+    of them further apart than the sampler's :data:`STEP_LIMITS`, and a length from the car
+    between ``MIN_LENGTH`` and ``MAX_DIST`` (the limits of ``src.validator``).
+    """
+    problems = []
+    budget = int(MAX_DIST / STEP + 1e-9)
+    if len(path) > budget:
+        problems.append(f"{len(path)} points, expected at most {budget}")
+    points = [(car_pose.x, car_pose.y)] + [(p[0], p[1]) for p in path]
+    if not all(math.isfinite(x) and math.isfinite(y) for x, y in points):
+        problems.append("non-finite point")
+        return problems
+    gaps = [math.hypot(x1 - x0, y1 - y0) for (x0, y0), (x1, y1) in zip(points, points[1:])]
+    limit = STEP_LIMITS[sampler] * STEP
+    if gaps and max(gaps) > limit:
+        problems.append(f"step {max(gaps):.3f} m > {limit:.3f} m")
+    length = sum(gaps)
+    if length > MAX_DIST + 1e-6:
+        problems.append(f"length {length:.3f} m > {MAX_DIST:.3f} m")
+    elif length < MIN_LENGTH - 1e-6:
+        problems.append(f"length {length:.3f} m < {MIN_LENGTH:.3f} m")
+    return problems
+
+
+def run_scenarios(
+    names: Sequence[str],
+    repeat: int,
+    warmup: int = 1,
+    instrumentation: Optional[Instrumentation] = None,
+    **planner_kwargs,
+) -> List[Dict]:
+    """Time ``repeat`` plans of every scenario after ``warmup`` calls and check their contracts."""
+    sampler = planner_kwargs.get("sampler", "steps")
+    results = []
+    for name in names:
+        cones, car_pose = make_scenario(name)
+        samples = time_planner(car_pose, cones, repeat, warmup, **planner_kwargs)
+        planner = PathPlanning(
+            CarPose(car_pose.x, car_pose.y, car_pose.yaw), cones, instrumentation=instrumentation, **planner_kwargs
+        )
+        path = planner.generatePath()
+        results.append(
+            {
+                "name": name,
+                "cones": len(cones),
+                "points": len(path),
+                "latency_ms": {k: v * 1e3 for k, v in percentiles(samples).items()},
+                "violations": check_contracts(car_pose, path, sampler),
+                "tier": planner.tier,
+            }
+        )
+    return results
 
 
 def main() -> None:
@@ -23,14 +95,108 @@ def main() -> None:
         choices=get_scenario_names(),
         help="Scenario name to load",
     )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Run every scenario instead of --scenario, headless (use --export to render their plots)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=None,
+        help="Time N calls per scenario and check the path contracts (default 10 with --all, --no-plot or --report)",
+    )
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed calls per scenario before --repeat")
+    parser.add_argument("--no-plot", action="store_true", help="Do not open a plot window")
+    parser.add_argument("--report", metavar="FILE", help="Write the timings and contract checks as JSON")
+    parser.add_argument("--backend", type=str, default="python", choices=PathPlanning.BACKENDS)
+    parser.add_argument("--engine", type=str, default="chain", choices=PathPlanning.ENGINES, help="Planner engine")
+    parser.add_argument("--sampler", type=str, default="steps", choices=SAMPLERS, help="Path sampler")
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=None,
+        metavar="MS",
+        help="Plan anytime within this many milliseconds and report the tier returned (python backend, chain engine)",
+    )
+    parser.add_argument("--trace", action="store_true", help="Print the planner's trace events and stage timings")
+    parser.add_argument(
+        "--export",
+        metavar="DIR",
+        help="Render every scenario headless into DIR instead of opening a plot window",
+    )
+    parser.add_argument("--format", default="png", choices=FIGURE_FORMATS, help="Figure format for --export")
     args = parser.parse_args()
 
-    cones, car_pose = make_scenario(args.scenario)
-    tester = PathTester(cones=cones, car_pose=car_pose)
-    tester.run()
+    planner = {"backend": args.backend, "engine": args.engine, "sampler": args.sampler}
+    if args.time_budget is not None:
+        planner["time_budget_ms"] = args.time_budget
+    if args.export:
+        for filename in export_scenarios(args.export, fmt=args.format, **planner):
+            print(filename)
+        return
 
+    names = get_scenario_names() if args.all else [args.scenario]
+    inst = Instrumentation(sink=_print_event) if args.trace else None
+    failed = 0
+    if args.all or args.no_plot or args.report or args.repeat is not None:
+        repeat = args.repeat if args.repeat is not None else 10
+        results = run_scenarios(names, repeat, args.warmup, instrumentation=inst, **planner)
+        _print_results(results)
+        failed = sum(1 for r in results if r["violations"])
+        if args.report:
+            with open(args.report, "w") as f:
+                report = {"planner": planner, "repeat": repeat, "warmup": args.warmup, "failed": failed}
+                json.dump({**report, "scenarios": results}, f, indent=2)
+            print(f"report written to {args.report}")
+        # the trace of the checked plans was printed as they ran, plotting below replans
+        if inst is not None:
+            _print_summary(inst)
+            inst = None
 
-if __name__ == "__main__":
-    main()
+    # --all opens no windows, one blocking window per scenario would stall the run
+    if not args.no_plot and not args.all:
+        for name in names:
+            cones, car_pose = make_scenario(name)
+            tester = PathTester(cones=cones, car_pose=car_pose, instrumentation=inst, **planner)
+            tester.run()
+        if inst is not None:
+            _print_summary(inst)
+
+    if failed:
+        sys.exit(1)
+
+
+def _print_results(results: Sequence[Dict]) -> None:
+    print(f"{'scenario':>8} {'cones':>6} {'points':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}  contracts")
+    for r in results:
+        lat = r["latency_ms"]
+        status = "; ".join(r["violations"]) or "ok"
+        if r["tier"] is not None:
+            status += f" ({r['tier']})"
+        print(
+            f"{r['name']:>8} {r['cones']:>6} {r['points']:>6} {lat['p50']:>9.3f} {lat['p95']:>9.3f}"
+            f" {lat['max']:>9.3f}  {status}"
+        )
+    failed = sum(1 for r in results if r["violations"])
+    print(f"{len(results) - failed}/{len(results)} scenarios within contract")
 
 
+def _print_summary(inst: Instrumentation) -> None:
+    summary = inst.summary()
+    for name, stage in summary["stages"].items():
+        print(f"{name:>12} {stage['total_ms']:8.3f} ms")
+    for name, n in summary["counters"].items():
+        print(f"{name:>20} {n}")
+
+
+def _print_event(event: str, fields: dict) -> None:
+    if event == "main_points":
+        for i, (x, y, yaw) in enumerate(fields["points"]):
+            print(f"main_point {i}: x={x}, y={y}, yaw={yaw}")
+    elif event != "stage":
+        print(event, " ".join(f"{k}={v}" for k, v in fields.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import math
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, chain, repeat
+from typing import Sequence, Tuple
+
+from src.models import PathArray
+
+
+SAMPLERS = ("steps", "arc", "spline")
+MAX_DIST = 10.0  # meters, path length budget
+STEP = 0.1  # meters between consecutive path points
+
+
+def _zeros(n: int) -> array:
+    return array("d", bytes(8 * n))
+
+
+def _budget(step: float, max_dist: float) -> int:
+    if step <= 0:
+        raise ValueError(f"step must be positive, got {step}")
+    # steps of ``step`` that fit in ``max_dist``, robust to max_dist / step landing just below an integer
+    return max(0, int(max_dist / step + 1e-9))
+
+
+def _join_curvature(s: array, heading: array, joins: Sequence[int]) -> array:
+    """Curvature of a path that only turns at ``joins``; every other point is on a straight.
+
+    Also gives the last point the heading of the one before it, as ``PathArray`` does.
+    """
+    n = len(s)
+    if n > 1:
+        heading[n - 1] = heading[n - 2]
+    curvature = _zeros(n)
+    for i in joins:
+        if 0 < i < n - 1:
+            turn = heading[i] - heading[i - 1]
+            ds = (s[i + 1] - s[i - 1]) / 2
+            curvature[i] = math.atan2(math.sin(turn), math.cos(turn)) / ds if ds > 0 else 0.0
+    if n > 2:
+        curvature[0] = curvature[1]
+        curvature[n - 1] = curvature[n - 2]
+    return curvature
+
+
+def sample_straight(x: float, y: float, yaw: float, step: float = STEP, max_dist: float = MAX_DIST) -> PathArray:
+    """Points every ``step`` meters along ``yaw`` from (x, y), excluding the start."""
+    n = _budget(step, max_dist)
+    dx = math.cos(yaw) * step
+    dy = math.sin(yaw) * step
+    xs = array("d", accumulate(chain((x + dx,), repeat(dx, n - 1)))) if n else _zeros(0)
+    ys = array("d", accumulate(chain((y + dy,), repeat(dy, n - 1)))) if n else _zeros(0)
+    s = array("d", accumulate(chain((0.0,), repeat(step, n - 1)))) if n else _zeros(0)
+    return PathArray(xs, ys, s, array("d", [yaw]) * n, _zeros(n))
+
+
+def sample_steps(
+    xs: Sequence[float],
+    ys: Sequence[float],
+    yaws: Sequence[float],
+    step: float = STEP,
+    max_dist: float = MAX_DIST,
+) -> PathArray:
+    """Closed-form version of the planner's original stepping loop.
+
+    From every main point i the original loop walked ``int(dist_i / step)`` steps along
+    ``yaws[i]``, with the last point taking the steps left in ``max_dist``, and stopped
+    once ``max_dist`` was used up. The path is then cut where its length from the first
+    main point, joins included, would exceed ``max_dist``. Here every segment's
+    coordinates and arc lengths are appended as running sums of its precomputed (dx, dy)
+    step, without a Python-level loop per point, and its heading as one repeated value.
+    Curvature is only non-zero where two segments join, so only those points are evaluated.
+    """
+    budget = _budget(step, max_dist)
+    hypot = math.hypot
+    atan2 = math.atan2
+    counts = [int(hypot(xs[j] - xs[j - 1], ys[j] - ys[j - 1]) / step) for j in range(1, len(xs))]
+    # the steps left in the budget; (max_dist - sum * step) / step can land just below an integer
+    counts.append(budget - sum(counts))
+
+    px = array("d")
+    py = array("d")
+    s = array("d")
+    heading = array("d")
+    joins = []
+    n = 0
+    for j, count in enumerate(counts):
+        count = min(count, budget - n)
+        if count <= 0:
+            continue
+        yaw = yaws[j]
+        dx = math.cos(yaw) * step
+        dy = math.sin(yaw) * step
+        x = xs[j] + dx
+        y = ys[j] + dy
+        if n:
+            # the first point of a segment continues from the last one of the previous segment
+            gap_x = x - px[n - 1]
+            gap_y = y - py[n - 1]
+            heading[n - 1] = atan2(gap_y, gap_x)
+            d = s[n - 1] + hypot(gap_x, gap_y)
+            joins.append(n - 1)
+            joins.append(n)
+        else:
+            d = 0.0
+        # running sums of the constant step, in the order the original loop added them up
+        px.extend(accumulate(chain((x,), repeat(dx, count - 1))))
+        py.extend(accumulate(chain((y,), repeat(dy, count - 1))))
+        s.extend(accumulate(chain((d,), repeat(step, count - 1))))
+        heading.extend(array("d", [atan2(dy, dx)]) * count)
+        n += count
+
+    # a join can be up to two steps long, so the point budget alone may run past max_dist;
+    # keep the points within max_dist of the first main point along the path
+    keep = bisect_right(s, max_dist - step + 1e-9)
+    if keep < n:
+        del px[keep:], py[keep:], s[keep:], heading[keep:]
+    return PathArray(px, py, s, heading, _join_curvature(s, heading, joins))
+
+
+def sample_arc(
+    xs: Sequence[float],
+    ys: Sequence[float],
+    yaws: Sequence[float],
+    step: float = STEP,
+    max_dist: float = MAX_DIST,
+) -> PathArray:
+    """Points every ``step`` meters of arc length along the polyline through the main points.
+
+    The polyline starts at the first main point and continues straight along the last
+    point's yaw, so it is always long enough. Points sit at arc lengths step, 2 * step, ...
+    up to ``max_dist``, so consecutive points are never further than ``step`` apart (less
+    only where a chord cuts a corner) and the path is at most ``(n - 1) * step`` long.
+    """
+    n = _budget(step, max_dist)
+    px = array("d")
+    py = array("d")
+    s = array("d")
+    heading = array("d")
+    joins = []
+    last = len(xs) - 1
+    seg_start = 0.0
+    k = 1  # index of the next target arc length, k * step
+    for j in range(last + 1):
+        if k > n:
+            break
+        if j < last:
+            vx = xs[j + 1] - xs[j]
+            vy = ys[j + 1] - ys[j]
+            seg_len = math.hypot(vx, vy)
+            seg_end = seg_start + seg_len
+            # targets on this segment: k * step <= seg_end
+            end = min(n, int(seg_end / step + 1e-9))
+            if seg_len == 0 or end < k:
+                seg_start = seg_end
+                continue
+            ux = vx / seg_len
+            uy = vy / seg_len
+        else:
+            ux = math.cos(yaws[last])
+            uy = math.sin(yaws[last])
+            end = n
+        x0 = xs[j] - seg_start * ux
+        y0 = ys[j] - seg_start * uy
+        ks = range(k, end + 1)
+        first_x = x0 + (k * step) * ux
+        first_y = y0 + (k * step) * uy
+        if px:
+            # the chord from the previous segment's last point cuts the corner
+            gap_x = first_x - px[-1]
+            gap_y = first_y - py[-1]
+            heading[-1] = math.atan2(gap_y, gap_x)
+            s0 = s[-1] + math.hypot(gap_x, gap_y)
+            joins.append(len(px) - 1)
+            joins.append(len(px))
+        else:
+            s0 = 0.0
+        px.extend([x0 + (i * step) * ux for i in ks])
+        py.extend([y0 + (i * step) * uy for i in ks])
+        s.extend([s0 + (i - k) * step for i in ks])
+        heading.extend(array("d", [math.atan2(uy, ux)]) * len(ks))
+        k = end + 1
+        if j < last:
+            seg_start = seg_end
+    return PathArray(px, py, s, heading, _join_curvature(s, heading, joins))
+
+
+def sample_path(
+    xs: Sequence[float],
+    ys: Sequence[float],
+    yaws: Sequence[float],
+    method: str = "steps",
+    step: float = STEP,
+    max_dist: float = MAX_DIST,
+    blue: Sequence[Tuple[float, float]] = (),
+    yellow: Sequence[Tuple[float, float]] = (),
+) -> PathArray:
+    """Sample the main points (xs, ys, yaws) with one of :data:`SAMPLERS`.
+
+    ``blue`` and ``yellow`` are the cone positions the "spline" sampler keeps on their
+    side of the path (see ``src.smoothing``, requires NumPy); the other samplers ignore them.
+    """
+    if method == "steps":
+        return sample_steps(xs, ys, yaws, step, max_dist)
+    if method == "arc":
+        return sample_arc(xs, ys, yaws, step, max_dist)
+    if method == "spline":
+        from src.smoothing import smooth_path
+
+        return smooth_path(xs, ys, yaws, blue, yellow, step, max_dist)
+    valid = ", ".join(SAMPLERS)
+    raise ValueError(f"Unknown sampler '{method}'. Valid options: {valid}")
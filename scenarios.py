@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+import math
+import random
+from typing import Dict, Iterator, List, Tuple
 
 from src.models import CarPose, Cone
+from src.spatial_index import GridIndex
 
 
 _SCENARIOS: Dict[str, Tuple[List[Cone], CarPose]] = {
@@ -315,3 +318,201 @@ def make_scenario(name: str) -> Tuple[List[Cone], CarPose]:
         raise ValueError(f"Unknown scenario '{name}'. Valid options: {valid}")
     cones, car = _SCENARIOS[name]
     return list(cones), CarPose(x=car.x, y=car.y, yaw=car.yaw)
+
+
+TRACK_KINDS = ("mixed", "straight", "hairpin", "chicane", "loop")
+
+# Centreline pieces: ("straight", length) or ("arc", radius, signed angle in radians, + is left)
+_Piece = Tuple
+
+
+TRACK_MARGIN = 3.0  # meters kept beyond the track width between distant parts of a "mixed" track
+_CHECK_SPACING = 1.0  # meters between the centreline samples checked for crossings
+_MAX_TRIES = 20  # rejected pieces in a row before the last accepted piece is taken back
+
+
+def _piece_length(piece: _Piece) -> float:
+    return piece[1] if piece[0] == "straight" else piece[1] * abs(piece[2])
+
+
+def _along(x: float, y: float, yaw: float, piece: _Piece, d: float) -> Tuple[float, float, float]:
+    """The pose ``d`` meters along ``piece`` when it starts at (x, y, yaw)."""
+    if piece[0] == "straight":
+        return x + d * math.cos(yaw), y + d * math.sin(yaw), yaw
+    radius, angle = piece[1], piece[2]
+    turn = angle if d >= _piece_length(piece) else math.copysign(d / radius, angle)
+    # centre of the arc lies on the inside of the turn
+    sign = 1.0 if angle > 0 else -1.0
+    cx = x - sign * radius * math.sin(yaw)
+    cy = y + sign * radius * math.cos(yaw)
+    yaw += turn
+    return cx + sign * radius * math.sin(yaw), cy - sign * radius * math.cos(yaw), yaw
+
+
+def _random_piece(heading: float, min_radius: float, rng: random.Random) -> List[_Piece]:
+    choice = rng.choice(("straight", "straight", "turn", "turn", "hairpin", "chicane"))
+    # turn back towards the start heading so long tracks wind instead of spiralling, and
+    # always once the track points backwards, e.g. after a hairpin
+    side = -1.0 if heading > 0 else 1.0
+    if rng.random() < 0.3 and abs(heading) < math.pi / 2:
+        side = -side
+    if choice == "straight":
+        return [("straight", rng.uniform(10.0, 60.0))]
+    if choice == "turn":
+        return [("arc", rng.uniform(min_radius * 1.5, 30.0), side * rng.uniform(math.pi / 8, math.pi / 2))]
+    if choice == "hairpin":
+        return [("straight", 10.0), ("arc", min_radius, side * math.pi), ("straight", 10.0)]
+    angle = rng.uniform(math.pi / 10, math.pi / 5)
+    return [("arc", 10.0, side * angle), ("arc", 10.0, -2 * side * angle), ("arc", 10.0, side * angle)]
+
+
+def _winding_pieces(length: float, width: float, min_radius: float, rng: random.Random) -> List[_Piece]:
+    """Random pieces of at least ``length`` meters that never bring the track back onto itself.
+
+    A drawn piece is rejected when its centreline comes within ``width + TRACK_MARGIN`` of
+    the centreline laid earlier, away from where it joins on. After ``_MAX_TRIES``
+    rejections in a row the last accepted piece is taken back, and one more piece at every
+    further dead end reached without getting past the previous one, so a track that has
+    wound itself into a corner backs out of it.
+    """
+    clearance = width + TRACK_MARGIN
+    # centreline this close along the track to a new sample is where the piece joins on
+    window = 2 * clearance
+    index = GridIndex.from_coords([0.0], [0.0], cell_size=clearance)
+    arc = [0.0]  # distance along the track of every indexed sample
+    # accepted pieces, each with the pose and distance it starts from and its sample indices
+    placed: List[Tuple[List[_Piece], Tuple[float, float, float], float, List[int]]] = []
+    pose = (0.0, 0.0, 0.0)
+    total = 0.0
+    tries = 0
+    depth = 0  # pieces taken back at the last dead end
+    reached = 0.0  # furthest distance at which the track got stuck
+    while total < length:
+        piece = _random_piece(pose[2], min_radius, rng)
+        samples = []
+        x, y, yaw = pose
+        s = total
+        for p in piece:
+            piece_len = _piece_length(p)
+            d = _CHECK_SPACING
+            while d <= piece_len:
+                samples.append((*_along(x, y, yaw, p, d)[:2], s + d))
+                d += _CHECK_SPACING
+            x, y, yaw = _along(x, y, yaw, p, piece_len)
+            s += piece_len
+        if any(
+            arc[k] < d - window for sx, sy, d in samples for k in index.query_radius(sx, sy, clearance)
+        ):
+            tries += 1
+            if tries >= _MAX_TRIES and placed:
+                # stuck again before getting further than last time: back out further
+                depth = depth + 1 if total <= reached else 1
+                reached = max(reached, total)
+                for _ in range(min(depth, len(placed))):
+                    _, pose, total, indices = placed.pop()
+                    for k in indices:
+                        index.remove(k)
+                tries = 0
+            continue
+        indices = []
+        for sx, sy, d in samples:
+            indices.append(index.add(sx, sy))
+            arc.append(d)
+        placed.append((piece, pose, total, indices))
+        pose = (x, y, yaw)
+        total = s
+        tries = 0
+    return [p for piece, _, _, _ in placed for p in piece]
+
+
+def _track_pieces(kind: str, length: float, width: float, rng: random.Random) -> List[_Piece]:
+    min_radius = max(4.5, width)
+    if kind == "straight":
+        return [("straight", length)]
+    if kind == "hairpin":
+        pattern = [("straight", 20.0), ("arc", min_radius, math.pi), ("straight", 20.0), ("arc", min_radius, -math.pi)]
+    elif kind == "chicane":
+        pattern = [
+            ("straight", 15.0),
+            ("arc", 10.0, math.pi / 6),
+            ("arc", 10.0, -math.pi / 3),
+            ("arc", 10.0, math.pi / 6),
+        ]
+    elif kind == "loop":
+        # stadium: two straights joined by half circles, closing exactly on the start
+        radius = max(min_radius, length / (4 * math.pi))
+        straight = max(0.0, (length - 2 * math.pi * radius) / 2)
+        return [("straight", straight), ("arc", radius, math.pi), ("straight", straight), ("arc", radius, math.pi)]
+    elif kind == "mixed":
+        return _winding_pieces(length, width, min_radius, rng)
+    else:
+        valid = ", ".join(TRACK_KINDS)
+        raise ValueError(f"Unknown track kind '{kind}'. Valid options: {valid}")
+
+    pieces: List[_Piece] = []
+    total = 0.0
+    while total < length:
+        for p in pattern:
+            pieces.append(p)
+            total += _piece_length(p)
+    return pieces
+
+
+def _centreline(pieces: List[_Piece], spacing: float, count: int) -> Iterator[Tuple[float, float, float]]:
+    """Yield ``count`` (x, y, yaw) samples every ``spacing`` meters along the pieces."""
+    x = y = yaw = 0.0
+    next_s = spacing
+    s = 0.0
+    produced = 0
+    for piece in pieces:
+        piece_len = _piece_length(piece)
+        while next_s <= s + piece_len and produced < count:
+            yield _along(x, y, yaw, piece, next_s - s)
+            produced += 1
+            next_s += spacing
+        x, y, yaw = _along(x, y, yaw, piece, piece_len)
+        s += piece_len
+        if produced >= count:
+            return
+
+
+def generate_track(
+    n_cones: int = 200,
+    kind: str = "mixed",
+    seed: int = 0,
+    spacing: float = 2.5,
+    width: float = 3.0,
+    noise: float = 0.0,
+    dropout: float = 0.0,
+    mislabel: float = 0.0,
+) -> Tuple[List[Cone], CarPose]:
+    """Generate a reproducible FSAI-style track with the same contract as ``make_scenario``.
+
+    ``n_cones`` cones (before dropout) are laid out in blue/yellow pairs every ``spacing``
+    meters along a centreline of straights, arcs, hairpins and chicanes, ``width`` meters
+    apart. ``noise`` is the standard deviation of the position error in meters,
+    ``dropout`` the probability that a cone is missing and ``mislabel`` the probability
+    that its colour is flipped. The car starts at the beginning of the centreline, facing
+    along it. The same arguments always produce the same track.
+    """
+    rng = random.Random(seed)
+    pairs = (n_cones + 1) // 2
+    pieces = _track_pieces(kind, (pairs + 1) * spacing, width, rng)
+    half = width / 2
+    cones: List[Cone] = []
+    for x, y, yaw in _centreline(pieces, spacing, pairs):
+        nx, ny = -math.sin(yaw), math.cos(yaw)
+        for side, color in ((1.0, 1), (-1.0, 0)):
+            if len(cones) >= n_cones:
+                break
+            if dropout and rng.random() < dropout:
+                continue
+            cx = x + side * half * nx
+            cy = y + side * half * ny
+            if noise:
+                cx += rng.gauss(0.0, noise)
+                cy += rng.gauss(0.0, noise)
+            if mislabel and rng.random() < mislabel:
+                color = 1 - color
+            cones.append(Cone(x=cx, y=cy, color=color))
+    return cones, CarPose(x=0.0, y=0.0, yaw=0.0)
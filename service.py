@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from src.instrumentation import Instrumentation
+from src.models import CarPose, Cone, Path2D
+from src.path_planning import PathPlanning
+
+
+DEADLINE = 0.05  # seconds a frame may take to plan before the previous path is used instead
+
+
+class PlanResult(NamedTuple):
+    """The path answering a frame and whether it is the previous path standing in for it."""
+
+    frame: int  # sequence number of the frame that was planned, see PlanningService.submit
+    path: Path2D
+    fallback: bool
+    latency_ms: float  # from submitting the frame to publishing its result
+
+
+class ServiceStats(NamedTuple):
+    submitted: int
+    planned: int
+    dropped: int
+    deadline_misses: int
+    queue_depth: int
+    max_queue_depth: int
+
+
+def _plan(car_pose: CarPose, cones: Sequence[Cone], planner_kwargs: Dict[str, Any]) -> Path2D:
+    return PathPlanning(car_pose, cones, **planner_kwargs).generatePath()
+
+
+class _Pending:
+    __slots__ = ("frame", "car_pose", "cones", "submitted", "waiters")
+
+    def __init__(self, frame: int, car_pose: CarPose, cones: Sequence[Cone], submitted: float):
+        self.frame = frame
+        self.car_pose = car_pose
+        self.cones = cones
+        self.submitted = submitted
+        self.waiters: List[asyncio.Future] = []
+
+
+class PlanningService:
+    """Asyncio front end to ``PathPlanning`` for frames arriving faster than they plan.
+
+    :meth:`submit` hands a frame to the service without blocking and returns a future of
+    its :class:`PlanResult`. One frame is planned at a time, on ``executor`` (a private
+    single-thread pool by default), so the event loop keeps running meanwhile. Frames
+    submitted while another is planning wait in a single slot: a newer frame replaces the
+    waiting one, which is counted as dropped, and the futures of both resolve with the
+    newer frame's result. The queue therefore never holds more than one stale frame.
+
+    A frame not planned within ``deadline`` seconds of leaving the slot resolves with the
+    previous path instead and counts as a deadline miss. The planning itself cannot be
+    cancelled; it runs to completion in the background and its path becomes the previous
+    path. Frames taken while it is still running wait for it at most ``deadline`` seconds
+    and otherwise also resolve with the previous path, unplanned.
+
+    Use it as an async context manager, or call :meth:`start` and :meth:`stop`. Extra
+    keyword arguments are passed to ``PathPlanning``; with a process pool executor they
+    must be picklable.
+    """
+
+    def __init__(
+        self,
+        deadline: float = DEADLINE,
+        executor: Optional[Executor] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        **planner_kwargs,
+    ):
+        if deadline <= 0:
+            raise ValueError(f"deadline must be positive, got {deadline}")
+        self.deadline = deadline
+        self.instrumentation = instrumentation
+        self.planner_kwargs = planner_kwargs
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._pending: Optional[_Pending] = None
+        self._current: Optional[_Pending] = None  # taken from the slot, not answered yet
+        self._planning: Optional[asyncio.Future] = None  # the latest planning, possibly still running
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_path: Path2D = []
+        self.submitted = 0
+        self.planned = 0
+        self.dropped = 0
+        self.deadline_misses = 0
+        self.max_queue_depth = 0
+
+    @property
+    def last_path(self) -> Path2D:
+        return self._last_path
+
+    @property
+    def queue_depth(self) -> int:
+        """Frames waiting to be planned, not counting the one planning now."""
+        return 0 if self._pending is None else 1
+
+    def stats(self) -> ServiceStats:
+        return ServiceStats(
+            self.submitted, self.planned, self.dropped, self.deadline_misses, self.queue_depth, self.max_queue_depth
+        )
+
+    async def __aenter__(self) -> PlanningService:
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    def start(self) -> None:
+        if self._task is not None:
+            raise RuntimeError("service already started")
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="planner")
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop planning; futures of frames not answered yet are cancelled.
+
+        A planning still running is awaited, without blocking the event loop, before a
+        private executor is shut down.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        for pending in (self._current, self._pending):
+            if pending is not None:
+                for waiter in pending.waiters:
+                    waiter.cancel()
+        self._current = None
+        self._pending = None
+        if self._planning is not None and not self._planning.done():
+            await asyncio.wait([self._planning])
+        self._planning = None
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def submit(self, car_pose: CarPose, cones: Sequence[Cone]) -> asyncio.Future:
+        """Queue a frame, superseding any frame still waiting; returns a future of its result."""
+        if self._task is None:
+            raise RuntimeError("start() the service before submitting frames")
+        waiter = asyncio.get_running_loop().create_future()
+        pose = CarPose(car_pose.x, car_pose.y, car_pose.yaw)
+        pending = _Pending(self.submitted, pose, cones, time.perf_counter())
+        self.submitted += 1
+        if self._pending is not None:
+            pending.waiters = self._pending.waiters
+            self.dropped += 1
+            if self.instrumentation is not None:
+                self.instrumentation.count("frames_dropped")
+        pending.waiters.append(waiter)
+        self._pending = pending
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        self._wakeup.set()
+        return waiter
+
+    async def plan(self, car_pose: CarPose, cones: Sequence[Cone]) -> PlanResult:
+        """Submit a frame and wait for its result (or the result of a frame superseding it)."""
+        return await self.submit(car_pose, cones)
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            pending, self._pending = self._pending, None
+            if pending is None:
+                continue
+            # kept until it is answered, so stop() can cancel its waiters
+            self._current = pending
+            await self._serve(pending)
+            self._current = None
+
+    async def _serve(self, pending: _Pending) -> None:
+        loop = asyncio.get_running_loop()
+        # the deadline runs from when the frame is taken, including any wait for the planner
+        deadline = loop.time() + self.deadline
+        busy = self._planning
+        if busy is not None and not busy.done():
+            # an earlier frame missed its deadline and is still planning
+            await asyncio.wait([busy], timeout=self.deadline)
+            if not busy.done():
+                # still stuck on it: answer this frame from the previous path, do not plan it
+                self._publish(pending, self._last_path, True)
+                return
+
+        future = loop.run_in_executor(self._executor, _plan, pending.car_pose, pending.cones, self.planner_kwargs)
+        future.add_done_callback(self._planned)
+        self._planning = future
+        try:
+            path = await asyncio.wait_for(asyncio.shield(future), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            self._publish(pending, self._last_path, True)
+        except Exception as exc:
+            _resolve(pending.waiters, exception=exc)
+        else:
+            self._publish(pending, path, False)
+
+    def _planned(self, future: asyncio.Future) -> None:
+        # runs for every finished planning, in time or not; a late path still replaces the previous one
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._last_path = future.result()
+        self.planned += 1
+
+    def _publish(self, pending: _Pending, path: Path2D, fallback: bool) -> None:
+        if fallback:
+            self.deadline_misses += 1
+            if self.instrumentation is not None:
+                self.instrumentation.count("deadline_misses")
+        latency_ms = (time.perf_counter() - pending.submitted) * 1e3
+        _resolve(pending.waiters, PlanResult(pending.frame, path, fallback, latency_ms))
+
+
+def _resolve(waiters: List[asyncio.Future], result: Optional[PlanResult] = None, exception: Optional[BaseException] = None) -> None:
+    for waiter in waiters:
+        if waiter.done():
+            continue
+        if exception is not None:
+            waiter.set_exception(exception)
+        else:
+            waiter.set_result(result)
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import math
+from typing import Sequence, Tuple
+
+from src.models import PathArray
+from src.sampling import MAX_DIST, STEP
+
+
+MIN_SAMPLES_PER_SPAN = 4  # spline evaluations per span for the arc-length table, at least
+
+
+def _tangents(p, h, straight):
+    """Unit-speed tangents of a chord-length cubic Hermite spline through ``p``.
+
+    Interior tangents blend the neighbouring chord directions weighted by the opposite
+    chord length (Bessel tangents), the ends use their chord. Both ends of a span flagged
+    in ``straight`` take that span's chord, which turns it into the straight segment.
+    """
+    import numpy as np
+
+    d = np.diff(p, axis=0) / h[:, None]
+    m = np.empty_like(p)
+    m[0] = d[0]
+    m[-1] = d[-1]
+    if len(p) > 2:
+        w0 = h[1:, None]
+        w1 = h[:-1, None]
+        m[1:-1] = (d[:-1] * w0 + d[1:] * w1) / (w0 + w1)
+    for i in np.flatnonzero(straight):
+        m[i] = d[i]
+        m[i + 1] = d[i]
+    return m
+
+
+def _hermite(p, m, h, span, u):
+    """Position, first and second derivative (per meter of parameter) on ``span`` at ``u``."""
+    p0, p1 = p[span], p[span + 1]
+    t0 = m[span] * h[span][:, None]
+    t1 = m[span + 1] * h[span][:, None]
+    u = u[:, None]
+    u2 = u * u
+    u3 = u2 * u
+    pos = (2 * u3 - 3 * u2 + 1) * p0 + (u3 - 2 * u2 + u) * t0 + (-2 * u3 + 3 * u2) * p1 + (u3 - u2) * t1
+    d1 = (6 * u2 - 6 * u) * p0 + (3 * u2 - 4 * u + 1) * t0 + (-6 * u2 + 6 * u) * p1 + (3 * u2 - 2 * u) * t1
+    d2 = (12 * u - 6) * p0 + (6 * u - 4) * t0 + (-12 * u + 6) * p1 + (6 * u - 2) * t1
+    scale = h[span][:, None]
+    return pos, d1 / scale, d2 / (scale * scale)
+
+
+def _side_violations(path, cones, sign):
+    """Which ``cones`` lie on the wrong side of ``path`` and the segment they were judged on.
+
+    Every cone is judged against its nearest segment of the (N, 2) polyline ``path``;
+    ``sign`` is -1 for blue (must be left) and +1 for yellow (must be right). Cones that
+    project before the start or past the end of the path are never violations. Returns a
+    (C,) bool mask and the (C,) nearest segment indices.
+    """
+    import numpy as np
+
+    if not len(cones) or len(path) < 2:
+        return np.zeros(len(cones), dtype=bool), np.zeros(len(cones), dtype=np.intp)
+    a = path[:-1]
+    v = path[1:] - a
+    len2 = (v * v).sum(axis=1)
+    rel = cones[:, None, :] - a[None, :, :]
+    t = np.divide((rel * v).sum(axis=2), len2, out=np.zeros(rel.shape[:2]), where=len2 > 0)
+    closest = np.clip(t, 0.0, 1.0)[..., None] * v
+    d2 = ((rel - closest) ** 2).sum(axis=2)
+    seg = np.argmin(d2, axis=1)
+    idx = np.arange(len(cones))
+    t_seg = t[idx, seg]
+    beyond = ((seg == 0) & (t_seg < 0)) | ((seg == len(a) - 1) & (t_seg > 1))
+    cross = v[seg, 0] * rel[idx, seg, 1] - v[seg, 1] * rel[idx, seg, 0]
+    return ~beyond & (sign * cross >= 0), seg
+
+
+def spline_arrays(
+    pts,
+    blue,
+    yellow,
+    step: float = STEP,
+    max_dist: float = MAX_DIST,
+) -> Tuple:
+    """Sample a smooth spline through the (x, y, yaw) rows ``pts`` every ``step`` meters.
+
+    The spline is a chord-length cubic Hermite spline through the main points (skipping any
+    closer than ``step`` to the previous one), continued straight along the last yaw. Points sit at arc lengths step, 2 * step, ... up to
+    ``max_dist``, like ``src.sampling.sample_arc``. When the curve puts a ``blue`` cone
+    right of the path or a ``yellow`` cone left of it and the straight chain did not, the
+    spans around that cone are straightened, so the result keeps the side guarantees of
+    the corrected chain.
+
+    Returns (x, y, s, heading, curvature) NumPy arrays; heading and curvature come from the
+    spline's derivatives rather than from finite differences.
+    """
+    import numpy as np
+
+    pts = np.asarray(pts, dtype=float)
+    blue = np.asarray(blue, dtype=float).reshape(-1, 2)
+    yellow = np.asarray(yellow, dtype=float).reshape(-1, 2)
+    n = max(0, int(max_dist / step + 1e-9))
+
+    # continue straight along the last yaw so the spline is always long enough
+    yaw = pts[-1, 2]
+    direction = np.array([math.cos(yaw), math.sin(yaw)])
+    chain = pts[:, :2]
+    reach = max(max_dist - float(np.hypot(*np.diff(chain, axis=0).T).sum()), 0.0) + step
+    chain = np.vstack((chain, chain[-1] + reach * direction))
+    sides = ((blue, -1.0), (yellow, 1.0))
+    chain_ok = [~_side_violations(chain, cones, sign)[0] for cones, sign in sides]
+
+    # main points closer than a step to the previous one would only add kinks
+    keep = [0]
+    for i in range(1, len(chain) - 1):
+        if math.hypot(*(chain[i] - chain[keep[-1]])) >= step:
+            keep.append(i)
+    keep.append(len(chain) - 1)
+    p = chain[keep]
+    h = np.hypot(*np.diff(p, axis=0).T)
+    spans = len(h)
+
+    # arc-length table: the start plus ``counts[i]`` evaluations on every span, ending at u = 1
+    counts = np.maximum(MIN_SAMPLES_PER_SPAN, np.ceil(h / (step / 4)).astype(int))
+    table_span = np.concatenate(([0], np.repeat(np.arange(spans), counts)))
+    first = np.repeat(np.cumsum(counts) - counts, counts)
+    table_u = np.concatenate(([0.0], (np.arange(int(counts.sum())) - first + 1) / np.repeat(counts, counts)))
+    straight = np.zeros(spans, dtype=bool)
+    targets = step * np.arange(1, n + 1)
+
+    for _ in range(spans + 1):
+        m = _tangents(p, h, straight)
+        dense, _, _ = _hermite(p, m, h, table_span, table_u)
+        cum = np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(dense, axis=0).T))))
+        # invert the arc-length table: target -> (span, u), between table entries k and k + 1
+        pos = np.interp(targets, cum, np.arange(len(cum), dtype=float))
+        k = np.minimum(pos.astype(int), len(cum) - 2)
+        span = table_span[k + 1]
+        u0 = np.where(table_span[k] == span, table_u[k], 0.0)
+        u = u0 + (pos - k) * (table_u[k + 1] - u0)
+        xy, d1, d2 = _hermite(p, m, h, span, u)
+
+        path = np.vstack((p[:1], xy))
+        segs = []
+        for (cones, sign), ok in zip(sides, chain_ok):
+            wrong, seg = _side_violations(path, cones, sign)
+            segs.append(seg[wrong & ok])
+        seg = np.concatenate(segs)
+        # path segment j runs from sample j - 1 (the start for j = 0) to sample j
+        bad_spans = np.unique(np.concatenate((span[seg], span[np.maximum(seg - 1, 0)])))
+        bad_spans = bad_spans[~straight[bad_spans]]
+        if not len(bad_spans):
+            break
+        straight[bad_spans] = True
+
+    x = np.ascontiguousarray(xy[:, 0])
+    y = np.ascontiguousarray(xy[:, 1])
+    s = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y))))) if n else np.empty(0)
+    heading = np.arctan2(d1[:, 1], d1[:, 0])
+    speed2 = d1[:, 0] ** 2 + d1[:, 1] ** 2
+    cross = d1[:, 0] * d2[:, 1] - d1[:, 1] * d2[:, 0]
+    curvature = np.divide(cross, speed2 ** 1.5, out=np.zeros(len(cross)), where=speed2 > 0)
+    return x, y, s, heading, curvature
+
+
+def smooth_path(
+    xs: Sequence[float],
+    ys: Sequence[float],
+    yaws: Sequence[float],
+    blue: Sequence[Tuple[float, float]] = (),
+    yellow: Sequence[Tuple[float, float]] = (),
+    step: float = STEP,
+    max_dist: float = MAX_DIST,
+) -> PathArray:
+    """:func:`spline_arrays` for main points given as columns, returned as a ``PathArray``."""
+    return PathArray(*spline_arrays(list(zip(xs, ys, yaws)), blue, yellow, step, max_dist))
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import math
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+SCAN_LIMIT = 24  # up to this many points the index keeps no grid and queries scan them all
+
+
+class GridIndex:
+    """Uniform grid over 2D points for nearest-neighbour and box queries.
+
+    Points are any objects with ``x``/``y`` attributes (``Cone``, ``CarPose``) and are
+    referred to by their position in the sequence given at construction. Removing items
+    turns ``nearest`` into a nearest-unvisited query, which is what the chain sort needs.
+    Ties are broken by the lowest index, matching ``min()`` over the original list.
+
+    With at most ``SCAN_LIMIT`` points no grid is built: a scan over a handful of points
+    beats hashing them into cells, and the planner's frames rarely hold more cones than
+    that. The grid is built once ``add`` takes the index past the limit.
+    """
+
+    def __init__(self, points: Sequence, cell_size: float = 2.0):
+        self._build([p.x for p in points], [p.y for p in points], cell_size)
+
+    @classmethod
+    def from_coords(cls, xs: Sequence[float], ys: Sequence[float], cell_size: float = 2.0) -> GridIndex:
+        """Build an index from parallel coordinate sequences instead of point objects."""
+        index = cls.__new__(cls)
+        index._build(list(xs), list(ys), cell_size)
+        return index
+
+    def _build(self, xs: List[float], ys: List[float], cell_size: float) -> None:
+        if cell_size <= 0:
+            raise ValueError(f"cell_size must be positive, got {cell_size}")
+        self.cell_size = cell_size
+        self._xs = xs
+        self._ys = ys
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._count = 0
+        self._min_key = (0, 0)
+        self._max_key = (0, 0)
+        # remaining indices in ascending order while there is no grid, else None
+        self._scan: Optional[List[int]] = None
+        if len(xs) <= SCAN_LIMIT:
+            self._scan = list(range(len(xs)))
+            self._count = len(xs)
+            return
+        for i in range(len(self._xs)):
+            self._insert(i)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _key(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def _insert(self, i: int) -> None:
+        key = self._key(self._xs[i], self._ys[i])
+        cell = self._cells.get(key)
+        if cell is None:
+            self._cells[key] = [i]
+        else:
+            cell.append(i)
+        if self._count == 0:
+            self._min_key = self._max_key = key
+        else:
+            self._min_key = (min(self._min_key[0], key[0]), min(self._min_key[1], key[1]))
+            self._max_key = (max(self._max_key[0], key[0]), max(self._max_key[1], key[1]))
+        self._count += 1
+
+    def add(self, x: float, y: float) -> int:
+        """Insert a new point and return its index."""
+        self._xs.append(x)
+        self._ys.append(y)
+        i = len(self._xs) - 1
+        if self._scan is None:
+            self._insert(i)
+        elif len(self._scan) < SCAN_LIMIT:
+            self._scan.append(i)
+            self._count += 1
+        else:
+            remaining, self._scan = self._scan + [i], None
+            self._count = 0
+            for j in remaining:
+                self._insert(j)
+        return i
+
+    def remove(self, i: int) -> None:
+        """Remove item ``i`` so later queries skip it."""
+        if self._scan is not None:
+            self._scan.remove(i)
+            self._count -= 1
+            return
+        key = self._key(self._xs[i], self._ys[i])
+        cell = self._cells[key]
+        cell.remove(i)
+        if not cell:
+            del self._cells[key]
+        self._count -= 1
+
+    @property
+    def garbage(self) -> int:
+        """Removed points still held in the coordinate lists, see :meth:`compact`."""
+        return len(self._xs) - self._count
+
+    def compact(self) -> Dict[int, int]:
+        """Drop removed points from storage and renumber the rest in their previous order.
+
+        Returns the mapping from old to new indices; callers holding indices must remap them.
+        """
+        if self._scan is not None:
+            live = list(self._scan)
+        else:
+            live = sorted(i for cell in self._cells.values() for i in cell)
+        xs, ys = self._xs, self._ys
+        self._build([xs[i] for i in live], [ys[i] for i in live], self.cell_size)
+        return {old: new for new, old in enumerate(live)}
+
+    def nearest(self, x: float, y: float) -> Optional[int]:
+        """Return the index of the remaining point closest to (x, y), or None if empty."""
+        if not self._count:
+            return None
+        xs, ys = self._xs, self._ys
+        if self._scan is not None:
+            best = -1
+            best_d = math.inf
+            hypot = math.hypot
+            for i in self._scan:
+                d = hypot(xs[i] - x, ys[i] - y)
+                if d < best_d:
+                    best, best_d = i, d
+            return best
+        kx, ky = self._key(x, y)
+        max_ring = max(
+            abs(kx - self._min_key[0]),
+            abs(kx - self._max_key[0]),
+            abs(ky - self._min_key[1]),
+            abs(ky - self._max_key[1]),
+        )
+        best = -1
+        best_d = math.inf
+        ring = 0
+        while ring <= max_ring:
+            if (2 * ring + 1) ** 2 > self._count:
+                # more cells visited than points left: scan the points directly
+                for cell in self._cells.values():
+                    for i in cell:
+                        d = math.hypot(xs[i] - x, ys[i] - y)
+                        if d < best_d or (d == best_d and i < best):
+                            best, best_d = i, d
+                return best
+            for cell in self._ring(kx, ky, ring):
+                for i in cell:
+                    d = math.hypot(xs[i] - x, ys[i] - y)
+                    if d < best_d or (d == best_d and i < best):
+                        best, best_d = i, d
+            # anything in the next ring is at least ring * cell_size away
+            if best >= 0 and best_d < ring * self.cell_size:
+                break
+            ring += 1
+        return best
+
+    def _ring(self, kx: int, ky: int, ring: int):
+        cells = self._cells
+        if ring == 0:
+            cell = cells.get((kx, ky))
+            if cell:
+                yield cell
+            return
+        for dx in range(-ring, ring + 1):
+            for key in ((kx + dx, ky - ring), (kx + dx, ky + ring)):
+                cell = cells.get(key)
+                if cell:
+                    yield cell
+        for dy in range(-ring + 1, ring):
+            for key in ((kx - ring, ky + dy), (kx + ring, ky + dy)):
+                cell = cells.get(key)
+                if cell:
+                    yield cell
+
+    def query_radius(self, x: float, y: float, radius: float) -> List[int]:
+        """Return the sorted indices of the remaining points within ``radius`` of (x, y)."""
+        xs, ys = self._xs, self._ys
+        return [
+            i
+            for i in self.query_box(x - radius, y - radius, x + radius, y + radius)
+            if math.hypot(xs[i] - x, ys[i] - y) <= radius
+        ]
+
+    def query_box(self, xmin: float, ymin: float, xmax: float, ymax: float) -> List[int]:
+        """Return the sorted indices of the remaining points inside the closed box."""
+        xs, ys = self._xs, self._ys
+        if self._scan is not None:
+            return [i for i in self._scan if xmin <= xs[i] <= xmax and ymin <= ys[i] <= ymax]
+        kx0, ky0 = self._key(xmin, ymin)
+        kx1, ky1 = self._key(xmax, ymax)
+        kx0, ky0 = max(kx0, self._min_key[0]), max(ky0, self._min_key[1])
+        kx1, ky1 = min(kx1, self._max_key[0]), min(ky1, self._max_key[1])
+        found = []
+        if (kx1 - kx0 + 1) * (ky1 - ky0 + 1) > len(self._cells):
+            cells = [cell for key, cell in self._cells.items() if kx0 <= key[0] <= kx1 and ky0 <= key[1] <= ky1]
+        else:
+            cells = [self._cells.get((kx, ky)) for kx in range(kx0, kx1 + 1) for ky in range(ky0, ky1 + 1)]
+        for cell in cells:
+            if not cell:
+                continue
+            for i in cell:
+                if xmin <= xs[i] <= xmax and ymin <= ys[i] <= ymax:
+                    found.append(i)
+        found.sort()
+        return found
+
+
+def chain_sort(points: Sequence, x: float, y: float, cell_size: float = 2.0, deadline: Optional[float] = None) -> List:
+    """Order ``points`` as a nearest-neighbour chain starting from (x, y).
+
+    With a ``deadline`` (a ``time.perf_counter()`` value) the chain may stop early once it
+    has passed and only its beginning is returned.
+    """
+    if len(points) <= SCAN_LIMIT and deadline is None:
+        # few points: repeated scans of the ones left beat building and querying an index;
+        # ``left`` keeps the input order, so ties still go to the lowest index
+        hypot = math.hypot
+        left = list(points)
+        ordered = []
+        while left:
+            best = 0
+            best_d = math.inf
+            for k, point in enumerate(left):
+                d = hypot(point.x - x, point.y - y)
+                if d < best_d:
+                    best, best_d = k, d
+            point = left.pop(best)
+            ordered.append(point)
+            x, y = point.x, point.y
+        return ordered
+
+    index = GridIndex(points, cell_size=cell_size)
+    ordered = []
+    while len(index):
+        if deadline is not None and len(ordered) % 32 == 0 and time.perf_counter() >= deadline:
+            break
+        k = index.nearest(x, y)
+        index.remove(k)
+        point = points[k]
+        ordered.append(point)
+        x, y = point.x, point.y
+    return ordered
+
+
+class ChainCache:
+    """The last chain of one boundary, reused by :meth:`sort` for the next frame.
+
+    From one frame to the next the car passes the first cones of a chain and new cones
+    appear at its far end; most of the chain in between stays the same. :meth:`sort`
+    returns exactly what ``chain_sort`` would. It follows the previous chain from the
+    new first cone for as long as every step provably picks the same next cone. A step
+    is kept when its next cone is still there and no newly added cone is closer, since
+    removing other cones cannot change a nearest neighbour. The rest is chain-sorted
+    afresh from where the reuse stopped. Up to ``SCAN_LIMIT`` points are always sorted
+    afresh. Points must be hashable, like ``Cone``.
+    """
+
+    def __init__(self):
+        self._chain: List = []
+        self._rank: Dict = {}  # input position of every chained point, for tie-breaking
+        self.reused = 0  # points of the last sort taken over from the previous chain
+
+    def reset(self) -> None:
+        self._chain = []
+        self._rank = {}
+        self.reused = 0
+
+    def sort(self, points: Sequence, x: float, y: float) -> List:
+        """Same as ``chain_sort(points, x, y)``, reusing the previous chain where it still holds."""
+        self.reused = 0
+        if len(points) <= SCAN_LIMIT:
+            # a handful of points sorts faster than the previous chain can be checked
+            self._chain, self._rank = [], {}
+            return chain_sort(points, x, y)
+        rank = {p: i for i, p in enumerate(points)}
+        ordered = self._follow(points, rank, x, y) if len(rank) == len(points) else []
+        self.reused = len(ordered)
+        if ordered:
+            taken = set(ordered)
+            rest = chain_sort([p for p in points if p not in taken], ordered[-1].x, ordered[-1].y)
+            ordered.extend(rest)
+        else:
+            ordered = chain_sort(points, x, y)
+        self._chain = ordered
+        self._rank = rank
+        return ordered
+
+    def _follow(self, points: Sequence, rank: Dict, x: float, y: float) -> List:
+        """The longest prefix of the new chain that repeats the previous one."""
+        chain = self._chain
+        if not chain or not points:
+            return []
+        old_rank = self._rank
+        # ties go to the lower input position, so the points kept must keep their order
+        kept = [old_rank[p] for p in points if p in old_rank]
+        if any(a > b for a, b in zip(kept, kept[1:])):
+            return []
+        added = [p for p in points if p not in old_rank]
+        if len(added) > SCAN_LIMIT:
+            return []
+
+        hypot = math.hypot
+        first = min(points, key=lambda p: (hypot(p.x - x, p.y - y), rank[p]))
+        try:
+            start = chain.index(first)
+        except ValueError:
+            return []
+        # the chain must start afresh at ``first``: nothing before it may still be there
+        if any(p in rank for p in chain[:start]):
+            return []
+        ordered = [chain[start]]
+        for k in range(start, len(chain) - 1):
+            here = chain[k]
+            after = chain[k + 1]
+            if after not in rank:
+                break
+            d = hypot(after.x - here.x, after.y - here.y)
+            closer = False
+            for a in added:
+                da = hypot(a.x - here.x, a.y - here.y)
+                if da < d or (da == d and rank[a] < rank[after]):
+                    closer = True
+                    break
+            if closer:
+                break
+            ordered.append(after)
+        return ordered
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from src.cache import yaw_cell
+from src.culling import corridor_indices
+from src.instrumentation import Instrumentation
+from src.memory import PlanMemory
+from src.models import CarPose, Cone, Path2D
+from src.path_planning import PathPlanning
+from src.prediction import BoundaryTracker
+from src.spatial_index import GridIndex
+
+
+POSE_RESOLUTION = 0.02  # meters, poses closer than this on the grid count as the same pose
+YAW_RESOLUTION = 0.005  # radians, the same for the heading
+MIN_GARBAGE = 1024  # removed cones kept in the index before it may be compacted
+
+
+class StreamingPlanner:
+    """Stateful planner fed with cone deltas instead of full cone lists.
+
+    The planner keeps every cone it has been told about in a spatial index, so applying a
+    frame's additions and removals costs O(changes) and only the cones within ``horizon``
+    meters of the car are handed to ``PathPlanning``. When neither the pose, on a grid of
+    ``pose_resolution`` meters and ``yaw_resolution`` radians, nor the cones in that window
+    changed since the previous frame, the previous path is returned as is. Otherwise the
+    frame is planned with a ``PlanMemory`` carried across frames, which reuses the sorted
+    boundaries and pairings of the previous frame for the cones that did not change (see
+    ``src.memory``). Per-frame latency therefore depends on the local cone density, not on
+    the map size. Once more cones have been removed than are left, and at least
+    ``MIN_GARBAGE``, the index is compacted so a long run does not grow its storage.
+    With ``fov`` set, the window is further narrowed to that field of view ahead of the car.
+    With ``predictive`` set, a ``BoundaryTracker`` carried across frames predicts the
+    midline while one side of the track has at most one cone in view.
+    """
+
+    def __init__(
+        self,
+        horizon: float = 30.0,
+        cell_size: float = 2.0,
+        backend: str = "python",
+        matcher: str = "greedy",
+        instrumentation: Optional[Instrumentation] = None,
+        fov: Optional[float] = None,
+        predictive: bool = False,
+        pose_resolution: float = POSE_RESOLUTION,
+        yaw_resolution: float = YAW_RESOLUTION,
+    ):
+        if pose_resolution <= 0 or yaw_resolution <= 0:
+            raise ValueError("pose_resolution and yaw_resolution must be positive")
+        self.horizon = horizon
+        self.fov = fov
+        self.backend = backend
+        self.matcher = matcher
+        self.instrumentation = instrumentation
+        self.tracker = BoundaryTracker() if predictive else None
+        self.memory = PlanMemory() if backend == "python" else None
+        self.pose_resolution = pose_resolution
+        self.yaw_resolution = yaw_resolution
+        self._index = GridIndex([], cell_size=cell_size)
+        self._ids: Dict[Cone, int] = {}
+        self._cones: Dict[int, Cone] = {}
+        self._last_key: Optional[Tuple[Tuple[int, int, int], FrozenSet[int]]] = None
+        self._last_path: Path2D = []
+        self.frames = 0
+        self.replans = 0
+
+    @property
+    def cones(self) -> List[Cone]:
+        """All cones currently in the map, in insertion order."""
+        return list(self._cones.values())
+
+    @property
+    def last_path(self) -> Path2D:
+        return self._last_path
+
+    def add(self, cones: Iterable[Cone]) -> None:
+        for cone in cones:
+            if cone in self._ids:
+                continue
+            i = self._index.add(cone.x, cone.y)
+            self._ids[cone] = i
+            self._cones[i] = cone
+
+    def remove(self, cones: Iterable[Cone]) -> None:
+        for cone in cones:
+            i = self._ids.pop(cone, None)
+            if i is None:
+                continue
+            self._index.remove(i)
+            del self._cones[i]
+        garbage = self._index.garbage
+        if garbage >= MIN_GARBAGE and garbage > len(self._index):
+            self._compact()
+
+    def _compact(self) -> None:
+        renumber = self._index.compact()
+        self._ids = {cone: renumber[i] for cone, i in self._ids.items()}
+        self._cones = {renumber[i]: cone for i, cone in self._cones.items()}
+        self._last_key = None
+
+    def reset(self) -> None:
+        self.remove(list(self._ids))
+        self._last_key = None
+        self._last_path = []
+        if self.tracker is not None:
+            self.tracker.reset()
+        if self.memory is not None:
+            self.memory.reset()
+
+    def local_cones(self, car_pose: CarPose) -> List[Cone]:
+        """Cones within ``horizon`` (and ``fov``) of the car, in insertion order."""
+        return [self._cones[i] for i in self._local_ids(car_pose)]
+
+    def _local_ids(self, car_pose: CarPose) -> List[int]:
+        ids = self._index.query_radius(car_pose.x, car_pose.y, self.horizon)
+        if self.fov is None:
+            return ids
+        xs = [self._cones[i].x for i in ids]
+        ys = [self._cones[i].y for i in ids]
+        return [ids[k] for k in corridor_indices(xs, ys, car_pose, self.horizon, self.fov)]
+
+    def _pose_key(self, car_pose: CarPose) -> Tuple[int, int, int]:
+        return (
+            round(car_pose.x / self.pose_resolution),
+            round(car_pose.y / self.pose_resolution),
+            yaw_cell(car_pose.yaw, self.yaw_resolution),
+        )
+
+    def update(
+        self,
+        car_pose: CarPose,
+        new_cones: Iterable[Cone] = (),
+        removed_cones: Iterable[Cone] = (),
+    ) -> Path2D:
+        """Apply a frame's cone changes and return the path for ``car_pose``."""
+        self.remove(removed_cones)
+        self.add(new_cones)
+        self.frames += 1
+
+        ids = self._local_ids(car_pose)
+        if self.instrumentation is not None:
+            self.instrumentation.count("cones_culled", len(self._cones) - len(ids))
+        key = (self._pose_key(car_pose), frozenset(ids))
+        if key == self._last_key:
+            if self.instrumentation is not None:
+                self.instrumentation.count("reused_paths")
+            return self._last_path
+
+        local = [self._cones[i] for i in ids]
+        pose = CarPose(car_pose.x, car_pose.y, car_pose.yaw)
+        planner = PathPlanning(
+            pose,
+            local,
+            backend=self.backend,
+            matcher=self.matcher,
+            instrumentation=self.instrumentation,
+            tracker=self.tracker,
+            memory=self.memory,
+        )
+        self._last_path = planner.generatePath()
+        self._last_key = key
+        self.replans += 1
+        return self._last_path
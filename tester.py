@@ -1,71 +1,264 @@
 from __future__ import annotations
 
-from typing import List
+import math
+import os
+from typing import Iterable, List, Optional, Sequence
 
-import matplotlib.pyplot as plt
-
-from src.models import CarPose, Cone, Path2D
+from src.instrumentation import Instrumentation
+from src.models import CarPose, Cone, Frame, Path2D
 from src.path_planning import PathPlanning
 
 
+FIGURE_FORMATS = ("png", "svg")
+VIEW = (-1.0, 6.0)  # fixed 7x7 meter world window of the scenario plots
+HEADING_LENGTH = 1.0  # meters, length of the car's heading arrow
+GIF_COLORS = 64  # palette size of animated GIF frames
+PNG_COMPRESSION = 1  # zlib level, PNG encoding dominates the frame time at higher levels
+_NO_POINTS = [[math.nan, math.nan]]  # scatter offsets that draw nothing
+
+
+class SceneRenderer:
+    """One figure with cones, car pose and path that is redrawn in place for every scene.
+
+    The axes and artists are created once; :meth:`update` only swaps their data, which is
+    what makes rendering long sequences cheap. Without ``figure`` the renderer draws on its
+    own Agg canvas and never touches pyplot, so it works without a display. ``window``
+    keeps a square of that many meters centred on the car in view instead of the fixed
+    :data:`VIEW` window.
+    """
+
+    def __init__(self, figure=None, window: Optional[float] = None, dpi: int = 100):
+        if figure is None:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+
+            figure = Figure(figsize=(8, 6), dpi=dpi)
+            FigureCanvasAgg(figure)
+        self.figure = figure
+        self.window = window
+
+        ax = figure.add_subplot()
+        ax.set_aspect("equal", adjustable="box")
+        ax.grid(True, linestyle=":", linewidth=0.5)
+        ax.set_xlabel("X [m]")
+        ax.set_ylabel("Y [m]")
+        ax.set_title("FSAI-Style Cone Track Path Planning Test")
+        ax.set_xlim(*VIEW)
+        ax.set_ylim(*VIEW)
+        self.ax = ax
+
+        empty = [[], []]
+        self._yellow = ax.scatter(*empty, c="gold", edgecolors="black", label="Yellow (Right)")
+        self._blue = ax.scatter(*empty, c="royalblue", edgecolors="black", label="Blue (Left)")
+        self._car = ax.scatter(*empty, c="red", s=60, marker="o", label="Car")
+        self._heading = ax.arrow(0.0, 0.0, HEADING_LENGTH, 0.0, head_width=0.3, head_length=0.4, fc="red", ec="red")
+        (self._path,) = ax.plot(*empty, "-", color="limegreen", linewidth=2.0, label="Planned Path")
+        ax.legend(loc="upper left")
+        self._dynamic = (self._yellow, self._blue, self._path, self._car, self._heading)
+        self._background = None
+        self._background_view = None
+
+    def update(self, cones: Sequence[Cone], car_pose: CarPose, path: Optional[Path2D]) -> None:
+        """Show ``cones``, ``car_pose`` and ``path`` in place of the previous scene."""
+        self._yellow.set_offsets([(c.x, c.y) for c in cones if c.color == 0] or _NO_POINTS)
+        self._blue.set_offsets([(c.x, c.y) for c in cones if c.color == 1] or _NO_POINTS)
+        self._car.set_offsets([(car_pose.x, car_pose.y)])
+        self._heading.set_data(
+            x=car_pose.x,
+            y=car_pose.y,
+            dx=math.cos(car_pose.yaw) * HEADING_LENGTH,
+            dy=math.sin(car_pose.yaw) * HEADING_LENGTH,
+        )
+        if path:
+            self._path.set_data([p[0] for p in path], [p[1] for p in path])
+        else:
+            self._path.set_data([], [])
+        if self.window is not None:
+            # recentre only once the car leaves the middle half of the view, so consecutive
+            # frames share the same axes and background
+            half = self.window / 2
+            (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+            inside = x0 + half / 2 <= car_pose.x <= x1 - half / 2 and y0 + half / 2 <= car_pose.y <= y1 - half / 2
+            if not inside or not math.isclose(x1 - x0, self.window):
+                self.ax.set_xlim(car_pose.x - half, car_pose.x + half)
+                self.ax.set_ylim(car_pose.y - half, car_pose.y + half)
+
+    def draw(self) -> None:
+        """Render the current scene on the figure's Agg canvas.
+
+        Axes, grid, labels and legend are drawn once per view and cached; while the view
+        stays the same only the cones, car and path are drawn over the cached background.
+        """
+        canvas = self.figure.canvas
+        view = (self.ax.get_xlim(), self.ax.get_ylim(), canvas.get_width_height())
+        if self._background is None or view != self._background_view:
+            for artist in self._dynamic:
+                artist.set_visible(False)
+            canvas.draw()
+            for artist in self._dynamic:
+                artist.set_visible(True)
+            self._background = canvas.copy_from_bbox(self.figure.bbox)
+            self._background_view = view
+        else:
+            canvas.restore_region(self._background)
+        for artist in self._dynamic:
+            self.ax.draw_artist(artist)
+
+    def image(self):
+        """The current scene as an RGB ``PIL.Image``."""
+        from PIL import Image
+
+        self.draw()
+        canvas = self.figure.canvas
+        return Image.frombuffer("RGBA", canvas.get_width_height(), bytes(canvas.buffer_rgba()), "raw", "RGBA", 0, 1).convert("RGB")
+
+    def save(self, filename: str) -> None:
+        """Write the current scene to ``filename``; the extension picks PNG or SVG."""
+        fmt = os.path.splitext(filename)[1].lstrip(".").lower()
+        if fmt not in FIGURE_FORMATS:
+            valid = ", ".join(FIGURE_FORMATS)
+            raise ValueError(f"Unknown figure format '{fmt}'. Valid options: {valid}")
+        if fmt == "png":
+            self.image().save(filename, format="png", compress_level=PNG_COMPRESSION)
+        else:
+            self.figure.savefig(filename, format=fmt)
+
+
 class PathTester:
-    """Utility to visualize cones, car pose, and the planned path."""
+    """Utility to visualize cones, car pose, and the planned path.
+
+    By default :meth:`run` opens an interactive pyplot window and blocks until it is
+    closed. With ``headless=True`` the scene is drawn on an Agg canvas instead (pass a
+    shared ``renderer`` to reuse one figure across testers) and can be written out with
+    :meth:`save`. Extra keyword arguments are passed to ``PathPlanning``.
+    """
 
-    def __init__(self, cones: List[Cone], car_pose: CarPose):
+    def __init__(
+        self,
+        cones: List[Cone],
+        car_pose: CarPose,
+        instrumentation: Optional[Instrumentation] = None,
+        headless: bool = False,
+        renderer: Optional[SceneRenderer] = None,
+        **planner_kwargs,
+    ):
         self.cones = cones
         self.car_pose = car_pose
+        self.instrumentation = instrumentation
+        self.headless = headless or renderer is not None
+        self.renderer = renderer
+        self.planner_kwargs = planner_kwargs
 
     def run(self) -> Path2D:
-        planner = PathPlanning(self.car_pose, self.cones)
+        planner = PathPlanning(self.car_pose, self.cones, instrumentation=self.instrumentation, **self.planner_kwargs)
         path = planner.generatePath()
 
         self._plot_scene(path)
         return path
 
+    def save(self, filename: str) -> None:
+        """Write the last scene drawn by :meth:`run` to a PNG or SVG file."""
+        if self.renderer is None:
+            raise RuntimeError("run() must be called before save()")
+        self.renderer.save(filename)
+
     def _plot_scene(self, path: Path2D) -> None:
-        _, ax = plt.subplots(figsize=(8, 6))
-        ax.set_aspect("equal", adjustable="box")
-        ax.grid(True, linestyle=":", linewidth=0.5)
-        ax.set_xlabel("X [m]")
-        ax.set_ylabel("Y [m]")
-        ax.set_title("FSAI-Style Cone Track Path Planning Test")
-        # Fix the visible world window to 6x6 meters centered at the origin
-        ax.set_xlim(-1.0, 6.0)
-        ax.set_ylim(-1.0, 6.0)
-
-        # Plot cones by color
-        yellow_x = [c.x for c in self.cones if c.color == 0]
-        yellow_y = [c.y for c in self.cones if c.color == 0]
-        blue_x = [c.x for c in self.cones if c.color == 1]
-        blue_y = [c.y for c in self.cones if c.color == 1]
-
-        handles = []
-        if yellow_x:
-            h_y = ax.scatter(yellow_x, yellow_y, c="gold", edgecolors="black", label="Yellow (Right)")
-            handles.append(h_y)
-        if blue_x:
-            h_b = ax.scatter(blue_x, blue_y, c="royalblue", edgecolors="black", label="Blue (Left)")
-            handles.append(h_b)
-
-        # Plot car pose and heading arrow
-        ax.scatter([self.car_pose.x], [self.car_pose.y], c="red", s=60, marker="o", label="Car")
-        self._draw_heading_arrow(ax)
-
-        # Plot path if available
-        if path:
-            px = [p[0] for p in path]
-            py = [p[1] for p in path]
-            ax.plot(px, py, "-", color="limegreen", linewidth=2.0, label="Planned Path")
+        if self.headless:
+            if self.renderer is None:
+                self.renderer = SceneRenderer()
+            self.renderer.update(self.cones, self.car_pose, path)
+            return
 
-        if handles:
-            ax.legend(loc="best")
+        import matplotlib.pyplot as plt
 
+        self.renderer = SceneRenderer(plt.figure(figsize=(8, 6)))
+        self.renderer.update(self.cones, self.car_pose, path)
         plt.show()
 
-    def _draw_heading_arrow(self, ax) -> None:
-        import math
 
-        length = 1.0
-        dx = math.cos(self.car_pose.yaw) * length
-        dy = math.sin(self.car_pose.yaw) * length
-        ax.arrow(self.car_pose.x, self.car_pose.y, dx, dy, head_width=0.3, head_length=0.4, fc="red", ec="red")
+def export_scenarios(
+    out_dir: str,
+    fmt: str = "png",
+    names: Optional[Iterable[str]] = None,
+    **planner_kwargs,
+) -> List[str]:
+    """Plan every scenario (or just ``names``) and write one ``<name>.<fmt>`` figure each.
+
+    All figures are drawn on one headless renderer. Extra keyword arguments are passed to
+    ``PathPlanning``. Returns the written file names.
+    """
+    from src.scenarios import get_scenario_names, make_scenario
+
+    if fmt not in FIGURE_FORMATS:
+        valid = ", ".join(FIGURE_FORMATS)
+        raise ValueError(f"Unknown figure format '{fmt}'. Valid options: {valid}")
+    os.makedirs(out_dir, exist_ok=True)
+    renderer = SceneRenderer()
+    written = []
+    for name in names if names is not None else get_scenario_names():
+        cones, car_pose = make_scenario(name)
+        path = PathPlanning(car_pose, cones, **planner_kwargs).generatePath()
+        renderer.update(cones, car_pose, path)
+        filename = os.path.join(out_dir, f"{name}.{fmt}")
+        renderer.save(filename)
+        written.append(filename)
+    return written
+
+
+def render_sequence(
+    frames: Iterable[Frame],
+    filename: str,
+    fps: int = 10,
+    window: Optional[float] = 20.0,
+    dpi: int = 100,
+    **planner_kwargs,
+) -> int:
+    """Plan a replayed sequence of (car_pose, cones) frames and render it as an animation.
+
+    A ``filename`` ending in ".gif" is written with Pillow from :meth:`SceneRenderer.image`
+    frames. A ``filename`` containing a ``{}`` field, such as "frames/{:05d}.png", writes
+    one numbered PNG or SVG per frame instead. Any other extension goes through matplotlib's
+    default movie writer (ffmpeg), which redraws the whole figure for every frame. The view
+    follows the car with a ``window`` meters wide square. Extra keyword arguments are passed
+    to ``PathPlanning``. Returns the number of frames rendered.
+    """
+    renderer = SceneRenderer(window=window, dpi=dpi)
+
+    def scenes():
+        for car_pose, cones in frames:
+            path = PathPlanning(car_pose, cones, **planner_kwargs).generatePath()
+            renderer.update(cones, car_pose, path)
+            yield
+
+    count = 0
+    if "{" in filename:
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        for _ in scenes():
+            renderer.save(filename.format(count))
+            count += 1
+        return count
+
+    if filename.lower().endswith(".gif"):
+        # one palette for the whole animation, from the first frame; the scene colours do not change
+        from PIL import Image
+
+        images = []
+        for _ in scenes():
+            frame = renderer.image()
+            palette = images[0] if images else frame.quantize(GIF_COLORS)
+            images.append(frame.quantize(palette=palette, dither=Image.Dither.NONE))
+        if images:
+            images[0].save(filename, save_all=True, append_images=images[1:], duration=1000 / fps, loop=0)
+        return len(images)
+
+    import matplotlib
+    from matplotlib import animation
+
+    writer = animation.writers[matplotlib.rcParams["animation.writer"]](fps=fps)
+    with writer.saving(renderer.figure, filename, dpi):
+        for _ in scenes():
+            writer.grab_frame()
+            count += 1
+    return count
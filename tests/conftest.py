@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import os
+import random
+import sys
+from typing import List
+
+import pytest
+
+# Ensure project root is on sys.path so the tests import the package as ``src``
+_CURRENT_DIR = os.path.dirname(__file__)
+_PROJECT_ROOT = os.path.abspath(os.path.join(_CURRENT_DIR, os.pardir, os.pardir))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+from src.models import CarPose, Cone, Frame
+from src.scenarios import TRACK_KINDS, generate_track, get_scenario_names, make_scenario
+
+
+RANDOM_FRAMES = 200  # random cone clouds in the ``frames`` fixture
+
+
+def random_frame(rng: random.Random, max_cones: int = 40) -> Frame:
+    """A cloud of up to ``max_cones`` cones ahead of a car at the origin, on a 0.1 m grid so ties occur."""
+    cones = [
+        Cone(round(rng.uniform(-2, 12), 1), round(rng.uniform(-6, 6), 1), rng.randint(0, 1))
+        for _ in range(rng.randint(0, max_cones))
+    ]
+    return CarPose(0.0, 0.0, rng.uniform(-1, 1)), cones
+
+
+def track_frames() -> List[Frame]:
+    """Every scenario plus generated tracks of each kind, clean and noisy."""
+    frames = [make_scenario(name)[::-1] for name in get_scenario_names()]
+    for kind in TRACK_KINDS:
+        for n, noise in ((60, 0.0), (300, 0.0), (300, 0.1)):
+            cones, car_pose = generate_track(n, kind, seed=n, noise=noise)
+            frames.append((car_pose, cones))
+    return frames
+
+
+@pytest.fixture(scope="session")
+def frames() -> List[Frame]:
+    rng = random.Random(1)
+    return track_frames() + [random_frame(rng) for _ in range(RANDOM_FRAMES)]
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import pytest
+
+from src.cache import PlanningCache, cone_fingerprint
+from src.memory import PlanMemory
+from src.models import CarPose, Cone
+from src.prediction import BoundaryTracker
+
+
+def test_fingerprint_ignores_order_but_not_duplicates():
+    a, b = Cone(1.0, 2.0, 0), Cone(3.0, -1.0, 1)
+    assert cone_fingerprint([a, b]) == cone_fingerprint([b, a])
+    assert cone_fingerprint([a, b]) != cone_fingerprint([a, a, b])
+
+
+def test_duplicate_cones_are_planned_separately():
+    cache = PlanningCache()
+    pose = CarPose(0.0, 0.0, 0.0)
+    cones = [Cone(2.0, 1.5, 1), Cone(2.0, -1.5, 0), Cone(5.0, 1.5, 1)]
+    cache.plan(pose, cones)
+    cache.plan(pose, cones + [cones[0]])
+    assert cache.info().misses == 2
+
+
+@pytest.mark.parametrize("option", [{"tracker": BoundaryTracker()}, {"memory": PlanMemory()}])
+def test_stateful_planner_options_are_rejected(option):
+    with pytest.raises(ValueError):
+        PlanningCache(**option)
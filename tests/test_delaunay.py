@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from conftest import track_frames
+from src.delaunay import triangulate
+from src.models import CarPose
+from src.path_planning import PathPlanning
+from src.scenarios import get_scenario_names
+from src.validator import PathValidator
+
+
+# frames whose cones no path can satisfy: in scenario 35 the blue cone at (3, 4) lies
+# right of the car, so both engines leave it on the wrong side
+UNSATISFIABLE = {get_scenario_names().index("35")}
+CHECKS = ("step", "sides", "clearance")
+
+
+@pytest.mark.parametrize("sampler", ["steps", "arc", "spline"])
+def test_midline_keeps_sides_and_clearance(sampler):
+    validator = PathValidator()
+    for i, (car_pose, cones) in enumerate(track_frames()):
+        if i in UNSATISFIABLE:
+            continue
+        planner = PathPlanning(CarPose(car_pose.x, car_pose.y, car_pose.yaw), cones, engine="delaunay", sampler=sampler)
+        result = validator.validate(planner.generatePath(), cones, car_pose)
+        failed = [check.name for check in result.failed if check.name in CHECKS]
+        assert not failed, f"frame {i}: {failed}"
+
+
+def test_triangulation_is_delaunay():
+    for _, cones in track_frames():
+        xs = [c.x for c in cones]
+        ys = [c.y for c in cones]
+        for a, b, c in triangulate(xs, ys):
+            ax, ay, bx, by, cx, cy = xs[a], ys[a], xs[b], ys[b], xs[c], ys[c]
+            assert (bx - ax) * (cy - ay) - (by - ay) * (cx - ax) > 0
+            # no other cone strictly inside the circumcircle
+            for k in range(len(cones)):
+                if k in (a, b, c):
+                    continue
+                dx, dy = xs[k], ys[k]
+                adx, ady, bdx, bdy, cdx, cdy = ax - dx, ay - dy, bx - dx, by - dy, cx - dx, cy - dy
+                det = (
+                    (adx * adx + ady * ady) * (bdx * cdy - cdx * bdy)
+                    - (bdx * bdx + bdy * bdy) * (adx * cdy - cdx * ady)
+                    + (cdx * cdx + cdy * cdy) * (adx * bdy - bdx * ady)
+                )
+                assert det <= 1e-9
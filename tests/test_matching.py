@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import itertools
+import math
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.matching import hungarian, match_cones
+from src.models import Cone
+
+
+def _brute_force(cost) -> float:
+    """Cheapest total cost of assigning min(n, m) rows and columns one to one."""
+    n, m = cost.shape
+    if n > m:
+        cost, n, m = cost.T, m, n
+    return min(sum(cost[i, j] for i, j in enumerate(cols)) for cols in itertools.permutations(range(m), n))
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_hungarian_is_optimal(seed):
+    rng = random.Random(seed)
+    n, m = rng.randint(1, 6), rng.randint(1, 6)
+    # integer costs make ties, which a search relying on unique minima would get wrong
+    cost = np.array([[rng.randint(0, 9) for _ in range(m)] for _ in range(n)], dtype=float)
+    pairs = hungarian(cost)
+    assert len(pairs) == min(n, m)
+    assert len({i for i, _ in pairs}) == len({j for _, j in pairs}) == len(pairs)
+    assert sum(cost[i, j] for i, j in pairs) == pytest.approx(_brute_force(cost))
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_match_hungarian_minimises_pair_distance(seed):
+    rng = random.Random(seed)
+    blue = [Cone(rng.uniform(0, 10), rng.uniform(0, 3), 1) for _ in range(rng.randint(1, 6))]
+    yellow = [Cone(rng.uniform(0, 10), rng.uniform(-3, 0), 0) for _ in range(rng.randint(1, 6))]
+    matching = match_cones(blue, yellow, "hungarian")
+    cost = np.array([[math.hypot(b.x - y.x, b.y - y.y) for y in yellow] for b in blue])
+    total = sum(cost[i, j] for i, j in zip(matching.blue, matching.yellow))
+    assert total == pytest.approx(_brute_force(cost))
+    assert sorted(matching.blue + matching.remaining_blue) == list(range(len(blue)))
+    assert sorted(matching.yellow + matching.remaining_yellow) == list(range(len(yellow)))
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import math
+import random
+from typing import List
+
+import pytest
+
+from src.matching import MatchCache, match_cones
+from src.memory import PlanMemory
+from src.models import CarPose, Cone, Frame
+from src.path_planning import PathPlanning
+from src.scenarios import TRACK_KINDS, generate_track
+from src.spatial_index import ChainCache, chain_sort
+
+
+def drive(kind: str, seed: int, steps: int = 60, window: int = 80) -> List[Frame]:
+    """Consecutive frames of a car driving along a generated track.
+
+    Each frame sees the next ``window`` cones ahead of the car, minus a few dropped at
+    random, in shuffled order every few frames, so cones appear, vanish and move in the
+    input between frames.
+    """
+    rng = random.Random(seed)
+    cones, _ = generate_track(2 * (steps + window), kind, seed=seed, noise=0.05)
+    frames = []
+    for k in range(steps):
+        blue, yellow = cones[2 * k], cones[2 * k + 1]
+        ahead_blue, ahead_yellow = cones[2 * k + 2], cones[2 * k + 3]
+        x, y = (blue.x + yellow.x) / 2, (blue.y + yellow.y) / 2
+        yaw = math.atan2((ahead_blue.y + ahead_yellow.y) / 2 - y, (ahead_blue.x + ahead_yellow.x) / 2 - x)
+        visible = [c for c in cones[2 * k : 2 * k + window] if rng.random() > 0.1]
+        if k % 5 == 4:
+            rng.shuffle(visible)
+        frames.append((CarPose(x, y, yaw), visible))
+    return frames
+
+
+SEQUENCES = [(kind, seed) for kind in TRACK_KINDS for seed in (1, 2)]
+
+
+@pytest.mark.parametrize("kind,seed", SEQUENCES)
+def test_chain_cache_matches_chain_sort(kind, seed):
+    caches = {0: ChainCache(), 1: ChainCache()}
+    reused = 0
+    for car_pose, cones in drive(kind, seed):
+        for color, cache in caches.items():
+            side = [c for c in cones if c.color == color]
+            assert cache.sort(side, car_pose.x, car_pose.y) == chain_sort(side, car_pose.x, car_pose.y)
+            reused += cache.reused
+    assert reused
+
+
+@pytest.mark.parametrize("kind,seed", SEQUENCES)
+def test_match_cache_matches_greedy(kind, seed):
+    cache = MatchCache()
+    reused = 0
+    for _, cones in drive(kind, seed):
+        blue = [c for c in cones if c.color == 1]
+        yellow = [c for c in cones if c.color == 0]
+        assert cache.match(blue, yellow) == match_cones(blue, yellow, "greedy")
+        reused += cache.reused
+    assert reused
+
+
+@pytest.mark.parametrize("kind,seed", SEQUENCES)
+def test_plan_memory_matches_fresh_planning(kind, seed):
+    memory = PlanMemory()
+    reused = 0
+    for i, (car_pose, cones) in enumerate(drive(kind, seed)):
+        fresh = PathPlanning(CarPose(car_pose.x, car_pose.y, car_pose.yaw), cones).generatePath()
+        remembered = PathPlanning(CarPose(car_pose.x, car_pose.y, car_pose.yaw), cones, memory=memory).generatePath()
+        assert list(remembered) == list(fresh), f"frame {i}"
+        reused += memory.blue.reused + memory.yellow.reused + memory.pairs.reused
+    assert reused
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from src.models import PathArray
+
+
+def test_repeated_points_keep_the_previous_heading():
+    # straight back along -x, with a point repeated in the middle and at both ends
+    path = PathArray([0.0, 0.0, -1.0, -1.0, -2.0, -2.0], [0.0, 0.0, 0.0, 0.0, 0.0, 0.0])
+    assert list(path.heading) == pytest.approx([math.pi] * 6)
+    assert list(path.curvature) == pytest.approx([0.0] * 6)
+
+
+def test_empty_path_raises_value_error():
+    path = PathArray([], [])
+    assert path.length == 0.0
+    with pytest.raises(ValueError):
+        path.point_at(0.0)
+    with pytest.raises(ValueError):
+        path.heading_at(0.0)
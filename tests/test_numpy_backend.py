@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from src.bench import BACKEND_TOLERANCE, path_deviation
+from src.models import CarPose, ConeArray
+from src.path_planning import PathPlanning
+
+
+def _plan(frame, **planner_kwargs):
+    car_pose, cones = frame
+    return PathPlanning(CarPose(car_pose.x, car_pose.y, car_pose.yaw), cones, **planner_kwargs).generatePath()
+
+
+@pytest.mark.parametrize("sampler", ["steps", "spline"])
+@pytest.mark.parametrize("matcher", ["greedy", "hungarian"])
+def test_numpy_backend_matches_python(frames, sampler, matcher):
+    for i, frame in enumerate(frames):
+        expected = _plan(frame, sampler=sampler, matcher=matcher)
+        path = _plan(frame, backend="numpy", sampler=sampler, matcher=matcher)
+        assert path_deviation(expected, path) <= BACKEND_TOLERANCE, f"frame {i}"
+
+
+def test_numpy_backend_accepts_cone_arrays(frames):
+    for i, (car_pose, cones) in enumerate(frames):
+        expected = _plan((car_pose, cones))
+        path = _plan((car_pose, ConeArray.from_cones(cones)), backend="numpy")
+        assert path_deviation(expected, path) <= BACKEND_TOLERANCE, f"frame {i}"
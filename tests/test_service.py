@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.models import CarPose
+from src.scenarios import get_scenario_names, make_scenario
+from src.service import PlanningService
+
+
+class SlowExecutor(ThreadPoolExecutor):
+    """Single-thread pool that sleeps ``delay`` seconds before every call."""
+
+    def __init__(self, delay: float):
+        super().__init__(max_workers=1)
+        self.delay = delay
+
+    def submit(self, fn, *args, **kwargs):
+        def slow():
+            time.sleep(self.delay)
+            return fn(*args, **kwargs)
+
+        return super().submit(slow)
+
+
+def _frames(count: int):
+    names = get_scenario_names()
+    return [make_scenario(names[i % len(names)])[::-1] for i in range(count)]
+
+
+def test_results_follow_submission_order():
+    async def run():
+        async with PlanningService(deadline=5.0, executor=SlowExecutor(0.002)) as service:
+            futures = []
+            for car_pose, cones in _frames(40):
+                futures.append(service.submit(car_pose, cones))
+                await asyncio.sleep(0.0005)
+            return await asyncio.gather(*futures), service.stats()
+
+    results, stats = asyncio.run(run())
+    frames = [r.frame for r in results]
+    # every frame is answered by itself or a newer frame, never an older one
+    assert all(frame >= i for i, frame in enumerate(frames))
+    assert frames == sorted(frames)
+    assert results[-1].frame == 39 and not results[-1].fallback
+    assert stats.submitted == 40
+    assert stats.dropped == 40 - len(set(frames)) and stats.dropped > 0
+    assert stats.max_queue_depth == 1 and stats.queue_depth == 0
+
+
+def test_newer_frame_supersedes_waiting_one():
+    async def run():
+        async with PlanningService(deadline=5.0, executor=SlowExecutor(0.05)) as service:
+            (pose_a, cones_a), (pose_b, cones_b), (pose_c, cones_c) = _frames(3)
+            first = service.submit(pose_a, cones_a)
+            await asyncio.sleep(0.01)
+            second = service.submit(pose_b, cones_b)
+            third = service.submit(pose_c, cones_c)
+            return await asyncio.gather(first, second, third)
+
+    first, second, third = asyncio.run(run())
+    assert first.frame == 0
+    assert second.frame == third.frame == 2
+    assert second is third
+
+
+def test_missed_deadline_falls_back_to_previous_path():
+    async def run():
+        executor = SlowExecutor(0.0)
+        async with PlanningService(deadline=0.05, executor=executor) as service:
+            car_pose, cones = _frames(1)[0]
+            first = await service.plan(car_pose, cones)
+            executor.delay = 0.2
+            late = await service.plan(CarPose(car_pose.x + 1, car_pose.y, car_pose.yaw), cones)
+            return first, late, service.stats()
+
+    first, late, stats = asyncio.run(run())
+    assert not first.fallback
+    assert late.fallback and late.path == first.path
+    assert stats.deadline_misses == 1
+
+
+def test_stop_cancels_unanswered_frames():
+    async def run():
+        service = PlanningService(deadline=5.0, executor=SlowExecutor(0.1))
+        service.start()
+        (pose_a, cones_a), (pose_b, cones_b) = _frames(2)
+        planning = service.submit(pose_a, cones_a)
+        await asyncio.sleep(0.02)
+        waiting = service.submit(pose_b, cones_b)
+        await service.stop()
+        return planning, waiting, service
+
+    planning, waiting, service = asyncio.run(run())
+    assert planning.cancelled() and waiting.cancelled()
+    assert service.queue_depth == 0
+    # the planning that was running finished before stop() returned
+    assert service.planned == 1
+    with pytest.raises(RuntimeError):
+        service.submit(*_frames(1)[0])
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import math
+import time
+from typing import Dict, List, Sequence
+
+from src.models import CarPose, Cone
+from src.path_planning import PathPlanning
+
+
+def percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99 (nearest rank) plus mean, min and max of ``samples``."""
+    ordered = sorted(samples)
+
+    def rank(q: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+    return {
+        "p50": rank(0.50),
+        "p95": rank(0.95),
+        "p99": rank(0.99),
+        "mean": sum(ordered) / len(ordered),
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+
+
+def time_planner(
+    car_pose: CarPose, cones: Sequence[Cone], repeat: int, warmup: int = 1, **planner_kwargs
+) -> List[float]:
+    """Wall-clock seconds of ``repeat`` calls to ``generatePath``, after ``warmup`` calls."""
+    samples = []
+    for i in range(warmup + repeat):
+        planner = PathPlanning(CarPose(car_pose.x, car_pose.y, car_pose.yaw), cones, **planner_kwargs)
+        start = time.perf_counter()
+        planner.generatePath()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            samples.append(elapsed)
+    return samples
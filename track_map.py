@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Union
+
+from src.models import CarPose, Cone, ConeArray, PathArray
+from src.path_planning import PathPlanning
+from src.sampling import MAX_DIST, STEP
+from src.spatial_index import GridIndex
+
+
+MERGE_DISTANCE = 0.5  # meters, an observation this close to a mapped cone is the same cone
+TRAIL_SPACING = 0.5  # meters the car moves between recorded trail poses
+MIN_LAP_LENGTH = 20.0  # meters driven before a return to the start counts as a lap
+MAX_TRAIL_GAP = 5.0  # meters between poses beyond which the trail restarts
+CLOSURE_RADIUS = 2.0  # meters from the first trail pose that close the loop
+CLOSURE_HEADING = math.pi / 3  # radians of heading difference still allowed at closure
+LAP_SPACING = 1.0  # meters between centreline samples of the lap
+MAX_HALF_WIDTH = 5.0  # meters, cones further to the side of the trail do not bound the track
+SMOOTHING_PASSES = 20  # neighbour-averaging passes that pull the centreline into a racing line
+ROUNDING_PASSES = 3  # unclamped passes that round off the corners left by the clamping
+MARGIN = 0.5  # meters the racing line keeps from the boundaries
+
+
+class MapInfo(NamedTuple):
+    cones: int
+    observations: int
+    driven: float
+    closed: bool
+    lap_length: Optional[float]
+
+
+class TrackMap:
+    """Global cone map accumulated over frames, planning one closed lap after loop closure.
+
+    Every observed cone is merged into the nearest mapped cone within ``merge_distance``,
+    whose position is the running mean of its observations and whose colour is the
+    majority vote of them, or it starts a new mapped cone. The map lives in a
+    ``GridIndex``, so merging a frame costs O(cones in the frame).
+
+    Passing the car pose to :meth:`observe` also records the car's trail. Once the car has
+    driven ``MIN_LAP_LENGTH`` meters and returns within ``CLOSURE_RADIUS`` of where the
+    trail started, heading the same way, the loop is closed. A jump of more than
+    ``MAX_TRAIL_GAP`` between poses restarts the trail. The lap is then planned once
+    (see :meth:`plan_lap`) and :meth:`path` answers every later pose by slicing that lap
+    from the car's nearest lap point instead of replanning.
+
+    :meth:`plan` wraps all of this for a frame loop: it observes the frame and returns the
+    sliced lap path, or the ``PathPlanning`` path of the frame's cones before the loop has
+    closed. Extra keyword arguments are passed to ``PathPlanning``.
+    """
+
+    def __init__(self, merge_distance: float = MERGE_DISTANCE, cell_size: float = 2.0, **planner_kwargs):
+        if merge_distance <= 0:
+            raise ValueError(f"merge_distance must be positive, got {merge_distance}")
+        self.merge_distance = merge_distance
+        self.planner_kwargs = planner_kwargs
+        self._index = GridIndex([], cell_size=cell_size)
+        self._slot: Dict[int, int] = {}  # index entry -> mapped cone
+        self._entry: List[int] = []  # mapped cone -> index entry
+        self._x: List[float] = []
+        self._y: List[float] = []
+        self._count: List[int] = []
+        self._votes: List[List[int]] = []
+        self._first_color: List[int] = []
+        self.observations = 0
+        self._trail: List[CarPose] = []
+        self.driven = 0.0
+        self.closed = False
+        self.lap: Optional[PathArray] = None
+        self._lap_index: Optional[GridIndex] = None
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return len(self._x)
+
+    def info(self) -> MapInfo:
+        lap_length = self._loop_length() if self.lap is not None else None
+        return MapInfo(len(self._x), self.observations, self.driven, self.closed, lap_length)
+
+    def observe(self, cones: Union[Iterable[Cone], ConeArray], car_pose: Optional[CarPose] = None) -> None:
+        """Merge one frame of cone observations and, with ``car_pose``, extend the trail."""
+        for cone in cones:
+            self._merge(cone)
+        if car_pose is not None:
+            self._record(car_pose)
+
+    def cones(self, min_observations: int = 1) -> List[Cone]:
+        """The mapped cones seen at least ``min_observations`` times, with averaged positions."""
+        return [
+            Cone(self._x[i], self._y[i], self._color(i))
+            for i in range(len(self._x))
+            if self._count[i] >= min_observations
+        ]
+
+    def _color(self, i: int) -> int:
+        yellow, blue = self._votes[i]
+        if yellow == blue:
+            return self._first_color[i]
+        return 1 if blue > yellow else 0
+
+    def _merge(self, cone: Cone) -> None:
+        self.observations += 1
+        entry = self._index.nearest(cone.x, cone.y)
+        if entry is not None:
+            i = self._slot[entry]
+            if math.hypot(self._x[i] - cone.x, self._y[i] - cone.y) <= self.merge_distance:
+                n = self._count[i] + 1
+                self._x[i] += (cone.x - self._x[i]) / n
+                self._y[i] += (cone.y - self._y[i]) / n
+                self._count[i] = n
+                self._votes[i][cone.color] += 1
+                # move the index entry along with the mean
+                self._index.remove(entry)
+                del self._slot[entry]
+                entry = self._index.add(self._x[i], self._y[i])
+                self._slot[entry] = i
+                self._entry[i] = entry
+                return
+        i = len(self._x)
+        self._x.append(cone.x)
+        self._y.append(cone.y)
+        self._count.append(1)
+        votes = [0, 0]
+        votes[cone.color] += 1
+        self._votes.append(votes)
+        self._first_color.append(cone.color)
+        entry = self._index.add(cone.x, cone.y)
+        self._slot[entry] = i
+        self._entry.append(entry)
+
+    def _record(self, car_pose: CarPose) -> None:
+        pose = CarPose(car_pose.x, car_pose.y, car_pose.yaw)
+        if not self._trail:
+            self._trail.append(pose)
+            return
+        last = self._trail[-1]
+        step = math.hypot(pose.x - last.x, pose.y - last.y)
+        if step < TRAIL_SPACING:
+            return
+        if step > MAX_TRAIL_GAP and not self.closed:
+            # the car was moved (a replay restarting, a relocalisation), it did not drive there
+            self._trail = [pose]
+            self.driven = 0.0
+            return
+        self._trail.append(pose)
+        self.driven += step
+        if self.closed or self.driven < MIN_LAP_LENGTH:
+            return
+        start = self._trail[0]
+        turn = pose.yaw - start.yaw
+        if (
+            math.hypot(pose.x - start.x, pose.y - start.y) <= CLOSURE_RADIUS
+            and abs(math.atan2(math.sin(turn), math.cos(turn))) <= CLOSURE_HEADING
+        ):
+            self.closed = True
+            self.plan_lap()
+
+    def plan_lap(self) -> PathArray:
+        """Plan the closed racing line over the whole map along the recorded lap.
+
+        The trail is resampled every ``LAP_SPACING`` meters. At each sample the nearest
+        blue cone to the left and yellow cone to the right (within ``MAX_HALF_WIDTH``) give
+        the track centre; where one side is unmapped, the median width of the other samples
+        fills in. ``SMOOTHING_PASSES`` rounds of neighbour averaging then shorten and
+        straighten the loop, each time clamped to ``MARGIN`` inside both boundaries. A few
+        unclamped ``ROUNDING_PASSES`` round off the corners the clamp leaves at the apexes,
+        and the result is sampled every ``STEP`` meters as a ``PathArray``.
+        """
+        trail = self._trail
+        if len(trail) < 3:
+            raise ValueError("plan_lap needs a recorded trail of at least 3 poses")
+        px, py = _resample_closed([p.x for p in trail], [p.y for p in trail], LAP_SPACING)
+        n = len(px)
+        left: List[Optional[float]] = []
+        right: List[Optional[float]] = []
+        nx: List[float] = []
+        ny: List[float] = []
+        for k in range(n):
+            tx = px[(k + 1) % n] - px[k - 1]
+            ty = py[(k + 1) % n] - py[k - 1]
+            norm = math.hypot(tx, ty) or 1.0
+            tx, ty = tx / norm, ty / norm
+            nx.append(-ty)
+            ny.append(tx)
+            blue = yellow = None
+            for entry in self._index.query_radius(px[k], py[k], MAX_HALF_WIDTH):
+                i = self._slot[entry]
+                dx = self._x[i] - px[k]
+                dy = self._y[i] - py[k]
+                along = dx * tx + dy * ty
+                if abs(along) > LAP_SPACING:
+                    continue
+                side = -dx * ty + dy * tx
+                if self._color(i) == 1 and side > 0 and (blue is None or side < blue):
+                    blue = side
+                elif self._color(i) == 0 and side < 0 and (yellow is None or side > yellow):
+                    yellow = side
+            left.append(blue)
+            right.append(yellow)
+
+        widths = sorted(b - y for b, y in zip(left, right) if b is not None and y is not None)
+        half = widths[len(widths) // 2] / 2 if widths else 0.0
+        lo: List[float] = []
+        hi: List[float] = []
+        for b, y in zip(left, right):
+            if b is None and y is None:
+                lo.append(0.0)
+                hi.append(0.0)
+                continue
+            b = b if b is not None else y + 2 * half
+            y = y if y is not None else b - 2 * half
+            if b - y > 2 * MARGIN:
+                lo.append(y + MARGIN)
+                hi.append(b - MARGIN)
+            else:
+                lo.append((b + y) / 2)
+                hi.append((b + y) / 2)
+
+        offset = [(a + b) / 2 for a, b in zip(lo, hi)]
+        cx = [px[k] + offset[k] * nx[k] for k in range(n)]
+        cy = [py[k] + offset[k] * ny[k] for k in range(n)]
+        for _ in range(SMOOTHING_PASSES):
+            sx = [(cx[k - 1] + cx[(k + 1) % n]) / 2 for k in range(n)]
+            sy = [(cy[k - 1] + cy[(k + 1) % n]) / 2 for k in range(n)]
+            for k in range(n):
+                lateral = (sx[k] - px[k]) * nx[k] + (sy[k] - py[k]) * ny[k]
+                lateral = min(hi[k], max(lo[k], lateral))
+                cx[k] = px[k] + lateral * nx[k]
+                cy[k] = py[k] + lateral * ny[k]
+        # the clamp leaves a corner wherever the line touches a margin; round those off
+        for _ in range(ROUNDING_PASSES):
+            cx = [(cx[k - 1] + 2 * cx[k] + cx[(k + 1) % n]) / 4 for k in range(n)]
+            cy = [(cy[k - 1] + 2 * cy[k] + cy[(k + 1) % n]) / 4 for k in range(n)]
+
+        x, y = _resample_closed(cx, cy, STEP)
+        self.lap = PathArray(x, y)
+        self._lap_index = GridIndex.from_coords(x, y)
+        self._cursor = 0
+        return self.lap
+
+    def _loop_length(self) -> float:
+        lap = self.lap
+        return lap.length + math.hypot(lap.x[0] - lap.x[-1], lap.y[0] - lap.y[-1])
+
+    def path(self, car_pose: CarPose, max_dist: float = MAX_DIST) -> Optional[PathArray]:
+        """The next ``max_dist`` meters of the lap after the car's nearest lap point.
+
+        Starts with a straight lead-in every ``STEP`` meters from the car to the lap, so the
+        path connects from the car even when it is off the line. Returns None until the
+        loop has closed.
+        """
+        lap = self.lap
+        if lap is None:
+            return None
+        size = len(lap)
+        # the car usually moved a few points along since the last query
+        best = None
+        best_d = math.inf
+        for k in range(self._cursor - 5, self._cursor + 40):
+            k %= size
+            d = (lap.x[k] - car_pose.x) ** 2 + (lap.y[k] - car_pose.y) ** 2
+            if d < best_d:
+                best, best_d = k, d
+        if best_d > (4 * STEP) ** 2:
+            best = self._lap_index.nearest(car_pose.x, car_pose.y)
+        self._cursor = best
+
+        # the car is rarely exactly on the line: a straight lead-in every STEP joins it to the
+        # first lap point ahead, and counts against max_dist like every step after it
+        first = (best + 1) % size
+        dx = lap.x[first] - car_pose.x
+        dy = lap.y[first] - car_pose.y
+        lead = math.hypot(dx, dy)
+        lead_in = max(0, math.ceil(lead / STEP - 1e-9) - 1)
+        budget = int(max_dist / STEP + 1e-9)
+        count = max(0, min(size - 1, budget - lead_in, 1 + int((max_dist - lead) / STEP + 1e-9)))
+        if count == 0:
+            lead_in = 0
+        idx = [(best + j) % size for j in range(1, count + 1)]
+        ux = dx / lead if lead > 0 else 0.0
+        uy = dy / lead if lead > 0 else 0.0
+        lead_heading = math.atan2(dy, dx)
+        x = array("d", [car_pose.x + j * STEP * ux for j in range(1, lead_in + 1)])
+        y = array("d", [car_pose.y + j * STEP * uy for j in range(1, lead_in + 1)])
+        heading = array("d", [lead_heading]) * lead_in
+        curvature = array("d", bytes(8 * lead_in))
+        s = array("d", [(j - 1) * STEP for j in range(1, lead_in + 1)])
+        x.extend(lap.x[k] for k in idx)
+        y.extend(lap.y[k] for k in idx)
+        heading.extend(lap.heading[k] for k in idx)
+        curvature.extend(lap.curvature[k] for k in idx)
+        loop = self._loop_length()
+        s0 = lap.s[idx[0]] if idx else 0.0
+        offset = lead - STEP if lead_in else 0.0
+        s.extend(lap.s[k] - s0 + offset + (loop if k < idx[0] else 0.0) for k in idx)
+        return PathArray(x, y, s, heading, curvature)
+
+    def plan(self, car_pose: CarPose, cones: Union[Sequence[Cone], ConeArray]) -> PathArray:
+        """Observe a frame and return its path: sliced from the lap once closed, else planned."""
+        self.observe(cones, car_pose)
+        path = self.path(car_pose)
+        if path is not None:
+            return path
+        pose = CarPose(car_pose.x, car_pose.y, car_pose.yaw)
+        return PathPlanning(pose, cones, **self.planner_kwargs).generatePath()
+
+
+def _resample_closed(xs: Sequence[float], ys: Sequence[float], spacing: float):
+    """Points every ``spacing`` meters around the closed polygon (xs, ys), starting at its first point."""
+    n = len(xs)
+    out_x = array("d")
+    out_y = array("d")
+    carry = 0.0  # distance along the current edge of the next sample
+    for k in range(n):
+        x0, y0 = xs[k], ys[k]
+        x1, y1 = xs[(k + 1) % n], ys[(k + 1) % n]
+        edge = math.hypot(x1 - x0, y1 - y0)
+        while carry < edge:
+            t = carry / edge
+            out_x.append(x0 + t * (x1 - x0))
+            out_y.append(y0 + t * (y1 - y0))
+            carry += spacing
+        carry -= edge
+    return out_x, out_y
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import math
+import time
+from typing import List, NamedTuple, Optional, Sequence, Union
+
+from src.models import CarPose, Cone, ConeArray, Path2D, PathArray
+
+
+CHECKS = ("step", "length", "sides", "clearance")
+MIN_LENGTH = 5.0  # meters, shortest acceptable path
+MAX_LENGTH = 10.0  # meters, longest acceptable path
+MAX_STEP = 0.5  # meters between consecutive path points, at most
+MIN_CLEARANCE = 0.15  # meters between the path and any cone centre, about a cone's base radius plus margin
+SIDE_RANGE = 3.0  # meters, cones further from the path than this do not bound it
+_TOLERANCE = 1e-6  # meters of rounding accepted on every limit
+
+
+class CheckResult(NamedTuple):
+    """Outcome of one check: the measured worst case against its limit and the time it took."""
+
+    name: str
+    ok: bool
+    value: float
+    limit: float
+    ms: float
+
+
+class ValidationResult(NamedTuple):
+    """All :data:`CHECKS` of one path plus the indices of the cones on the wrong side of it."""
+
+    ok: bool
+    checks: List[CheckResult]
+    wrong_side: List[int]
+
+    @property
+    def failed(self) -> List[CheckResult]:
+        return [check for check in self.checks if not check.ok]
+
+    @property
+    def total_ms(self) -> float:
+        return sum(check.ms for check in self.checks)
+
+
+class PathValidator:
+    """Vectorised safety gate for the contract of ``PathPlanning.generatePath``.
+
+    A path passes when every step is at most ``max_step``, the total length lies between
+    ``min_length`` and ``max_length``, no blue cone is right of the path and no yellow cone
+    left of it, and no cone is closer than ``min_clearance``. Sides are judged by the
+    signed distance to each cone's nearest path segment, counting only cones within
+    ``side_range`` of the path that do not project before its start or past its end. With a
+    ``car_pose`` the path is checked from the car's position onwards.
+
+    Every check is evaluated with NumPy over all points, segments and cones at once, so a
+    100-point path against a few dozen cones validates in well under a millisecond.
+    """
+
+    def __init__(
+        self,
+        min_length: float = MIN_LENGTH,
+        max_length: float = MAX_LENGTH,
+        max_step: float = MAX_STEP,
+        min_clearance: float = MIN_CLEARANCE,
+        side_range: float = SIDE_RANGE,
+    ):
+        if min_length > max_length:
+            raise ValueError(f"min_length must not exceed max_length, got {min_length} > {max_length}")
+        if max_step <= 0 or side_range <= 0:
+            raise ValueError("max_step and side_range must be positive")
+        self.min_length = min_length
+        self.max_length = max_length
+        self.max_step = max_step
+        self.min_clearance = min_clearance
+        self.side_range = side_range
+
+    def validate(
+        self,
+        path: Union[Path2D, PathArray],
+        cones: Union[Sequence[Cone], ConeArray],
+        car_pose: Optional[CarPose] = None,
+    ) -> ValidationResult:
+        """Run every check on ``path`` against ``cones``; each result carries its own timing."""
+        import numpy as np
+
+        start = time.perf_counter()
+        px, py = _path_columns(path, car_pose)
+        steps = np.hypot(np.diff(px), np.diff(py))
+        max_step = float(steps.max()) if len(steps) else 0.0
+        step = _result("step", max_step <= self.max_step + _TOLERANCE, max_step, self.max_step, start)
+
+        start = time.perf_counter()
+        length = float(steps.sum())
+        length_ok = self.min_length - _TOLERANCE <= length <= self.max_length + _TOLERANCE
+        limit = self.max_length if length > self.max_length else self.min_length
+        length_check = _result("length", length_ok, length, limit, start)
+
+        # nearest segment of every cone near the path; shared by the side and clearance checks
+        start = time.perf_counter()
+        cx, cy, color, index = _cone_columns(cones)
+        if len(px):
+            near = (
+                (cx >= px.min() - self.side_range)
+                & (cx <= px.max() + self.side_range)
+                & (cy >= py.min() - self.side_range)
+                & (cy <= py.max() + self.side_range)
+            )
+            cx, cy, color, index = cx[near], cy[near], color[near], index[near]
+        wrong = np.zeros(len(cx), dtype=bool)
+        distance = np.full(len(cx), math.inf)
+        if len(cx) and len(px) > 1:
+            distance, cross, beyond = _nearest_segments(px, py, cx, cy)
+            # blue (1) must be left (cross > 0), yellow (0) right (cross < 0)
+            sign = np.where(color == 1, -1.0, 1.0)
+            wrong = ~beyond & (distance <= self.side_range) & (sign * cross >= 0)
+        sides = _result("sides", not wrong.any(), float(wrong.sum()), 0.0, start)
+
+        start = time.perf_counter()
+        clearance = float(distance.min()) if len(distance) else math.inf
+        clear = _result("clearance", clearance >= self.min_clearance - _TOLERANCE, clearance, self.min_clearance, start)
+
+        checks = [step, length_check, sides, clear]
+        return ValidationResult(all(c.ok for c in checks), checks, index[wrong].tolist())
+
+
+def validate_path(
+    path: Union[Path2D, PathArray],
+    cones: Union[Sequence[Cone], ConeArray],
+    car_pose: Optional[CarPose] = None,
+    **limits,
+) -> ValidationResult:
+    """Validate one path with a :class:`PathValidator` built from ``limits``."""
+    return PathValidator(**limits).validate(path, cones, car_pose)
+
+
+def _result(name: str, ok: bool, value: float, limit: float, start: float) -> CheckResult:
+    return CheckResult(name, bool(ok), value, limit, (time.perf_counter() - start) * 1e3)
+
+
+def _path_columns(path: Union[Path2D, PathArray], car_pose: Optional[CarPose]):
+    import numpy as np
+
+    if isinstance(path, PathArray):
+        px = np.frombuffer(path.x, dtype=np.float64)
+        py = np.frombuffer(path.y, dtype=np.float64)
+    else:
+        xy = np.asarray(path, dtype=float).reshape(-1, 2)
+        px, py = xy[:, 0], xy[:, 1]
+    if car_pose is not None:
+        px = np.concatenate(([car_pose.x], px))
+        py = np.concatenate(([car_pose.y], py))
+    return px, py
+
+
+def _cone_columns(cones: Union[Sequence[Cone], ConeArray]):
+    import numpy as np
+
+    if isinstance(cones, ConeArray):
+        cx, cy, color = cones.to_numpy()
+    else:
+        cx = np.fromiter((c.x for c in cones), dtype=float, count=len(cones))
+        cy = np.fromiter((c.y for c in cones), dtype=float, count=len(cones))
+        color = np.fromiter((c.color for c in cones), dtype=np.uint8, count=len(cones))
+    return cx, cy, color, np.arange(len(cx))
+
+
+def _nearest_segments(px, py, cx, cy):
+    """Each cone's distance to the polyline (px, py) and its nearest segment.
+
+    Returns the distances, the cross products with the nearest segments (positive when the
+    cone is left of it) and whether each cone projects before the start or past the end.
+    """
+    import numpy as np
+
+    ax, ay = px[:-1], py[:-1]
+    vx, vy = np.diff(px), np.diff(py)
+    len2 = vx * vx + vy * vy
+    rx = cx[:, None] - ax
+    ry = cy[:, None] - ay
+    t = np.divide(rx * vx + ry * vy, len2, out=np.zeros(rx.shape), where=len2 > 0)
+    tc = np.clip(t, 0.0, 1.0)
+    dx = rx - tc * vx
+    dy = ry - tc * vy
+    d2 = dx * dx + dy * dy
+    seg = np.argmin(d2, axis=1)
+    rows = np.arange(len(cx))
+    t_seg = t[rows, seg]
+    beyond = ((seg == 0) & (t_seg < 0)) | ((seg == len(vx) - 1) & (t_seg > 1))
+    cross = vx[seg] * ry[rows, seg] - vy[seg] * rx[rows, seg]
+    return np.sqrt(d2[rows, seg]), cross, beyond